@@ -1,3 +1,4 @@
+import copy
 import json
 import yaml
 import numpy as np
@@ -12,6 +13,14 @@ Mw = 18 # [g/mol]
 # 空気の分子量
 Mair = 28.966 # [g/mol]
 
+# VIPS.evaluateBatchで配列を与えられる工程条件・物性値 (VIPSの属性名)
+BATCH_INPUTS = ("L_AG", "d_AG", "T_AG", "P_AG", "w30", "w20", "w10", "di", "do", "T_B",
+                "w3_B", "w2_B", "w1_B", "v", "rho2", "M2", "rho1", "M1", "rho", "uB",
+                "k_f", "k_B", "delta")
+# シャーウッド数の相関式の適用範囲 (下限を含み, 上限を含まない)
+REF_RANGE = (10., 35000.)
+REB_RANGE = (0., 2.e+5)
+
 class VIPS:
     def __init__(self):
         pass
@@ -689,14 +698,26 @@ class VIPS:
         Returns:
             float: 糸表面におけるシャーウッド数 [-]
         """
-        Ref = self.Ref()
-        if Ref < 10 or Ref >= 35000:
-            raise Exception(f"Re={Ref}適用範囲外のレイノルズ数です")
-        if Ref < 2000:
-            return 1.86 * Ref**(1/3) * self.Sc()**(1/3) \
-                   * (self.do / self.L_AG)**(1/3)
-        else:
-            return 0.023 * Ref**(0.83) * self.Sc()**(0.44) 
+        Sh = self.ShfArray()
+        if np.any(np.ma.getmaskarray(Sh)):
+            raise Exception(f"Re={self.Ref()}適用範囲外のレイノルズ数です")
+        return Sh.filled(np.nan)[()]
+
+    def ShfArray(self) -> np.ma.MaskedArray:
+        """糸表面におけるシャーウッド数 (Shfの配列版)
+           例外を出さずに, レイノルズ数が適用範囲外の条件をマスクする
+
+        Returns:
+            np.ma.MaskedArray: 糸表面におけるシャーウッド数 [-]
+        """
+        Ref = np.asarray(self.Ref(), dtype=float)
+        Sc = self.Sc()
+        with np.errstate(invalid='ignore'):
+            laminar = 1.86 * Ref**(1/3) * Sc**(1/3) * (self.do / self.L_AG)**(1/3)
+            turbulent = 0.023 * Ref**(0.83) * Sc**(0.44)
+            outside = ~((Ref >= REF_RANGE[0]) & (Ref < REF_RANGE[1]))
+        Sh = np.where(Ref < 2000, laminar, turbulent)
+        return np.ma.masked_array(Sh, mask=np.broadcast_to(outside, Sh.shape))
 
     def ShB(self) -> float:
         """凝固浴界面におけるシャーウッド数を返す
@@ -705,9 +726,24 @@ class VIPS:
         Returns:
             float: 凝固浴面におけるシャーウッド数 [-]
         """
-        if self.ReB() < 0 or self.ReB() >= 2.e+5:
+        Sh = self.ShBArray()
+        if np.any(np.ma.getmaskarray(Sh)):
             raise Exception(f"Re={self.ReB()}適用範囲外のレイノルズ数です")
-        return 0.332 * self.ReB()**(1/2) * self.Sc()**(1/3)
+        return Sh.filled(np.nan)[()]
+
+    def ShBArray(self) -> np.ma.MaskedArray:
+        """凝固浴界面におけるシャーウッド数 (ShBの配列版)
+           例外を出さずに, レイノルズ数が適用範囲外の条件をマスクする
+
+        Returns:
+            np.ma.MaskedArray: 凝固浴面におけるシャーウッド数 [-]
+        """
+        ReB = np.asarray(self.ReB(), dtype=float)
+        with np.errstate(invalid='ignore'):
+            Sh = 0.332 * ReB**(1/2) * self.Sc()**(1/3)
+            outside = ~((ReB >= REB_RANGE[0]) & (ReB < REB_RANGE[1]))
+        Sh = np.asarray(Sh, dtype=float)
+        return np.ma.masked_array(Sh, mask=np.broadcast_to(outside, Sh.shape))
 
 
     def ReB(self) -> float :
@@ -744,6 +780,77 @@ class VIPS:
         T_K = self.T_AG + 273.15
         return 1.458e-6 * T_K**(3/2) / (T_K + 110.4)
 
+    def evaluateBatch(self, columns: dict, z=None) -> dict:
+        """工程条件の配列を一括で評価する
+           columnsに無い条件は現在のパラメータの値を使い, 全ての配列をブロードキャストして計算する.
+           現在のパラメータ (current_param) は変更しない.
+           レイノルズ数が適用範囲外の条件は例外を出さずに, シャーウッド数とk_f, k_Bの推算値をNaNにして
+           Ref_out_of_range, ReB_out_of_rangeをTrueにする
+
+        Args:
+            columns (dict): {属性名: 配列} 属性名はBATCH_INPUTSのいずれか (L_AG, T_AG, do, vなど)
+            z (array, optional): 評価するAG部の位置. Noneならエアギャップの出口 (L_AG). Defaults to None.
+
+        Returns:
+            dict: {変数名: 配列} H_AG, VH_AG, Psi1, ww1, ww2, ww3, ReB, Ref, Sc, Shf, ShBなどの中間変数と
+                  適用範囲外のフラグ. 凝固浴面の風速 (uB) が無い場合, 凝固浴面の変数は含まない
+        """
+        unknown = [name for name in columns if not name in BATCH_INPUTS]
+        if len(unknown) > 0:
+            print(f"一括評価できない変数です. {unknown}, 対応する変数: {BATCH_INPUTS}", file=sys.stderr)
+            raise ValueError
+        values = {name: np.asarray(val, dtype=float) for name, val in columns.items()}
+        if not z is None:
+            values["z"] = np.asarray(z, dtype=float)
+        try:
+            shape = np.broadcast_shapes(*[val.shape for val in values.values()])
+        except ValueError:
+            print(f"配列の形状が一致しません. { {name: val.shape for name, val in values.items()} }", file=sys.stderr)
+            raise ValueError
+
+        # 現在のパラメータの写しに配列を設定する (setterがcurrent_paramを書き換えるため)
+        batch = VIPS()
+        batch.readParam(copy.deepcopy(self.current_param))
+        for name, val in columns.items():
+            setattr(batch, name, values[name])
+        if "T_AG" in columns or "P_AG" in columns:
+            # readParamと同じくエアギャップ部の温度と圧力から乾燥空気の密度を計算し直す
+            batch.rhoair = (batch.P_AG/760 * 101325) / (R/Mair) / (batch.T_AG+273.15) * 0.001
+        z = values.get("z", batch.L_AG)
+
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            result = {
+                "rhoair": batch.rhoair,
+                "A_B": batch.A_B(),
+                "P1sat": batch.P1sat(),
+                "D_AG": batch.D_AG(),
+                "C": batch.C(),
+                "P1_B": batch.P1_B(),
+                "HH_B": batch.HH_B(),
+                "dmdt0": batch.dmdt0(),
+                "H_AG": batch.H_AG(z),
+                "VH_AG": batch.VH_AG(z),
+                "Psi1": batch.Psi1(z),
+                "ww1": batch.ww1(z),
+                "ww2": batch.ww2(z),
+                "ww3": batch.ww3(z),
+                "t": batch.t(z),
+                "muair": batch.muair(),
+                "Sc": batch.Sc(),
+                "Ref": batch.Ref(),
+            }
+            Shf = batch.ShfArray()
+            result["Shf"] = Shf.filled(np.nan)
+            result["Ref_out_of_range"] = np.ma.getmaskarray(Shf)
+            result["k_f_approx"] = result["Shf"] * result["D_AG"] * batch.rhoair / batch.do
+            if hasattr(batch, "uB"):
+                ShB = batch.ShBArray()
+                result["ReB"] = batch.ReB()
+                result["ShB"] = ShB.filled(np.nan)
+                result["ReB_out_of_range"] = np.ma.getmaskarray(ShB)
+                result["k_B_approx"] = result["ShB"] * result["D_AG"] * batch.rhoair / batch.d_AG
+        return {name: np.broadcast_to(val, shape).copy() for name, val in result.items()}
+
     # def frac1(self, z: float = None):
     #     if isinstance(z, type(None)):
     #         return self.frac1(self.L_AG)
@@ -0,0 +1,453 @@
+import sys
+import uuid
+import types
+import hashlib
+import numpy as np
+
+class ChiModel:
+    """χパラメータの組成依存性を表すモデルの基底クラス
+       χは貧溶媒体積分率φ1と良溶媒体積分率φ2の関数 χ(φ1, φ2) として扱い,
+       全てのメソッドはnumpy配列を受け取って一括で計算する.
+       派生クラスはvalを実装する. grad, hess, deriv3を実装しない場合は中心差分で近似する
+    """
+    def val(self, phi1, phi2):
+        """χの値
+
+        Args:
+            phi1 (np.ndarray): 貧溶媒体積分率
+            phi2 (np.ndarray): 良溶媒体積分率
+
+        Returns:
+            np.ndarray: χ
+        """
+        raise NotImplementedError
+
+    def grad(self, phi1, phi2, h: float = 1e-5) -> tuple[np.ndarray, np.ndarray]:
+        """χの(φ1, φ2)に関する1階微分 (既定では中心差分)
+
+        Args:
+            phi1 (np.ndarray): 貧溶媒体積分率
+            phi2 (np.ndarray): 良溶媒体積分率
+            h (float, optional): 差分幅. Defaults to 1e-5.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (∂χ/∂φ1, ∂χ/∂φ2)
+        """
+        phi1, phi2 = np.asarray(phi1, dtype=float), np.asarray(phi2, dtype=float)
+        d1 = (self.val(phi1 + h, phi2) - self.val(phi1 - h, phi2)) / (2*h)
+        d2 = (self.val(phi1, phi2 + h) - self.val(phi1, phi2 - h)) / (2*h)
+        return d1, d2
+
+    def hess(self, phi1, phi2, h: float = 1e-4) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """χの(φ1, φ2)に関する2階微分 (既定では中心差分)
+
+        Args:
+            phi1 (np.ndarray): 貧溶媒体積分率
+            phi2 (np.ndarray): 良溶媒体積分率
+            h (float, optional): 差分幅. Defaults to 1e-4.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: (∂²χ/∂φ1², ∂²χ/∂φ1∂φ2, ∂²χ/∂φ2²)
+        """
+        phi1, phi2 = np.asarray(phi1, dtype=float), np.asarray(phi2, dtype=float)
+        f0 = self.val(phi1, phi2)
+        d11 = (self.val(phi1 + h, phi2) - 2*f0 + self.val(phi1 - h, phi2)) / h**2
+        d22 = (self.val(phi1, phi2 + h) - 2*f0 + self.val(phi1, phi2 - h)) / h**2
+        d12 = (self.val(phi1 + h, phi2 + h) - self.val(phi1 + h, phi2 - h)
+               - self.val(phi1 - h, phi2 + h) + self.val(phi1 - h, phi2 - h)) / (4*h**2)
+        return d11, d12, d22
+
+    def deriv3(self, phi1, phi2, h: float = 1e-3) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """χの(φ1, φ2)に関する3階微分 (既定ではhessの中心差分)
+
+        Args:
+            phi1 (np.ndarray): 貧溶媒体積分率
+            phi2 (np.ndarray): 良溶媒体積分率
+            h (float, optional): 差分幅. Defaults to 1e-3.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+                (∂³χ/∂φ1³, ∂³χ/∂φ1²∂φ2, ∂³χ/∂φ1∂φ2², ∂³χ/∂φ2³)
+        """
+        phi1, phi2 = np.asarray(phi1, dtype=float), np.asarray(phi2, dtype=float)
+        p11, p12, p22 = self.hess(phi1 + h, phi2)
+        m11, m12, m22 = self.hess(phi1 - h, phi2)
+        _, _, q22 = self.hess(phi1, phi2 + h)
+        _, _, n22 = self.hess(phi1, phi2 - h)
+        return (p11 - m11) / (2*h), (p12 - m12) / (2*h), (p22 - m22) / (2*h), (q22 - n22) / (2*h)
+
+    def isConstant(self) -> bool:
+        """組成に依存しないかどうか
+        """
+        return False
+
+    def toDict(self) -> dict:
+        """モデルの定義を辞書にする (キャッシュのキーなどに使う)
+
+        Returns:
+            dict: {"model": クラス名, パラメータ名: 値, ...}
+        """
+        return {"model": type(self).__name__, **self.params()}
+
+    def params(self) -> dict:
+        """モデルのパラメータ
+
+        Returns:
+            dict: パラメータ名と値
+        """
+        return {}
+
+    def __call__(self, phi1, phi2):
+        return self.val(phi1, phi2)
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{key}={value!r}" for key, value in self.params().items())
+        return f"{type(self).__name__}({params})"
+
+class ConstantChi(ChiModel):
+    """組成に依存しない定数のχ
+    """
+    def __init__(self, value: float):
+        self.value = float(value)
+
+    def val(self, phi1, phi2):
+        return self.value + np.zeros(np.shape(phi1))
+
+    def grad(self, phi1, phi2):
+        zeros = np.zeros(np.shape(phi1))
+        return zeros, zeros
+
+    def hess(self, phi1, phi2):
+        zeros = np.zeros(np.shape(phi1))
+        return zeros, zeros, zeros
+
+    def deriv3(self, phi1, phi2):
+        zeros = np.zeros(np.shape(phi1))
+        return zeros, zeros, zeros, zeros
+
+    def isConstant(self) -> bool:
+        return True
+
+    def params(self) -> dict:
+        return {"value": self.value}
+
+class OneVariableChi(ChiModel):
+    """1つの組成変数xの関数 χ = g(x) で表されるχの基底クラス
+       派生クラスはg(x)とその1階, 2階, 3階微分を実装する. xは次のいずれか
+           'u2'  : 溶媒混合物中の良溶媒分率 φ2/(φ1 + φ2)
+           'phi1': 貧溶媒体積分率
+           'phi2': 良溶媒体積分率
+           'phi3': ポリマー体積分率 1 - φ1 - φ2
+    """
+    VARIABLES = ('u2', 'phi1', 'phi2', 'phi3')
+
+    def __init__(self, variable: str = 'u2'):
+        if not variable in self.VARIABLES:
+            print(f"対応しない組成変数です. variable = {variable}", file=sys.stderr)
+            raise ValueError
+        self.variable = variable
+
+    def g(self, x):
+        raise NotImplementedError
+
+    def dg(self, x):
+        raise NotImplementedError
+
+    def ddg(self, x):
+        raise NotImplementedError
+
+    def dddg(self, x):
+        raise NotImplementedError
+
+    def __variable(self, phi1, phi2) -> tuple:
+        """組成変数xと, その(φ1, φ2)に関する1階, 2階, 3階微分
+        """
+        phi1, phi2 = np.asarray(phi1, dtype=float), np.asarray(phi2, dtype=float)
+        zeros = np.zeros(np.broadcast(phi1, phi2).shape)
+        if self.variable == 'u2':
+            total = phi1 + phi2
+            x = phi2 / total
+            dx = (-phi2 / total**2, phi1 / total**2)
+            ddx = (2*phi2 / total**3, (phi2 - phi1) / total**3, -2*phi1 / total**3)
+            dddx = (-6*phi2 / total**4, (2*phi1 - 4*phi2) / total**4,
+                    (4*phi1 - 2*phi2) / total**4, 6*phi1 / total**4)
+        elif self.variable == 'phi1':
+            x, dx, ddx = phi1 + zeros, (zeros + 1., zeros), (zeros, zeros, zeros)
+        elif self.variable == 'phi2':
+            x, dx, ddx = phi2 + zeros, (zeros, zeros + 1.), (zeros, zeros, zeros)
+        else:
+            x, dx, ddx = 1. - phi1 - phi2, (zeros - 1., zeros - 1.), (zeros, zeros, zeros)
+        if self.variable != 'u2':
+            dddx = (zeros, zeros, zeros, zeros)
+        return x, dx, ddx, dddx
+
+    def val(self, phi1, phi2):
+        x, _, _, _ = self.__variable(phi1, phi2)
+        return self.g(x)
+
+    def grad(self, phi1, phi2):
+        x, (dx1, dx2), _, _ = self.__variable(phi1, phi2)
+        dg = self.dg(x)
+        return dg*dx1, dg*dx2
+
+    def hess(self, phi1, phi2):
+        x, (dx1, dx2), (ddx11, ddx12, ddx22), _ = self.__variable(phi1, phi2)
+        dg, ddg = self.dg(x), self.ddg(x)
+        return ddg*dx1*dx1 + dg*ddx11, ddg*dx1*dx2 + dg*ddx12, ddg*dx2*dx2 + dg*ddx22
+
+    def deriv3(self, phi1, phi2):
+        x, (dx1, dx2), (ddx11, ddx12, ddx22), (d111, d112, d122, d222) = self.__variable(phi1, phi2)
+        dg, ddg, dddg = self.dg(x), self.ddg(x), self.dddg(x)
+        return (dddg*dx1**3 + 3*ddg*ddx11*dx1 + dg*d111,
+                dddg*dx1**2*dx2 + ddg*(ddx11*dx2 + 2*ddx12*dx1) + dg*d112,
+                dddg*dx1*dx2**2 + ddg*(ddx22*dx1 + 2*ddx12*dx2) + dg*d122,
+                dddg*dx2**3 + 3*ddg*ddx22*dx2 + dg*d222)
+
+    def params(self) -> dict:
+        return {"variable": self.variable}
+
+class YipMcHughChi(OneVariableChi):
+    """溶媒混合物中の良溶媒分率u2に線形に依存するχ (Yip-McHugh型)
+           χ = a + b u2
+    """
+    def __init__(self, a: float, b: float):
+        super().__init__('u2')
+        self.a = float(a)
+        self.b = float(b)
+
+    def g(self, x):
+        return self.a + self.b*x
+
+    def dg(self, x):
+        return self.b + np.zeros(np.shape(x))
+
+    def ddg(self, x):
+        return np.zeros(np.shape(x))
+
+    def dddg(self, x):
+        return np.zeros(np.shape(x))
+
+    def params(self) -> dict:
+        return {"a": self.a, "b": self.b}
+
+class AltenaChi(OneVariableChi):
+    """溶媒混合物中の良溶媒分率u2に依存するχ (Altena-Smolders型)
+           χ = α + β / (1 - γ u2)
+    """
+    def __init__(self, alpha: float, beta: float, gamma: float):
+        super().__init__('u2')
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+        self.gamma = float(gamma)
+
+    def g(self, x):
+        return self.alpha + self.beta / (1. - self.gamma*x)
+
+    def dg(self, x):
+        return self.beta*self.gamma / (1. - self.gamma*x)**2
+
+    def ddg(self, x):
+        return 2*self.beta*self.gamma**2 / (1. - self.gamma*x)**3
+
+    def dddg(self, x):
+        return 6*self.beta*self.gamma**3 / (1. - self.gamma*x)**4
+
+    def params(self) -> dict:
+        return {"alpha": self.alpha, "beta": self.beta, "gamma": self.gamma}
+
+class PolynomialChi(OneVariableChi):
+    """組成変数xの多項式で表されるχ
+           χ = c0 + c1 x + c2 x^2 + ...
+    """
+    def __init__(self, coefs: list, variable: str = 'u2'):
+        """コンストラクタ
+
+        Args:
+            coefs (list): 係数 (c0, c1, c2, ...) 低次から順に並べる
+            variable (str, optional): 組成変数 ('u2', 'phi1', 'phi2', 'phi3'). Defaults to 'u2'.
+        """
+        super().__init__(variable)
+        self.coefs = np.array(coefs, dtype=float)
+        self.poly = np.polynomial.Polynomial(self.coefs)
+        self.dpoly = self.poly.deriv(1)
+        self.ddpoly = self.poly.deriv(2)
+        self.dddpoly = self.poly.deriv(3)
+
+    def g(self, x):
+        return self.poly(x)
+
+    def dg(self, x):
+        return self.dpoly(x)
+
+    def ddg(self, x):
+        return self.ddpoly(x)
+
+    def dddg(self, x):
+        return self.dddpoly(x)
+
+    def params(self) -> dict:
+        return {"coefs": self.coefs.tolist(), "variable": self.variable}
+
+class UserChi(ChiModel):
+    """ユーザー定義の関数 func(phi1, phi2) で表されるχ
+       微分の関数を与えない場合は中心差分で近似する
+    """
+    def __init__(self, func, grad=None, hess=None, vectorized: bool = True):
+        """コンストラクタ
+
+        Args:
+            func (function): χ = func(phi1, phi2)
+            grad (function, optional): (∂χ/∂φ1, ∂χ/∂φ2) = grad(phi1, phi2). Defaults to None.
+            hess (function, optional): (∂²χ/∂φ1², ∂²χ/∂φ1∂φ2, ∂²χ/∂φ2²) = hess(phi1, phi2). Defaults to None.
+            vectorized (bool, optional): funcがnumpy配列をそのまま計算できるかどうか.
+                                         Falseならnp.vectorizeで1点ずつ計算する. Defaults to True.
+        """
+        self.func = func if vectorized else np.vectorize(func, otypes=[float])
+        self.grad_func = grad
+        self.hess_func = hess
+        self.source = func
+        # 関数を識別できない場合にtoDictに入れる, このオブジェクトに固有の文字列
+        # (キャッシュのキーが他の系と一致しないので, 結果のキャッシュは使われない)
+        self.token = f"unidentified:{uuid.uuid4().hex}"
+
+    def val(self, phi1, phi2):
+        return np.asarray(self.func(phi1, phi2), dtype=float)
+
+    def grad(self, phi1, phi2):
+        if self.grad_func is None:
+            return super().grad(phi1, phi2)
+        return self.grad_func(phi1, phi2)
+
+    def hess(self, phi1, phi2):
+        if self.hess_func is None:
+            return super().hess(phi1, phi2)
+        return self.hess_func(phi1, phi2)
+
+    def params(self) -> dict:
+        ids = {"func": _functionId(self.source),
+               "grad": None if self.grad_func is None else _functionId(self.grad_func),
+               "hess": None if self.hess_func is None else _functionId(self.hess_func)}
+        if ids["func"] is None or (self.grad_func is not None and ids["grad"] is None) \
+                or (self.hess_func is not None and ids["hess"] is None):
+            return {"func": self.token, "grad": None, "hess": None}
+        return ids
+
+def _functionId(func, seen: set = None) -> str:
+    """関数を識別する文字列 (モジュール名, 名前, 関数の中身のハッシュ値)
+       バイトコードと定数に加えて, クロージャで捕捉した値と参照するグローバル変数の値もハッシュに含めるので,
+       ラムダ式のように同じ名前やコードの関数でも, 中身や捕捉した値が違えば異なる文字列になる.
+       値を確実に識別できない (reprがオブジェクトのアドレスに依存するなど) 場合はNoneを返す
+
+    Args:
+        func (function): 関数
+        seen (set, optional): 識別中の関数のid (再帰的に参照する関数の無限ループを防ぐ). Defaults to None.
+
+    Returns:
+        str: 識別文字列 (識別できなければNone)
+    """
+    name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', type(func).__name__)}"
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return name
+    seen = set() if seen is None else seen
+    if id(func) in seen:
+        return name
+    seen = seen | {id(func)}
+    parts = [_codeId(code)]
+    # クロージャで捕捉した値
+    for cell in getattr(func, "__closure__", None) or ():
+        try:
+            parts.append(_valueId(cell.cell_contents, seen))
+        except ValueError:
+            # 値が未設定のセル
+            parts.append("<empty>")
+    # 参照するグローバル変数の値 (co_namesのうちグローバル変数にあるもの)
+    global_vars = getattr(func, "__globals__", {})
+    for global_name in _codeNames(code):
+        if global_name in global_vars:
+            parts.append(f"{global_name}={_valueId(global_vars[global_name], seen)}")
+    owner = getattr(func, "__self__", None)
+    if owner is not None and hasattr(owner, "__dict__"):
+        # メソッドの場合はオブジェクトの属性(パラメータ)も含める
+        parts.append(_valueId(vars(owner), seen))
+    if any(part is None for part in parts):
+        return None
+    digest = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+    return f"{name}:{digest}"
+
+def _codeId(code) -> str:
+    """コードオブジェクトの中身 (バイトコード, 定数, 名前) を表す文字列
+       入れ子の関数のコードオブジェクトはアドレスを含むreprではなく中身で表す
+    """
+    consts = [_codeId(const) if hasattr(const, "co_code") else repr(const) for const in code.co_consts]
+    return code.co_code.hex() + repr(consts) + repr(code.co_names)
+
+def _codeNames(code) -> list:
+    """コードオブジェクト (入れ子の関数を含む) が参照する名前
+    """
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            names += _codeNames(const)
+    return sorted(set(names))
+
+def _valueId(value: any, seen: set) -> str:
+    """関数が捕捉・参照する値を表す文字列 (確実に識別できなければNone)
+    """
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, np.generic)):
+        return repr(value)
+    if isinstance(value, np.ndarray):
+        return f"ndarray({value.dtype},{value.shape}):{hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()}"
+    if isinstance(value, (list, tuple)):
+        items = [_valueId(item, seen) for item in value]
+        return None if None in items else f"{type(value).__name__}({','.join(items)})"
+    if isinstance(value, dict):
+        items = [(repr(key), _valueId(item, seen)) for key, item in value.items()]
+        if any(item is None for _, item in items):
+            return None
+        return "dict(" + ",".join(f"{key}:{item}" for key, item in sorted(items)) + ")"
+    if isinstance(value, types.ModuleType):
+        return f"module:{value.__name__}"
+    if isinstance(value, type):
+        return f"type:{value.__module__}.{value.__qualname__}"
+    if isinstance(value, ChiModel):
+        params = value.params()
+        return None if any(item is None for item in params.values()) else repr(value.toDict())
+    if hasattr(value, "__code__"):
+        return _functionId(value, seen)
+    if callable(value) and hasattr(value, "__name__"):
+        # 組み込み関数, numpyのufuncなど
+        return f"{getattr(value, '__module__', None) or type(value).__name__}.{value.__name__}"
+    return None
+
+# 辞書 (ChiModel.toDictの形式) から作れるモデル
+CHI_MODELS = {cls.__name__: cls for cls in (ConstantChi, YipMcHughChi, AltenaChi, PolynomialChi)}
+
+def toChiModel(chi: any) -> ChiModel:
+    """χパラメータの指定をChiModelに変換する
+
+    Args:
+        chi (any): 数値, ChiModel, {"model": クラス名, パラメータ名: 値, ...}の辞書 (ChiModel.toDictの形式.
+                   ジョブファイルなどから読み込む), val(phi1, phi2)を持つオブジェクト, または関数 func(phi1, phi2)
+
+    Returns:
+        ChiModel: χのモデル
+    """
+    if isinstance(chi, ChiModel):
+        return chi
+    if isinstance(chi, (int, float, np.number)):
+        return ConstantChi(chi)
+    if isinstance(chi, dict):
+        params = dict(chi)
+        model = params.pop("model", None)
+        if not model in CHI_MODELS:
+            print(f"辞書から作れないχのモデルです. model = {model!r}, 対応するモデル: {list(CHI_MODELS)}", file=sys.stderr)
+            raise ValueError
+        return CHI_MODELS[model](**params)
+    if hasattr(chi, "val"):
+        # val(, grad, hess)を持つ既存のオブジェクト
+        return UserChi(chi.val, getattr(chi, "grad", None), getattr(chi, "hess", None))
+    if callable(chi):
+        return UserChi(chi)
+    print(f"χパラメータに変換できません. chi = {chi!r}", file=sys.stderr)
+    raise ValueError
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import numpy as np
+from ternary_data import PStoUVArray, UVtoPS
+from result_io import metaPath
+
+# セルの状態 (一相領域, 二相領域, 境界を含むセル)
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+# UV座標上の三角形 (良溶媒頂点が原点, 0 <= U <= 0.5, |V| <= √3 U) を覆う長方形
+U_RANGE = (0., 0.5)
+V_RANGE = (-0.5*np.sqrt(3.), 0.5*np.sqrt(3.))
+# 一度に分類する点の数 (作業用の配列の大きさを抑える)
+CLASSIFY_CHUNK = 1 << 20
+
+def separateClassifier(ternary_data):
+    """TernaryData (またはBinodalFamily.ternaryDataAtの結果) のバイノーダル線による厳密な判定関数
+
+    Args:
+        ternary_data (TernaryData): フィッティング関数を設定したTernaryData
+
+    Returns:
+        function: classifier(p, s) ポリマー分率, 溶媒分率の配列から二相領域ならTrueの配列を返す
+    """
+    def classifier(p, s):
+        return ternary_data.isSeparateArray(p, s).filled(False)
+    return classifier
+
+def tieLineClassifier(tie_line_index):
+    """計算済みのタイライン (TieLineIndex) による厳密な判定関数
+       タイラインの組成と同じ基準 (重量分率など) の組成を判定する
+
+    Args:
+        tie_line_index (TieLineIndex): タイラインの索引
+
+    Returns:
+        function: classifier(p, s) ポリマー分率, 溶媒分率の配列から二相領域ならTrueの配列を返す
+    """
+    def classifier(p, s):
+        return tie_line_index.contains(np.stack((1. - p - s, s, p), axis=-1))
+    return classifier
+
+class ClassificationIndex:
+    """UV座標上の三角形を正方形のセルに分割し, セルごとに一相領域, 二相領域, 境界を含むかを
+       あらかじめ求めておく分類の索引
+       セル全体が一相領域か二相領域にある点はセルの状態を引くだけ (O(1)) で判定し,
+       境界を含むセルの点だけを厳密な判定関数で判定する.
+       セルの状態は各セルの標本点 (辺と内部の(subsamples+1)^2点) の判定が全て一致するかで決め,
+       境界の見落としを防ぐため境界を含むセルの隣のセルも境界を含むセルとする
+    """
+    def __init__(self, classifier=None, resolution: int = 1024, subsamples: int = 2,
+                 states: np.ndarray = None, meta: dict = None):
+        """コンストラクタ (statesを与えなければclassifierで索引を作る)
+
+        Args:
+            classifier (function, optional): 厳密な判定関数 classifier(p, s) (separateClassifier, tieLineClassifier).
+                                             Noneなら境界を含むセルの点はマスクする. Defaults to None.
+            resolution (int, optional): 三角形の1辺あたりのセルの数. Defaults to 1024.
+            subsamples (int, optional): セルの1辺あたりの標本点の間隔の数. Defaults to 2.
+            states (np.ndarray, optional): 作成済みのセルの状態 (loadClassificationIndexで読み込む). Defaults to None.
+            meta (dict, optional): 索引の説明 (保存する判定関数の出所など). Defaults to None.
+        """
+        if resolution < 1 or subsamples < 1:
+            print(f"セルの数と標本点の間隔の数は1以上にしてください. resolution = {resolution}, subsamples = {subsamples}",
+                  file=sys.stderr)
+            raise ValueError
+        self.classifier = classifier
+        self.resolution = int(resolution)
+        self.subsamples = int(subsamples)
+        self.h = 1. / self.resolution # セルの1辺の長さ
+        self.shape = (int(np.ceil((U_RANGE[1] - U_RANGE[0]) / self.h)),
+                      int(np.ceil((V_RANGE[1] - V_RANGE[0]) / self.h)))
+        self.meta = {} if meta is None else dict(meta)
+        if states is None:
+            if classifier is None:
+                print("索引を作るには判定関数が必要です", file=sys.stderr)
+                raise ValueError
+            states = self.__build()
+        if states.shape != self.shape:
+            print(f"セルの状態の形状が一致しません. shape = {states.shape}, 期待値 = {self.shape}", file=sys.stderr)
+            raise ValueError
+        self.states = states
+
+    def __toPS(self, U: np.ndarray, V: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """UV座標をポリマー分率と溶媒分率に変換する (三角形の外の点は三角形の上に寄せる)
+        """
+        # 変換はternary_data.UVtoPSを使い, 三角形の上に寄せる処理だけをここで行う
+        p, s = UVtoPS(U, V)
+        p, n = np.maximum(p, 0.), np.maximum(1. - p - s, 0.)
+        total = np.maximum(p + n, 1.)
+        p, n = p / total, n / total
+        return p, 1. - p - n
+
+    def __build(self) -> np.ndarray:
+        """標本点を判定してセルの状態を求める (Uの列ごとに分けて計算する)
+        """
+        k = self.subsamples
+        nU, nV = self.shape
+        V = V_RANGE[0] + np.arange(nV * k + 1) * (self.h / k)
+        states = np.empty(self.shape, dtype=np.uint8)
+        step = max(1, CLASSIFY_CHUNK // (len(V) * k))
+        for start in range(0, nU, step):
+            stop = min(start + step, nU)
+            U = U_RANGE[0] + np.arange(start * k, stop * k + 1) * (self.h / k)
+            UU, VV = np.meshgrid(U, V, indexing='ij')
+            p, s = self.__toPS(UU.ravel(), VV.ravel())
+            samples = np.asarray(self.classifier(p, s), dtype=bool).reshape(UU.shape)
+            # 各セルの(k+1)x(k+1)個の標本点の判定が全て同じかどうか
+            blocks = np.lib.stride_tricks.sliding_window_view(samples, (k + 1, k + 1))[::k, ::k]
+            inside = np.all(blocks, axis=(-2, -1))
+            outside = ~np.any(blocks, axis=(-2, -1))
+            states[start:stop] = np.where(inside, INSIDE, np.where(outside, OUTSIDE, BOUNDARY))
+        # 境界を含むセルの隣のセルも境界を含むセルとする
+        boundary = states == BOUNDARY
+        grown = boundary.copy()
+        grown[1:] |= boundary[:-1]
+        grown[:-1] |= boundary[1:]
+        grown[:, 1:] |= boundary[:, :-1]
+        grown[:, :-1] |= boundary[:, 1:]
+        states[grown] = BOUNDARY
+        return states
+
+    def cells(self, p, s) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """組成が属するセルの番号
+
+        Args:
+            p (array): ポリマー分率
+            s (array): 溶媒分率
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Uの番号, Vの番号, 無効な組成 (NaN, 負の分率) ならTrue
+        """
+        U, V, invalid = PStoUVArray(p, s)
+        with np.errstate(invalid='ignore'):
+            i = np.clip(np.nan_to_num((U - U_RANGE[0]) / self.h), 0, self.shape[0] - 1).astype(np.intp)
+            j = np.clip(np.nan_to_num((V - V_RANGE[0]) / self.h), 0, self.shape[1] - 1).astype(np.intp)
+        return i, j, invalid
+
+    def classify(self, p, s) -> np.ma.MaskedArray:
+        """組成が二相領域にあるかどうかを判定する
+
+        Args:
+            p (array): ポリマー分率
+            s (array): 溶媒分率
+
+        Returns:
+            np.ma.MaskedArray: 二相領域ならTrue. 無効な組成と,
+                               判定関数が無い場合の境界を含むセルの組成はマスクする
+        """
+        p, s = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(s, dtype=float))
+        shape = p.shape
+        p, s = p.ravel(), s.ravel()
+        separate = np.zeros(len(p), dtype=bool)
+        mask = np.zeros(len(p), dtype=bool)
+        for start in range(0, len(p), CLASSIFY_CHUNK):
+            sl = slice(start, start + CLASSIFY_CHUNK)
+            i, j, invalid = self.cells(p[sl], s[sl])
+            state = self.states[i, j]
+            boundary = np.nonzero((state == BOUNDARY) & ~invalid)[0]
+            result = state == INSIDE
+            if self.classifier is None:
+                mask[sl] = invalid | (state == BOUNDARY)
+            else:
+                # 境界を含むセルの点だけ厳密に判定する
+                if len(boundary) > 0:
+                    result[boundary] = np.asarray(self.classifier(p[sl][boundary], s[sl][boundary]), dtype=bool)
+                mask[sl] = invalid
+            separate[sl] = result
+        return np.ma.masked_array(separate.reshape(shape), mask=mask.reshape(shape))
+
+    def boundaryFraction(self) -> float:
+        """境界を含むセルの割合 (厳密な判定に回る点の割合の目安)
+
+        Returns:
+            float: 境界を含むセルの数 / 全セル数
+        """
+        return float(np.mean(self.states == BOUNDARY))
+
+    def save(self, path: str) -> str:
+        """セルの状態をメモリマップで読み込める.npyファイルに, 索引の設定を同じ名前の.jsonファイルに保存する
+
+        Args:
+            path (str): 保存先のパス (拡張子が無ければ'.npy'を付ける)
+
+        Returns:
+            str: 保存した.npyファイルのパス
+        """
+        root, ext = os.path.splitext(path)
+        if ext == "":
+            path = root + ".npy"
+        elif ext != ".npy":
+            print(f"索引は.npyファイルに保存してください. path = {path}", file=sys.stderr)
+            raise ValueError
+        tmp_path = f"{root}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(self.states, dtype=np.uint8))
+        os.replace(tmp_path, path)
+        meta = {"kind": 'classification_index', "resolution": self.resolution,
+                "subsamples": self.subsamples, "shape": list(self.shape), **self.meta}
+        with open(metaPath(path), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return path
+
+def loadClassificationIndex(path: str, classifier=None) -> ClassificationIndex:
+    """保存した分類の索引をメモリマップで読み込む
+
+    Args:
+        path (str): ClassificationIndex.saveで保存した.npyファイルのパス
+        classifier (function, optional): 境界を含むセルの点の厳密な判定関数. 索引を作ったときと同じ境界のもの.
+                                         Noneなら境界を含むセルの点はマスクする. Defaults to None.
+
+    Returns:
+        ClassificationIndex: 分類の索引
+    """
+    try:
+        with open(metaPath(path), encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        print(f"メタデータファイルがありません. path = {metaPath(path)}", file=sys.stderr)
+        raise ValueError
+    states = np.load(path, mmap_mode='r', allow_pickle=False)
+    extra = {key: value for key, value in meta.items() if not key in ("kind", "resolution", "subsamples", "shape")}
+    return ClassificationIndex(classifier, meta["resolution"], meta["subsamples"], states, extra)
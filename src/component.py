@@ -23,3 +23,11 @@ class Component:
         obj_copy = Component(self.nu, self.rho, self.name)
         obj_copy.phi = self.phi
         return obj_copy
+
+    def toDict(self) -> dict:
+        """成分の定義を辞書にする (体積分率は含まない)
+
+        Returns:
+            dict: {"nu": モル体積, "rho": 密度, "name": 成分名}
+        """
+        return {"nu": self.nu, "rho": self.rho, "name": self.name}
@@ -0,0 +1,161 @@
+import sys
+import numpy as np
+from ternary_data import PStoUVArray, UVtoPS
+
+# 組成の基準 ('volume': 体積分率, 'mass': 重量分率, 'mole': モル分率)
+BASES = ('volume', 'mass', 'mole')
+
+class Composition:
+    """3成分系 (貧溶媒, 良溶媒, ポリマー) の複数の組成を1つの(N,3)配列で保持し,
+       体積分率, 重量分率, モル分率, 三角線図のUV座標の間の変換を行うクラス
+       変換結果はキャッシュし, 書き込み不可の配列として返すのでコピーせずに受け渡せる.
+       Compositionの外へ結果として渡す場合はreleaseで書き込み可能な配列を受け取る.
+       基準の変換には各成分の密度 (体積⇔重量) とモル体積 (体積⇔モル) を用いる
+    """
+    def __init__(self, values: np.ndarray, basis: str = 'volume', components: tuple = None):
+        """コンストラクタ
+
+        Args:
+            values (np.ndarray): (N,3)または(3,)配列 (貧溶媒, 良溶媒, ポリマー) の分率.
+                                 float型の配列ならコピーせずに保持する
+            basis (str, optional): valuesの基準. BASESのいずれか. Defaults to 'volume'.
+            components (tuple, optional): (貧溶媒, 良溶媒, ポリマー) のComponent.
+                                          他の基準に変換する場合に必要. Defaults to None.
+        """
+        if not basis in BASES:
+            print(f"対応しない組成の基準です. basis = {basis}", file=sys.stderr)
+            raise ValueError
+        arr = np.asarray(values, dtype=float)
+        if arr.ndim == 1:
+            arr = arr[np.newaxis]
+        if arr.ndim != 2 or arr.shape[1] != 3:
+            print(f"組成は(N,3)配列にしてください. shape = {arr.shape}", file=sys.stderr)
+            raise ValueError
+        # 元の配列を書き換えないよう, 書き込み不可のビューを保持する
+        arr = arr.view()
+        arr.flags.writeable = False
+        self.basis = basis
+        self.components = components
+        self.__cache = {basis: arr}
+
+    def __len__(self) -> int:
+        return len(self.__cache[self.basis])
+
+    def get(self, basis: str) -> np.ndarray:
+        """指定した基準の組成を返す (2回目以降はキャッシュを返す)
+
+        Args:
+            basis (str): BASESのいずれか
+
+        Returns:
+            np.ndarray: (N,3)配列 (書き込み不可)
+        """
+        if not basis in BASES:
+            print(f"対応しない組成の基準です. basis = {basis}", file=sys.stderr)
+            raise ValueError
+        if basis in self.__cache:
+            return self.__cache[basis]
+        # 体積分率を経由して変換する
+        if not 'volume' in self.__cache:
+            phis = self.__toVolume()
+            phis.flags.writeable = False
+            self.__cache['volume'] = phis
+        arr = self.__fromVolume(self.__cache['volume'], basis)
+        arr.flags.writeable = False
+        self.__cache[basis] = arr
+        return arr
+
+    def release(self, basis: str) -> np.ndarray:
+        """指定した基準の組成を書き込み可能な配列として受け取る (計算結果として呼び出し元に渡す場合に使う)
+           このCompositionで変換した配列はキャッシュから外し, コピーせずに書き込み可能にして渡す.
+           入力の基準の配列は元の配列と共有しているのでコピーを返す
+
+        Args:
+            basis (str): BASESのいずれか
+
+        Returns:
+            np.ndarray: (N,3)配列 (書き込み可能)
+        """
+        arr = self.get(basis)
+        if basis == self.basis:
+            return arr.copy()
+        del self.__cache[basis]
+        arr.flags.writeable = True
+        return arr
+
+    def volume(self) -> np.ndarray:
+        """体積分率
+
+        Returns:
+            np.ndarray: (N,3)配列
+        """
+        return self.get('volume')
+
+    def mass(self) -> np.ndarray:
+        """重量分率
+
+        Returns:
+            np.ndarray: (N,3)配列
+        """
+        return self.get('mass')
+
+    def mole(self) -> np.ndarray:
+        """モル分率
+
+        Returns:
+            np.ndarray: (N,3)配列
+        """
+        return self.get('mole')
+
+    def uv(self, basis: str = 'mass') -> np.ndarray:
+        """三角線図の2次元カルテシアン座標 (UV座標) を返す (ternary_data.PStoUVと同じ座標系)
+
+        Args:
+            basis (str, optional): 座標に用いる組成の基準. Defaults to 'mass'.
+
+        Returns:
+            np.ndarray: (N,2)配列 (U, V)
+        """
+        key = ('uv', basis)
+        if not key in self.__cache:
+            arr = self.get(basis)
+            U, V, _ = PStoUVArray(arr[:, 2], arr[:, 1], arr[:, 0])
+            uv = np.column_stack((U, V))
+            uv.flags.writeable = False
+            self.__cache[key] = uv
+        return self.__cache[key]
+
+    def __weights(self, basis: str) -> np.ndarray:
+        """体積分率に掛けると基準の量に比例する値になる係数 (重量: 密度, モル: 1/モル体積)
+        """
+        if self.components is None:
+            print("組成の基準を変換するには成分(Component)が必要です", file=sys.stderr)
+            raise ValueError
+        if basis == 'mass':
+            return np.array([comp.rho for comp in self.components], dtype=float)
+        if basis == 'mole':
+            return 1. / np.array([comp.nu for comp in self.components], dtype=float)
+        return np.ones(3)
+
+    def __toVolume(self) -> np.ndarray:
+        arr = self.__cache[self.basis] / self.__weights(self.basis)
+        return arr / np.sum(arr, axis=1, keepdims=True)
+
+    def __fromVolume(self, phis: np.ndarray, basis: str) -> np.ndarray:
+        arr = phis * self.__weights(basis)
+        return arr / np.sum(arr, axis=1, keepdims=True)
+
+def compositionFromUV(uv: np.ndarray, basis: str = 'mass', components: tuple = None) -> Composition:
+    """三角線図のUV座標から組成を作る (ternary_data.UVtoPSと同じ座標系)
+
+    Args:
+        uv (np.ndarray): (N,2)配列 (U, V)
+        basis (str, optional): UV座標の組成の基準. Defaults to 'mass'.
+        components (tuple, optional): (貧溶媒, 良溶媒, ポリマー) のComponent. Defaults to None.
+
+    Returns:
+        Composition: 組成
+    """
+    uv = np.atleast_2d(np.asarray(uv, dtype=float))
+    polymer, solvent = UVtoPS(uv[:, 0], uv[:, 1])
+    return Composition(np.stack((1. - polymer - solvent, solvent, polymer), axis=-1), basis, components)
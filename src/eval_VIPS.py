@@ -1,9 +1,11 @@
 import re
+import sys
 import numpy as np
 import pandas as pd
-from ternary_data import TernaryData
+from ternary_data import TernaryData, BinodalFamily
 from VIPS import VIPS
 from ternary_diagram import Ternary
+from result_io import loadResult
 from typing import Union
 
 def splitStrHierKeyString(comp_key: str) -> list:
@@ -22,6 +24,7 @@ class EvalVIPS:
     def __init__(self):
         self.vips = VIPS()
         self.ternary_data = TernaryData()
+        self.binodal_family = None # 温度ごとのバイノーダル線 (設定するとエアギャップ温度のバイノーダル線で判定する)
         self.fraction = None
         self.deviation = None
         self.fraction_list = None
@@ -41,15 +44,43 @@ class EvalVIPS:
     def askPhaseSeparation(self, fraction: list) -> bool:
         # 現在保持している組成をTernaryDataクラスに問い合わせを行い、相分離が起きるかどうかを判定してもらう
         # TernaryDataクラスのisSeparateメソッドのラッパーファンクション
+        if self.binodal_family is not None:
+            self.__checkTemperature(self.vips.T_AG)
+            separate = self.binodal_family.isSeparateArray(fraction[2], fraction[1], self.vips.T_AG)
+            if np.ma.is_masked(separate):
+                print(f"無効な組成です. fraction = {fraction}", file=sys.stderr)
+                raise ValueError
+            return bool(separate[()])
         return self.ternary_data.isSeparate(fraction[2], fraction[1], fraction[0])
 
     def askDeviation(self, fraction_init: list, fraction_after_absorption: list) -> float:
-        # TernaryDataクラスにバイノーダル曲線からの乖離度を問い合わせ, 距離関数で返してもらう
+        # TernaryDataクラスにバイノーダル曲線からの乖離度を問い合わせ, 距離関数で返してもらう (交点が無ければValueError)
+        if self.binodal_family is not None: # エアギャップ温度のバイノーダル線との乖離度
+            self.__checkTemperature(self.vips.T_AG)
+            deviation = self.binodal_family.deviationDistanceArray(
+                fraction_init[2], fraction_init[1], fraction_init[0],
+                fraction_after_absorption[2], fraction_after_absorption[1], fraction_after_absorption[0],
+                self.vips.T_AG)
+            if np.ma.is_masked(deviation):
+                print(f"吸湿前後の組成を結ぶ直線とバイノーダル線の交点がありません. "
+                      f"fraction_init = {fraction_init}, fraction = {fraction_after_absorption}", file=sys.stderr)
+                raise ValueError
+            return float(deviation[()])
         return self.ternary_data.deviationDistance(
             fraction_init[2], fraction_init[1], fraction_init[0],
             fraction_after_absorption[2], fraction_after_absorption[1], fraction_after_absorption[0]
         )
 
+    def __checkTemperature(self, temperature: float):
+        """温度がbinodal_familyの温度の範囲内か確かめる (範囲外ならValueError)
+        """
+        temperatures = self.binodal_family.temperatures
+        if len(temperatures) == 0 or not (temperatures[0] <= temperature <= temperatures[-1]):
+            print(f"温度がバイノーダル線の温度の範囲外です. temperature = {temperature}, "
+                  f"範囲: {temperatures[0] if len(temperatures) else None} - {temperatures[-1] if len(temperatures) else None}",
+                  file=sys.stderr)
+            raise ValueError
+
     def communicate(self) -> float:
         """設定紡糸条件でのVIPS判定を行う
 
@@ -85,8 +116,10 @@ class EvalVIPS:
         self.fraction_init_list = []
         self.fraction_list  = []
         self.deviation_list = []
+        self.temperature_list = [] # 各行のエアギャップ温度
         for id, row in self.param_table.iterrows():
             self.updateParams(row)
+            self.temperature_list.append(self.vips.T_AG)
             fraction_init, fraction, deviation = self.communicate()
             self.fraction_init_list.append(fraction_init)
             self.fraction_list.append(fraction)
@@ -96,6 +129,40 @@ class EvalVIPS:
     def setBinodalCurve(self, file_path: str):
         self.ternary_data.loadFitFunc(file_path)
 
+    def setBinodalFamily(self, file_path: str):
+        # 温度ごとのバイノーダル線 (BinodalFamily.exportFamilyで出力したpklファイル) を設定する
+        self.binodal_family = BinodalFamily()
+        self.binodal_family.loadFamily(file_path)
+
+    def deviationLoop(self, temperatures: list = None, segment: bool = False) -> np.ma.MaskedArray:
+        """communicateLoopの全ての行の乖離度を, 行ごとの温度のバイノーダル線で一括で計算し直す
+           (pklファイルを読み直さずに, エアギャップ温度や凝固浴温度を変えた表を評価できる)
+
+        Args:
+            temperatures (list, optional): 行ごとのバイノーダル線の温度. NoneならcommunicateLoopで記録したエアギャップ温度.
+                                           Defaults to None.
+            segment (bool, optional): Trueなら交点が吸湿前後の組成を結ぶ線分上に無い行もマスクする. Defaults to False.
+
+        Returns:
+            np.ma.MaskedArray: 乖離度 (バイノーダル線を跨いでいないときは負の値). 交点が無い行, 範囲外の温度の行はマスクする
+        """
+        if self.binodal_family is None:
+            print("温度ごとのバイノーダル線が設定されていません. ", file=sys.stderr)
+            raise ValueError
+        fraction_init = np.array(self.fraction_init_list, dtype=float)
+        fraction = np.array(self.fraction_list, dtype=float)
+        if temperatures is None:
+            temperatures = self.temperature_list
+        return self.binodal_family.deviationDistanceArray(
+            fraction_init[:, 2], fraction_init[:, 1], fraction_init[:, 0],
+            fraction[:, 2], fraction[:, 1], fraction[:, 0], np.asarray(temperatures, dtype=float), segment)
+
+    def setBinodalResult(self, file_path: str, deg: int = 1, method: str = 'poly'):
+        # result_io.saveResultで保存したバイノーダルの計算結果をフィッティングして設定する
+        # (methodはTernaryData.fitDataのフィッティング方法. 曲がったバイノーダル線なら'pchip')
+        self.ternary_data.readResult(loadResult(file_path))
+        self.ternary_data.fitData(deg, method)
+
     def setDefaultParam(self, file_path: str):
         # 吸湿量計算の基準となるパラメータを設定する
         self.default_param = self.vips.readParamFile(file_path)
@@ -212,6 +279,7 @@ class EvalVIPS:
 
     def searchTc(self, Tmin: float = 15, Tmax: float = 70) -> float:
         """VIPSを起こすギリギリのチムニー温度を返す
+           binodal_familyを設定していれば, 探索範囲をその温度の範囲に狭める
 
         Args:
             Tmin (float): 探索を行う最小温度
@@ -220,24 +288,48 @@ class EvalVIPS:
         Returns:
             float: チムニー温度 [℃]
         """
+        if self.binodal_family is not None and len(self.binodal_family.temperatures) > 0:
+            Tmin = max(Tmin, self.binodal_family.temperatures[0])
+            Tmax = min(Tmax, self.binodal_family.temperatures[-1])
+        if not Tmin < Tmax:
+            print(f"探索範囲が空です. Tmin = {Tmin}, Tmax = {Tmax}", file=sys.stderr)
+            raise ValueError
         T_tmp = self.vips.T_AG
-        T_lim = [Tmin, Tmax]
-        deviation = 1
-        i = 1
-        while abs(deviation) > 1e-09: # 二分探索によりVIPSを起こすギリギリのAG温度を探索
-            T = (T_lim[0] + T_lim[1])/2
-            self.vips.T_AG = T
-            _, _, deviation = self.communicate()
-            if deviation < 0:
-                T_lim = [T, T_lim[1]]
-            else:
-                T_lim = [T_lim[0], T]
-            i += 1
-            if i == 1000:
-                print("Tcを探索できませんでした")
-                raise OverflowError
-        self.vips.T_AG = T_tmp
+        try:
+            # 探索範囲の両端で乖離度の符号が変わらなければ, 範囲内にVIPSの境界は無い
+            deviations = [self.__deviationAt(Tmin), self.__deviationAt(Tmax)]
+            if deviations[0] * deviations[1] > 0:
+                print(f"探索範囲内でVIPSの有無が変わりません. Tmin = {Tmin}, Tmax = {Tmax}, "
+                      f"deviation = {deviations}", file=sys.stderr)
+                raise ValueError
+            T_lim = [Tmin, Tmax]
+            deviation = 1
+            i = 1
+            # binodal_familyを設定していれば, AG温度ごとにその温度のバイノーダル線で判定する
+            while abs(deviation) > 1e-09: # 二分探索によりVIPSを起こすギリギリのAG温度を探索
+                T = (T_lim[0] + T_lim[1])/2
+                deviation = self.__deviationAt(T)
+                if deviation < 0:
+                    T_lim = [T, T_lim[1]]
+                else:
+                    T_lim = [T_lim[0], T]
+                i += 1
+                if i == 1000:
+                    print("Tcを探索できませんでした")
+                    raise OverflowError
+        finally:
+            self.vips.T_AG = T_tmp
         return T
+
+    def __deviationAt(self, T: float) -> float:
+        """AG温度Tでの乖離度 (searchTc用. NaNならValueError)
+        """
+        self.vips.T_AG = T
+        _, _, deviation = self.communicate()
+        if deviation is None or np.isnan(deviation):
+            print(f"乖離度を計算できませんでした. T = {T}, deviation = {deviation}", file=sys.stderr)
+            raise ValueError
+        return deviation
         
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -1,5 +1,7 @@
 import numpy as np
+from scipy.special import xlogy
 from component import Component
+from chi_model import ChiModel, toChiModel
 
 class Phase:
     """3成分からなるPhase(相)を表すクラス
@@ -16,16 +18,17 @@ class Phase:
             component1 (Component): 貧溶媒
             component2 (Component): 良溶媒
             component3 (Component): ポリマー
-            chi12 (float): 貧溶媒・良溶媒間のχパラメータ
-            chi23 (float): 良溶媒・ポリマー間のχパラメータ
-            chi13 (float): 貧溶媒・ポリマー間のχパラメータ
+            chi12 (float | ChiModel | function): 貧溶媒・良溶媒間のχパラメータ
+            chi23 (float | ChiModel | function): 良溶媒・ポリマー間のχパラメータ
+            chi13 (float | ChiModel | function): 貧溶媒・ポリマー間のχパラメータ
+                数値はConstantChi, 関数 func(phi1, phi2) はUserChiに変換する (chi_model.toChiModel)
         """
         self.comp1 = component1 # 貧溶媒
         self.comp2 = component2 # 良溶媒
         self.comp3 = component3 # ポリマー
-        self.chi12 = chi12 # χ12
-        self.chi23 = chi23 # χ23
-        self.chi13 = chi13 # χ13
+        self.chi12 = toChiModel(chi12) # χ12
+        self.chi23 = toChiModel(chi23) # χ23
+        self.chi13 = toChiModel(chi13) # χ13
         self.s = self.comp1.nu / self.comp2.nu # 貧溶媒と良溶媒のモル体積比率
         self.r = self.comp1.nu / self.comp3.nu # 貧溶媒とポリマーモル体積比率
         print("s = ",self.s)
@@ -41,6 +44,22 @@ class Phase:
                         self.chi12, self.chi23, self.chi13)
         return obj_copy
 
+    def toDict(self) -> dict:
+        """系の定義(成分とχパラメータ)を辞書にする
+           χパラメータはChiModel.toDictの結果を格納する
+
+        Returns:
+            dict: {"component1", "component2", "component3", "chi12", "chi23", "chi13"}
+        """
+        return {
+            "component1": self.comp1.toDict(),
+            "component2": self.comp2.toDict(),
+            "component3": self.comp3.toDict(),
+            "chi12": self.chi12.toDict(),
+            "chi23": self.chi23.toDict(),
+            "chi13": self.chi13.toDict(),
+        }
+
     def getPhis(self) -> tuple[float, float, float]: 
         """現在の相内体積分率組成を返す
 
@@ -49,6 +68,14 @@ class Phase:
         """
         return self.comp1.phi, self.comp2.phi, self.comp3.phi
 
+    def getComponents(self) -> tuple[Component, Component, Component]:
+        """成分を返す (Compositionの基準の変換に用いる)
+
+        Returns:
+            tuple[Component, Component, Component]: (貧溶媒, 良溶媒, ポリマー)
+        """
+        return self.comp1, self.comp2, self.comp3
+
     def getXs(self) -> tuple[float, float, float]: 
         """現在の相内の体積分率からモル分率を計算して返す
 
@@ -78,11 +105,8 @@ class Phase:
         Returns:
             float: Δμ1/RT
         """
-        chi12, chi23, chi13 = self.calcChiAll()
         self.comp1.phi = 1. - self.comp2.phi - self.comp3.phi
-        return np.log(self.comp1.phi) + 1 - self.comp1.phi - self.s*self.comp2.phi - self.r*self.comp3.phi \
-            + (chi12*self.comp2.phi + chi13*self.comp3.phi) * (1 - self.comp1.phi) \
-            - self.s*chi23*self.comp2.phi*self.comp3.phi
+        return self.muRTs(np.array(self.getPhis()))[0]
 
     def mu2RT(self) -> float: 
         """良溶媒について, Δμ2=(相中のケミカルポテンシャル)-(純粋なケミカルポテンシャル)
@@ -91,11 +115,8 @@ class Phase:
         Returns:
             float: Δμ2/RT
         """
-        chi12, chi23, chi13 = self.calcChiAll()
         self.comp1.phi = 1. - self.comp2.phi - self.comp3.phi
-        return 1/self.s * (self.s*np.log(self.comp2.phi) + self.s - self.comp1.phi - self.s*self.comp2.phi - self.r*self.comp3.phi \
-            + (chi12*self.comp1.phi + self.s*chi23*self.comp3.phi) * (1 - self.comp2.phi) \
-            - chi13*self.comp1.phi*self.comp3.phi)
+        return self.muRTs(np.array(self.getPhis()))[1]
 
     def mu3RT(self) -> float: 
         """ポリマーについて, Δμ3=(相中のケミカルポテンシャル)-(純粋なケミカルポテンシャル)
@@ -104,52 +125,427 @@ class Phase:
         Returns:
             float: Δμ3/RT
         """
-        chi12, chi23, chi13 = self.calcChiAll()
         self.comp1.phi = 1. - self.comp2.phi - self.comp3.phi
-        return 1/self.r * (self.r*np.log(self.comp3.phi) + self.r - self.comp1.phi - self.s*self.comp2.phi - self.r*self.comp3.phi \
-            + (chi13*self.comp1.phi + self.s*chi23*self.comp2.phi) * (1 - self.comp3.phi) \
-            - chi12*self.comp1.phi*self.comp2.phi)
+        return self.muRTs(np.array(self.getPhis()))[2]
+
+    def muRTs(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, Δμ1/RT, Δμ2/RT, Δμ3/RTを一括で計算する
+           Componentの体積分率は変更しない
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3)配列 (Δμ1/RT, Δμ2/RT, Δμ3/RT)
+        """
+        phis = np.asarray(phis, dtype=float)
+        return self.__muRTs(phis, np.log(phis))
+
+    def muRTsLog(self, log_phis: np.ndarray) -> np.ndarray:
+        """体積分率の対数から, Δμ1/RT, Δμ2/RT, Δμ3/RTを一括で計算する
+           log(φ)の項には与えた対数をそのまま用いるので, 非常に小さい体積分率でも
+           指数関数・対数関数の往復による精度の低下が無い
+
+        Args:
+            log_phis (np.ndarray): (N,3)配列 (log φ1, log φ2, log φ3)
+
+        Returns:
+            np.ndarray: (N,3)配列 (Δμ1/RT, Δμ2/RT, Δμ3/RT)
+        """
+        log_phis = np.asarray(log_phis, dtype=float)
+        return self.__muRTs(np.exp(log_phis), log_phis)
+
+    def __muRTs(self, phis: np.ndarray, log_phis: np.ndarray) -> np.ndarray:
+        """Δμi/RT = wi g + Σx Mix ∂g/∂x (混合自由エネルギーgからの導出) を計算する
+           χの項はgのχを含む項Eから求めるので, χが濃度に依存する場合の φi φj ∂χ/∂φ の項も含む
+        """
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        E, dE = self.__excessDerivs(phis, 1)
+        common = - phi1 - self.s*phi2 - self.r*phi3 # 各式に共通する項
+        mu_ideal = np.stack((
+            log_phis[..., 0] + 1 + common,
+            1/self.s * (self.s*log_phis[..., 1] + self.s + common),
+            1/self.r * (self.r*log_phis[..., 2] + self.r + common),
+        ), axis=-1)
+        return mu_ideal + self.__muWeights()*E[..., None] + np.einsum('...ix,...x->...i', self.__muCoefs(phis), dE)
+
+    def __muWeights(self) -> np.ndarray:
+        """Δμi/RTのgの係数 wi = (1, 1/s, 1/r)
+        """
+        return np.array([1., 1/self.s, 1/self.r])
+
+    def __muCoefs(self, phis: np.ndarray) -> np.ndarray:
+        """Δμi/RTの(∂g/∂φ2, ∂g/∂φ3)の係数Mix
+               Δμ1/RT = g - φ2 ∂g/∂φ2 - φ3 ∂g/∂φ3
+               Δμ2/RT = (g + (1 - φ2) ∂g/∂φ2 - φ3 ∂g/∂φ3) / s
+               Δμ3/RT = (g - φ2 ∂g/∂φ2 + (1 - φ3) ∂g/∂φ3) / r
+
+        Returns:
+            np.ndarray: (N,3,2)配列
+        """
+        a, b = phis[..., 1], phis[..., 2]
+        s, r = self.s, self.r
+        return np.stack((
+            np.stack((-a, -b), axis=-1),
+            np.stack(((1 - a)/s, -b/s), axis=-1),
+            np.stack((-a/r, (1 - b)/r), axis=-1),
+        ), axis=-2)
+
+    def __excessDerivs(self, phis: np.ndarray, order: int) -> tuple:
+        """混合自由エネルギーのχを含む項 E = χ12 φ1 φ2 + s χ23 φ2 φ3 + χ13 φ1 φ3 と,
+           その(φ2, φ3)に関するorder階までの微分 (φ1 = 1 - φ2 - φ3として扱う)
+           E = Σk χk Qk の積の微分として, χkの濃度依存性 (∂χk/∂φ) の項を含めて計算する
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+            order (int): 微分の階数 (1, 2, 3)
+
+        Returns:
+            tuple: E (N,), ∂E (N,2), ∂²E (N,2,2), ∂³E (N,2,2,2) のうちorder階まで
+        """
+        phi1, a, b = phis[..., 0], phis[..., 1], phis[..., 2]
+        s = self.s
+        chis, dchis, ddchis = self.calcChiDerivArrays(phis)
+        # Qk (kの順序は χ12, χ23, χ13) と, その1階, 2階微分 (Qkは2次式なので2階微分は定数)
+        Q = np.stack((phi1*a, s*a*b, phi1*b), axis=-1)
+        dQ = np.stack((
+            np.stack((phi1 - a, -a), axis=-1),
+            np.stack((s*b, s*a), axis=-1),
+            np.stack((-b, phi1 - b), axis=-1),
+        ), axis=-2)
+        ddQ = np.array([[[-2., -1.], [-1., 0.]],
+                        [[0., s], [s, 0.]],
+                        [[0., -1.], [-1., -2.]]])
+        E = np.einsum('...k,...k->...', chis, Q)
+        dE = np.einsum('...k,...kx->...x', chis, dQ) + np.einsum('...kx,...k->...x', dchis, Q)
+        if order == 1:
+            return E, dE
+        cross = np.einsum('...kx,...ky->...xy', dchis, dQ)
+        ddE = np.einsum('...k,kxy->...xy', chis, ddQ) + cross + np.swapaxes(cross, -1, -2) \
+            + np.einsum('...kxy,...k->...xy', ddchis, Q)
+        if order == 2:
+            return E, dE, ddE
+        dddchis = self.calcChiDeriv3Arrays(phis)
+        # 前2つの添字について対称な t[x, y, z] から t[x,y,z] + t[x,z,y] + t[y,z,x] を作る
+        sym = lambda t: t + np.swapaxes(t, -1, -2) + np.moveaxis(t, -1, -3)
+        dddE = np.einsum('...kxyz,...k->...xyz', dddchis, Q) \
+            + sym(np.einsum('...kxy,...kz->...xyz', ddchis, dQ)) \
+            + sym(np.einsum('kxy,...kz->...xyz', ddQ, dchis))
+        return E, dE, ddE, dddE
+
+    def gRTs(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, 混合自由エネルギーΔGmix/RTを一括で計算する
+           (貧溶媒のモル体積あたり. Δμ1/RT = g - φ2 ∂g/∂φ2 - φ3 ∂g/∂φ3 を満たす)
+           φ log φ は φ = 0 で0とするので, 単体の辺や頂点の組成でも計算できる
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,)配列 ΔGmix/RT
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        chi12, chi23, chi13 = self.__pairChiArrays(phis)
+        return xlogy(phi1, phi1) + self.s*xlogy(phi2, phi2) + self.r*xlogy(phi3, phi3) \
+            + chi12*phi1*phi2 + chi13*phi1*phi3 + self.s*chi23*phi2*phi3
+
+    def Gs(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, 安定性行列の要素G22, G23, G33を一括で計算する
+           (混合自由エネルギーgの(φ2, φ3)に関する2階微分. χの濃度依存性の項を含む)
+           Componentの体積分率は変更しない
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3)配列 (G22, G23, G33)
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        X22, X23, X33 = np.moveaxis(self.excessGs(phis), -1, 0)
+        G22 = 1/phi1 + self.s/phi2 + X22
+        G23 = 1/phi1 + X23
+        G33 = 1/phi1 + self.r/phi3 + X33
+        return np.stack((G22, G23, G33), axis=-1)
+
+    def excessGs(self, phis: np.ndarray) -> np.ndarray:
+        """安定性行列の要素のうち, χを含む項 (1/φの項を除いた部分) を一括で計算する
+           χが定数なら (-2χ12, -(χ12 + χ13) + sχ23, -2χ13)
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3)配列 (G22, G23, G33のχを含む項)
+        """
+        phis = np.asarray(phis, dtype=float)
+        _, _, ddE = self.__excessDerivs(phis, 2)
+        return np.stack((ddE[..., 0, 0], ddE[..., 0, 1], ddE[..., 1, 1]), axis=-1)
+
+    def stabilityDets(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, 安定性行列の行列式に φ1 φ2 φ3 を掛けた値
+           φ1 φ2 φ3 (G22*G33 - G23^2) を一括で計算する
+           Gのχを含む項 X = excessGs(phis) を用いて
+               r φ2 + s φ3 + s r φ1 + φ2 φ3 (X22 + X33 - 2 X23) + φ1 (s φ3 X33 + r φ2 X22)
+               + φ1 φ2 φ3 (X22 X33 - X23^2)
+           と展開するので, χが濃度に依存する場合も含めて1/φの項が打ち消され,
+           単体の辺や頂点でも有限で, 符号は行列式と同じ (正なら局所的に安定)
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,)配列 φ1 φ2 φ3 (G22*G33 - G23^2)
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            X = self.excessGs(phis)
+        # 濃度依存のχが定義できない頂点ではXの係数が全て0になるので, 値は結果に影響しない
+        X22, X23, X33 = np.moveaxis(np.where(np.isfinite(X), X, 0.), -1, 0)
+        s, r = self.s, self.r
+        return r*phi2 + s*phi3 + s*r*phi1 \
+            + phi2*phi3*(X22 + X33 - 2*X23) + phi1*(s*phi3*X33 + r*phi2*X22) \
+            + phi1*phi2*phi3*(X22*X33 - X23**2)
+
+    def __pairChiArrays(self, phis: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """χijを, 成分iとjの一方が無い組成 (φi φj = 0) では0としたχパラメータ
+           χijはφi φjを含む項にしか現れないので, 単体の辺や頂点で濃度依存のχが定義できなくても値は変わらない
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: χ12, χ23, χ13
+        """
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chi12, chi23, chi13 = self.calcChiArrays(phis)
+        return (np.where(phi1*phi2 > 0., chi12, 0.),
+                np.where(phi2*phi3 > 0., chi23, 0.),
+                np.where(phi1*phi3 > 0., chi13, 0.))
+
+    def muRTGrads(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, Δμ1/RT, Δμ2/RT, Δμ3/RTの
+           (φ2, φ3)に関する1階微分を解析的に計算する
+           (φ1 = 1 - φ2 - φ3として扱う)
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3,2)配列 [点, 成分i, (∂/∂φ2, ∂/∂φ3)] 
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        zeros = np.zeros_like(phi1)
+        # log(φ)の項の微分
+        dL = np.stack((
+            np.stack((-1/phi1, -1/phi1), axis=-1),
+            np.stack((1/phi2, zeros), axis=-1),
+            np.stack((zeros, 1/phi3), axis=-1),
+        ), axis=-2)
+        return dL + self.__muRTGradsExcess(phis)
+
+    def muRTGradsLog(self, log_phis: np.ndarray) -> np.ndarray:
+        """体積分率の対数から, Δμ1/RT, Δμ2/RT, Δμ3/RTの
+           (log φ2, log φ3)に関する1階微分を一括で計算する
+           (φ1 = 1 - φ2 - φ3として扱う. ∂/∂log φk = φk ∂/∂φk)
+           1/φの項が現れないので, 非常に小さい体積分率でも発散しない
+
+        Args:
+            log_phis (np.ndarray): (N,3)配列 (log φ1, log φ2, log φ3)
+
+        Returns:
+            np.ndarray: (N,3,2)配列 [点, 成分i, (∂/∂log φ2, ∂/∂log φ3)]
+        """
+        log_phis = np.asarray(log_phis, dtype=float)
+        phis = np.exp(log_phis)
+        ones, zeros = np.ones_like(phis[..., 0]), np.zeros_like(phis[..., 0])
+        # log(φ)の項の微分 (φ2/φ1, φ3/φ1も対数から計算する)
+        ratio2 = np.exp(log_phis[..., 1] - log_phis[..., 0])
+        ratio3 = np.exp(log_phis[..., 2] - log_phis[..., 0])
+        dL = np.stack((
+            np.stack((-ratio2, -ratio3), axis=-1),
+            np.stack((ones, zeros), axis=-1),
+            np.stack((zeros, ones), axis=-1),
+        ), axis=-2)
+        return dL + self.__muRTGradsExcess(phis) * phis[..., None, 1:3]
+
+    def __muRTGradsExcess(self, phis: np.ndarray) -> np.ndarray:
+        """Δμi/RTのlog(φ)以外の項の(φ2, φ3)に関する1階微分
+           Δμi/RT = wi g + Σx Mix ∂g/∂x を微分すると wi ∂g/∂y の項が打ち消されて
+           ∂(Δμi/RT)/∂y = Σx Mix ∂²g/∂x∂y となる (Gibbs-Duhemの関係)
+
+        Returns:
+            np.ndarray: (N,3,2)配列
+        """
+        _, _, ddE = self.__excessDerivs(phis, 2)
+        s, r = self.s, self.r
+        # χを含まない項の微分 (定数)
+        dP = np.array([[1 - s, 1 - r],
+                       [(1 - s)/s, (1 - r)/s],
+                       [(1 - s)/r, (1 - r)/r]])
+        return dP + np.einsum('...ix,...xy->...iy', self.__muCoefs(phis), ddE)
+
+    def muRTHessians(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, Δμ1/RT, Δμ2/RT, Δμ3/RTの
+           (φ2, φ3)に関する2階微分を解析的に計算する
+           (φ1 = 1 - φ2 - φ3として扱う)
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3,2,2)配列 [点, 成分i, (φ2, φ3), (φ2, φ3)]
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        _, _, ddE, dddE = self.__excessDerivs(phis, 3)
+        # χを含まない項の2階微分
+        ddP = np.zeros(phis.shape[:-1] + (3, 2, 2))
+        ddP[..., 0, :, :] = (-1/phi1**2)[..., None, None]
+        ddP[..., 1, 0, 0] = -1/phi2**2
+        ddP[..., 2, 1, 1] = -1/phi3**2
+        # ∂Mix/∂z = -wi δxz
+        return ddP - self.__muWeights()[:, None, None] * ddE[..., None, :, :] \
+                   + np.einsum('...ix,...xyz->...iyz', self.__muCoefs(phis), dddE)
+
+    def GGrads(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, 安定性行列の要素G22, G23, G33の
+           (φ2, φ3)に関する1階微分を解析的に計算する
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3,2)配列 [点, (G22, G23, G33), (∂/∂φ2, ∂/∂φ3)]
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2, phi3 = phis[..., 0], phis[..., 1], phis[..., 2]
+        _, _, _, dddE = self.__excessDerivs(phis, 3)
+        inv1 = (1/phi1**2)[..., None]
+        dG22 = inv1 + dddE[..., 0, 0, :]
+        dG22[..., 0] -= self.s/phi2**2
+        dG23 = inv1 + dddE[..., 0, 1, :]
+        dG33 = inv1 + dddE[..., 1, 1, :]
+        dG33[..., 1] -= self.r/phi3**2
+        return np.stack((dG22, dG23, dG33), axis=-2)
 
     def G22(self):
-        chi12 = self.calcChi12()
         self.comp1.phi = 1. - self.comp2.phi - self.comp3.phi
-        return 1/self.comp1.phi + self.s/self.comp2.phi - 2*chi12
+        return self.Gs(np.array(self.getPhis()))[0]
 
     def G23(self):
-        chi12 = self.calcChi12()
-        chi13 = self.calcChi13()
-        chi23 = self.calcChi23()
         self.comp1.phi = 1. - self.comp2.phi - self.comp3.phi
-        return 1/self.comp1.phi - (chi12+chi13) + self.s*chi23
+        return self.Gs(np.array(self.getPhis()))[1]
 
     def G33(self):
-        chi13 = self.calcChi13()
         self.comp1.phi = 1. - self.comp2.phi - self.comp3.phi
-        return 1/self.comp1.phi + self.r/self.comp3.phi - 2*chi13
+        return self.Gs(np.array(self.getPhis()))[2]
 
     def calcChi12(self):
-        if type(self.chi12) == float:
-            chi12 = self.chi12
-        else:
-            chi12 = self.chi12.val(self.comp1.phi, self.comp2.phi)
-        return chi12
+        return self.__calcChi(self.chi12)
 
     def calcChi23(self):
-        if type(self.chi23) == float:
-            chi23 = self.chi23
-        else:
-            chi23 = self.chi23.val(self.comp1.phi, self.comp2.phi)
-        return chi23
+        return self.__calcChi(self.chi23)
 
     def calcChi13(self):
-        if type(self.chi13) == float:
-            chi13 = self.chi13
-        else:
-            chi13 = self.chi13.val(self.comp1.phi, self.comp2.phi)
-        return chi13
+        return self.__calcChi(self.chi13)
+
+    def __calcChi(self, chi: ChiModel) -> float:
+        if chi.isConstant():
+            return chi.value
+        return float(chi.val(self.comp1.phi, self.comp2.phi))
+
+    def isConstantChi(self) -> bool:
+        """χパラメータが全て定数かどうか
+
+        Returns:
+            bool: χ12, χ23, χ13が全てConstantChiならTrue
+        """
+        return all(chi.isConstant() for chi in (self.chi12, self.chi23, self.chi13))
 
     def calcChiAll(self) -> tuple[float, float, float]:
         chi12 = self.calcChi12()
         chi23 = self.calcChi23()
         chi13 = self.calcChi13()
-        return chi12, chi23, chi13
\ No newline at end of file
+        return chi12, chi23, chi13
+
+    def calcChiArrays(self, phis: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """複数の体積分率組成について, χパラメータを一括で計算する
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: (χ12, χ23, χ13) 各要素は長さNの配列
+        """
+        phi1, phi2 = phis[..., 0], phis[..., 1]
+        chis = []
+        for chi in (self.chi12, self.chi23, self.chi13):
+            if chi.isConstant():
+                val = chi.value
+            else:
+                val = chi.val(phi1, phi2)
+            chis.append(np.broadcast_to(np.asarray(val, dtype=float), phi1.shape))
+        return tuple(chis)
+
+    def calcChiDerivArrays(self, phis: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """複数の体積分率組成について, χパラメータとその(φ2, φ3)に関する
+           1階, 2階微分を一括で計算する
+           ChiModelの(φ1, φ2)に関する微分 grad(phi1, phi2), hess(phi1, phi2) を変換して用いる
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: (N,3), (N,3,2), (N,3,2,2)配列
+                                                       χの順序は (χ12, χ23, χ13)
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2 = phis[..., 0], phis[..., 1]
+        shape = phi1.shape
+        chis   = np.zeros(shape + (3,))
+        dchis  = np.zeros(shape + (3, 2))
+        ddchis = np.zeros(shape + (3, 2, 2))
+        for k, chi in enumerate((self.chi12, self.chi23, self.chi13)):
+            if chi.isConstant():
+                chis[..., k] = chi.value
+                continue
+            chis[..., k] = chi.val(phi1, phi2)
+            # (φ1, φ2)に関する微分を(φ2, φ3)に関する微分に変換
+            d1, d2 = chi.grad(phi1, phi2)
+            d11, d12, d22 = chi.hess(phi1, phi2)
+            dchis[..., k, 0] = -d1 + d2
+            dchis[..., k, 1] = -d1
+            ddchis[..., k, 0, 0] = d11 - 2*d12 + d22
+            ddchis[..., k, 0, 1] = ddchis[..., k, 1, 0] = d11 - d12
+            ddchis[..., k, 1, 1] = d11
+        return chis, dchis, ddchis
+
+    def calcChiDeriv3Arrays(self, phis: np.ndarray) -> np.ndarray:
+        """複数の体積分率組成について, χパラメータの(φ2, φ3)に関する3階微分を一括で計算する
+           ChiModelの(φ1, φ2)に関する3階微分 deriv3(phi1, phi2) を変換して用いる
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,3,2,2,2)配列 χの順序は (χ12, χ23, χ13)
+        """
+        phis = np.asarray(phis, dtype=float)
+        phi1, phi2 = phis[..., 0], phis[..., 1]
+        dddchis = np.zeros(phi1.shape + (3, 2, 2, 2))
+        for k, chi in enumerate((self.chi12, self.chi23, self.chi13)):
+            if chi.isConstant():
+                continue
+            # ∂/∂φ2 = -∂/∂φ1 + ∂/∂φ2 (φ1, φ2の関数として), ∂/∂φ3 = -∂/∂φ1
+            d111, d112, d122, d222 = chi.deriv3(phi1, phi2)
+            aaa = -d111 + 3*d112 - 3*d122 + d222
+            aab = -d111 + 2*d112 - d122
+            abb = -d111 + d112
+            bbb = -d111
+            dddchis[..., k, 0, 0, 0] = aaa
+            dddchis[..., k, 0, 0, 1] = dddchis[..., k, 0, 1, 0] = dddchis[..., k, 1, 0, 0] = aab
+            dddchis[..., k, 0, 1, 1] = dddchis[..., k, 1, 0, 1] = dddchis[..., k, 1, 1, 0] = abb
+            dddchis[..., k, 1, 1, 1] = bbb
+        return dddchis
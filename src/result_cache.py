@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+# キャッシュのキーに含める計算結果の版
+# 同じ入力でも計算結果 (化学ポテンシャル, 安定性の行列式, 保存する配列の形式など) が変わる修正をしたら1つ上げる
+# 2: 濃度依存のχの組成微分を化学ポテンシャルとGに含めた
+CACHE_VERSION = 2
+
+class ResultCache:
+    """計算結果(numpy配列)をディスクに保存するキャッシュ
+       系の定義, 組成の格子, ソルバーの設定から作るハッシュ値をキーとし,
+       1つのキーにつき1つの.npzファイルに保存する.
+       合計サイズがmax_bytesを超えた場合は, 最後に使われた時刻が古いファイルから削除する
+    """
+    def __init__(self, cache_dir: str = ".ternary_cache", max_bytes: int = 512 * 1024**2):
+        """コンストラクタ
+
+        Args:
+            cache_dir (str, optional): キャッシュを保存するディレクトリ. Defaults to ".ternary_cache".
+            max_bytes (int, optional): キャッシュの合計サイズの上限. Defaults to 512 MiB.
+        """
+        if max_bytes <= 0:
+            print(f"キャッシュサイズの上限は正の値にしてください. max_bytes = {max_bytes}", file=sys.stderr)
+            raise ValueError
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, **items) -> str:
+        """キャッシュのキーを作る
+           項目を正規化したJSON文字列のSHA-256ハッシュ値. 配列は型, 形状, バイト列のハッシュ値で表す.
+           計算結果の版CACHE_VERSIONを必ず含めるので, 版が変われば以前の結果は使わない
+
+        Args:
+            **items: キーに含める項目 (Phase.toDict()の結果, 組成の格子, ソルバーの設定など)
+
+        Returns:
+            str: 16進数のハッシュ値
+        """
+        text = json.dumps({**items, "version": CACHE_VERSION}, sort_keys=True, separators=(",", ":"), ensure_ascii=False,
+                          default=self.__jsonDefault)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def __jsonDefault(self, obj: any) -> any:
+        if isinstance(obj, np.ndarray):
+            arr = np.ascontiguousarray(obj)
+            return {"dtype": str(arr.dtype), "shape": list(arr.shape),
+                    "sha256": hashlib.sha256(arr.tobytes()).hexdigest()}
+        if isinstance(obj, np.generic):
+            return obj.item()
+        if hasattr(obj, "toDict"):
+            return obj.toDict()
+        return repr(obj)
+
+    def path(self, key: str) -> str:
+        """キーに対応するファイルのパス
+
+        Args:
+            key (str): キャッシュのキー
+
+        Returns:
+            str: .npzファイルのパス
+        """
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def get(self, key: str) -> dict:
+        """キャッシュから結果を読み込む
+
+        Args:
+            key (str): キャッシュのキー
+
+        Returns:
+            dict: 保存した配列の辞書. キャッシュに無い場合はNone
+        """
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        # 最後に使われた時刻として更新時刻を更新する
+        os.utime(path)
+        return arrays
+
+    def put(self, key: str, **arrays):
+        """結果をキャッシュに保存する
+           一時ファイルに書き込んでから置き換えるので, 書き込み途中のファイルは読み込まれない
+
+        Args:
+            key (str): キャッシュのキー
+            **arrays: 保存する配列
+        """
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez_compressed(file, **arrays)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """合計サイズがmax_bytes以下になるまで, 最後に使われた時刻が古いファイルから削除する
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """キャッシュのファイルを全て削除する
+        """
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.cache_dir, name))
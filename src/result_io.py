@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+from component import Component
+from composition import Composition
+
+# 重量分率の結果の列名 (貧溶媒, 良溶媒, ポリマー)
+WS_COLUMNS = ['貧溶媒', '良溶媒', 'ポリマー']
+# タイラインの結果の列名 (ポリマーリッチ相, ポリマーリーン相)
+TIE_COLUMNS = ['R貧溶媒', 'R良溶媒', 'Rポリマー', 'L貧溶媒', 'L良溶媒', 'Lポリマー']
+# 結果の種類と既定の列名
+RESULT_COLUMNS = {
+    'binodal':  WS_COLUMNS, # ポリマーリッチ相, ポリマーリーン相の順に縦に結合
+    'tie_line': TIE_COLUMNS,
+    'spinodal': WS_COLUMNS,
+    'critical': WS_COLUMNS,
+}
+# 保存形式 (拡張子)
+FORMATS = ('.npy', '.parquet')
+# メタデータの形式のバージョン
+META_VERSION = 1
+
+def metaPath(path: str) -> str:
+    """結果ファイルに対応するメタデータ(JSON)ファイルのパス
+
+    Args:
+        path (str): 結果ファイルのパス
+
+    Returns:
+        str: 拡張子を.jsonに置き換えたパス
+    """
+    return os.path.splitext(path)[0] + ".json"
+
+def _jsonDefault(obj: any) -> any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "toDict"):
+        return obj.toDict()
+    return repr(obj)
+
+def saveResult(path: str, data, kind: str, phase=None, settings: dict = None,
+               units: str = "mass fraction", columns: list = None) -> str:
+    """相図の計算結果を型付きのメタデータと共に保存する
+       '.npy'ならメモリマップで読み込めるnumpy配列, '.parquet'ならParquet (pyarrowなどが必要) で保存し,
+       系の定義, χパラメータのモデル, ソルバーの設定, 単位は同じ名前の.jsonファイルに保存する
+
+    Args:
+        path (str): 保存先のパス. 拡張子はFORMATSのいずれか (拡張子が無ければ'.npy'を付ける)
+        data (np.ndarray | pd.DataFrame): (N,K)配列の結果
+        kind (str): 結果の種類 ('binodal', 'tie_line', 'spinodal', 'critical' または任意の名前)
+        phase (Phase, optional): 計算した系 (成分とχパラメータをPhase.toDictで保存する). Defaults to None.
+        settings (dict, optional): ソルバーの設定など. Defaults to None.
+        units (str, optional): 組成の単位. Defaults to "mass fraction".
+        columns (list, optional): 列名. Noneならkindの既定の列名 (DataFrameならその列名). Defaults to None.
+
+    Returns:
+        str: 保存した結果ファイルのパス
+    """
+    root, ext = os.path.splitext(path)
+    if ext == "":
+        ext = ".npy"
+        path = root + ext
+    if not ext in FORMATS:
+        print(f"対応しない保存形式です. path = {path}", file=sys.stderr)
+        raise ValueError
+    if columns is None:
+        columns = list(data.columns) if isinstance(data, pd.DataFrame) else RESULT_COLUMNS.get(kind)
+    arr = np.ascontiguousarray(data.values if isinstance(data, pd.DataFrame) else data, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[np.newaxis]
+    if columns is None:
+        columns = [str(i) for i in range(arr.shape[1])]
+    if len(columns) != arr.shape[1]:
+        print(f"列名の数が配列の列数と一致しません. columns = {columns}, shape = {arr.shape}", file=sys.stderr)
+        raise ValueError
+
+    # 一時ファイルに書き込んでから置き換えるので, 書き込み途中のファイルは読み込まれない
+    tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+    if ext == ".npy":
+        np.save(tmp_path, arr)
+    else:
+        try:
+            pd.DataFrame(arr, columns=columns).to_parquet(tmp_path)
+        except ImportError as e:
+            print(f"Parquetで保存するにはpyarrowまたはfastparquetが必要です. {e}", file=sys.stderr)
+            raise ValueError
+    os.replace(tmp_path, path)
+    meta = {
+        "version": META_VERSION,
+        "kind": kind,
+        "format": ext,
+        "shape": list(arr.shape),
+        "columns": list(columns),
+        "units": units,
+        "phase": None if phase is None else phase.toDict(),
+        "settings": {} if settings is None else settings,
+    }
+    with open(metaPath(path), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2, default=_jsonDefault)
+    return path
+
+class ResultFile:
+    """saveResultで保存した結果を遅延読み込みするクラス
+       コンストラクタではメタデータだけを読み, 配列は最初に使うときに読み込む ('.npy'はメモリマップ)
+    """
+    def __init__(self, path: str):
+        """コンストラクタ
+
+        Args:
+            path (str): 結果ファイルのパス
+        """
+        if not os.path.exists(path):
+            print(f"結果ファイルがありません. path = {path}", file=sys.stderr)
+            raise ValueError
+        self.path = path
+        try:
+            with open(metaPath(path), encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except FileNotFoundError:
+            print(f"メタデータファイルがありません. path = {metaPath(path)}", file=sys.stderr)
+            raise ValueError
+        self.kind = self.meta["kind"]
+        self.columns = self.meta["columns"]
+        self.units = self.meta["units"]
+        self.settings = self.meta["settings"]
+        self.__arr = None
+
+    def __len__(self) -> int:
+        return self.meta["shape"][0]
+
+    def array(self) -> np.ndarray:
+        """結果の配列 ('.npy'なら読み込み専用のメモリマップ)
+
+        Returns:
+            np.ndarray: (N,K)配列
+        """
+        if self.__arr is None:
+            if self.meta["format"] == ".npy":
+                self.__arr = np.load(self.path, mmap_mode='r', allow_pickle=False)
+            else:
+                self.__arr = pd.read_parquet(self.path).values
+        return self.__arr
+
+    def column(self, name: str) -> np.ndarray:
+        """1列分の結果
+
+        Args:
+            name (str): 列名
+
+        Returns:
+            np.ndarray: (N,)配列
+        """
+        if not name in self.columns:
+            print(f"列がありません. name = {name}, columns = {self.columns}", file=sys.stderr)
+            raise ValueError
+        return self.array()[:, self.columns.index(name)]
+
+    def dataFrame(self) -> pd.DataFrame:
+        """結果の表
+
+        Returns:
+            pd.DataFrame: 列名付きの表
+        """
+        return pd.DataFrame(np.asarray(self.array()), columns=self.columns)
+
+    def components(self) -> tuple:
+        """保存した系の成分
+
+        Returns:
+            tuple: (貧溶媒, 良溶媒, ポリマー) のComponent. 系が保存されていなければNone
+        """
+        phase = self.meta["phase"]
+        if phase is None:
+            return None
+        return tuple(Component(**phase[f"component{i}"]) for i in (1, 2, 3))
+
+    def composition(self) -> Composition:
+        """組成の結果 (binodal, spinodal, critical) をCompositionとして返す
+
+        Returns:
+            Composition: 組成. 系が保存されていれば他の基準に変換できる
+        """
+        basis = {"mass fraction": 'mass', "volume fraction": 'volume', "mole fraction": 'mole'}.get(self.units)
+        if basis is None or len(self.columns) != 3:
+            print(f"組成の結果ではありません. kind = {self.kind}, units = {self.units}", file=sys.stderr)
+            raise ValueError
+        return Composition(self.array(), basis, self.components())
+
+    def tieLines(self) -> np.ndarray:
+        """タイラインの配列を返す (binodalはリッチ相とリーン相に分けて横に並べる)
+
+        Returns:
+            np.ndarray: (N,6)配列 (ポリマーリッチ相, ポリマーリーン相)
+        """
+        arr = np.asarray(self.array())
+        if self.kind == 'tie_line':
+            return arr
+        if self.kind == 'binodal' and len(arr) % 2 == 0:
+            rich, lean = np.split(arr, 2)
+            return np.hstack((rich, lean))
+        print(f"タイラインの結果ではありません. kind = {self.kind}", file=sys.stderr)
+        raise ValueError
+
+    def exportExcel(self, excel_path: str):
+        """報告用にExcelファイルへ書き出す (結果の受け渡しには使わない)
+
+        Args:
+            excel_path (str): 書き出すExcelファイルのパス
+        """
+        self.dataFrame().to_excel(excel_path)
+
+def loadResult(path: str) -> ResultFile:
+    """saveResultで保存した結果を遅延読み込みする
+
+    Args:
+        path (str): 結果ファイルのパス
+
+    Returns:
+        ResultFile: 結果
+    """
+    return ResultFile(path)
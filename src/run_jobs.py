@@ -0,0 +1,272 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import yaml
+import numpy as np
+from component import Component
+from phase import Phase
+from result_cache import ResultCache
+from result_io import saveResult, loadResult
+from system_runner import computeSystem, guardedRun, BINODAL_METHODS, SPINODAL_METHODS
+from ternary_diagram import Ternary
+
+# ジョブの既定値 (ジョブファイルのdefaults, 各系の設定の順に上書きする)
+JOB_DEFAULTS = {
+    "binodal": {"method": 'continuation'},
+    "spinodal": {"method": 'sweep', "phi3": {"logspace": [-6, -0.001, 200]}},
+    "critical": True,
+    "excel": False,
+    "plot": False,
+}
+# マニフェストのファイル名
+MANIFEST_NAME = "manifest.json"
+
+def readJobFile(file_path: str) -> dict:
+    """ジョブファイルを読み込む
+       VIPS.readParamFileと同じくYAML, JSON形式のファイルに対応している
+
+    Args:
+        file_path (str): ジョブファイルのパス
+
+    Returns:
+        dict: 読み込んだジョブの定義
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            extension = file_path.split(".")[-1]
+            if extension in ["yaml", "yml"]: # YAML形式のファイルの場合
+                job_file = yaml.safe_load(file)
+            elif extension in ["json"]:
+                job_file = json.load(file) # JSON形式のファイルの場合
+            else:
+                print("対応しない拡張子です. ", file = sys.stderr)
+                raise ValueError
+    except Exception as e:
+        print('ファイルパスを確認してください. ', file=sys.stderr)
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    return job_file
+
+def expandJobs(job_file: dict) -> list[dict]:
+    """ジョブファイルの各系に既定値を補い, 1系1ジョブのリストにする
+
+    Args:
+        job_file (dict): readJobFileで読み込んだジョブの定義 ("systems"に系のリスト, "defaults"に既定値)
+
+    Returns:
+        list[dict]: ジョブのリスト
+    """
+    systems = job_file.get("systems")
+    if not systems:
+        print("ジョブファイルに系(systems)がありません. ", file=sys.stderr)
+        raise ValueError
+    defaults = _merge(JOB_DEFAULTS, job_file.get("defaults") or {})
+    jobs = []
+    for i, system in enumerate(systems):
+        job = _merge(defaults, system)
+        job.setdefault("name", f"system{i}")
+        for key in ("components", "chi"):
+            if not key in job:
+                print(f"系の定義に{key}がありません. name = {job['name']}", file=sys.stderr)
+                raise ValueError
+        if job["binodal"] and not job["binodal"].get("method") in BINODAL_METHODS:
+            print(f"対応しないバイノーダルの計算方法です. name = {job['name']}, method = {job['binodal'].get('method')}",
+                  file=sys.stderr)
+            raise ValueError
+        if job["spinodal"] and not job["spinodal"].get("method") in SPINODAL_METHODS:
+            print(f"対応しないスピノーダルの計算方法です. name = {job['name']}, method = {job['spinodal'].get('method')}",
+                  file=sys.stderr)
+            raise ValueError
+        jobs.append(job)
+    names = [job["name"] for job in jobs]
+    if len(set(names)) != len(names):
+        print(f"系の名前が重複しています. {names}", file=sys.stderr)
+        raise ValueError
+    return jobs
+
+def _merge(base: dict, override: dict) -> dict:
+    """辞書を1段だけ入れ子まで上書きする (binodal, spinodalの設定の一部だけを系ごとに変えられる)
+       計算方法(method)を変える場合は, 前の方法の設定が残らないよう全体を置き換える
+    """
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict) \
+            and value.get("method", merged[key].get("method")) == merged[key].get("method"):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+def phaseFromJob(job: dict) -> Phase:
+    """ジョブの系の定義からPhaseを作る
+
+    Args:
+        job (dict): ジョブ ("components"に貧溶媒, 良溶媒, ポリマーの{nu, rho, name},
+                    "chi"にchi12, chi23, chi13の数値またはChiModel.toDictの形式の辞書)
+
+    Returns:
+        Phase: Phaseオブジェクト
+    """
+    comps = job["components"]
+    n_solvent = Component(**comps["non_solvent"])
+    solvent   = Component(**comps["solvent"])
+    polymer   = Component(**comps["polymer"])
+    chi = job["chi"]
+    return Phase(n_solvent, solvent, polymer, chi["chi12"], chi["chi23"], chi["chi13"])
+
+def sweepGrid(spec) -> np.ndarray:
+    """掃引範囲の指定から配列を作る
+
+    Args:
+        spec (list | dict): 値のリスト, {"linspace": [start, stop, num]} または {"logspace": [start, stop, num]}
+
+    Returns:
+        np.ndarray: 掃引する値
+    """
+    if isinstance(spec, dict):
+        if "linspace" in spec:
+            return np.linspace(*spec["linspace"])
+        if "logspace" in spec:
+            return np.logspace(*spec["logspace"])
+        print(f"対応しない掃引範囲の指定です. {spec}", file=sys.stderr)
+        raise ValueError
+    return np.atleast_1d(np.asarray(spec, dtype=float))
+
+def _jobWorker(job: dict, output_dir: str, cache_dir: str) -> dict:
+    """ワーカープロセスで1つの系を計算し, 結果をresult_ioの形式で保存する
+       計算に失敗した場合はエラーメッセージを返し, バッチ全体は止めない
+
+    Args:
+        job (dict): ジョブ
+        output_dir (str): 結果を保存するディレクトリ
+        cache_dir (str): ResultCacheのディレクトリ. Noneならキャッシュを使わない
+
+    Returns:
+        dict: マニフェストの1項目 ('name', 'status', 'error', 'time', 'outputs', 'phase')
+    """
+    t0 = time.perf_counter()
+    entry = {"name": job["name"], "status": 'ok', "error": "", "time": 0., "outputs": {}, "phase": None}
+
+    def run():
+        phase = phaseFromJob(job)
+        entry["phase"] = phase.toDict()
+        cache = None if cache_dir is None else ResultCache(cache_dir)
+        prefix = os.path.join(output_dir, job["name"])
+
+        def save(ws, kind, settings):
+            path = saveResult(f"{prefix}_{kind}.npy", ws, kind, phase, settings)
+            entry["outputs"][kind] = os.path.relpath(path, output_dir)
+            if job["excel"]:
+                loadResult(path).exportExcel(f"{prefix}_{kind}.xlsx")
+
+        # 計算できた結果から順に保存する
+        spec = job["binodal"]
+        if spec:
+            binodal = {**spec, "phaseL_phi3": sweepGrid(spec["phaseL_phi3"])} if spec["method"] == 'sweep' else spec
+            result = computeSystem(phase, binodal=binodal, cache=cache)
+            save(result['binodal'], 'binodal', spec)
+            save(result['tie_line'], 'tie_line', spec)
+
+        spec = job["spinodal"]
+        if spec:
+            spinodal = {**spec, "phi3": sweepGrid(spec["phi3"])} if spec["method"] == 'sweep' else spec
+            save(computeSystem(phase, spinodal=spinodal, cache=cache)['spinodal'], 'spinodal', spec)
+
+        if job["critical"]:
+            save(computeSystem(phase, critical='all')['critical'], 'critical', {})
+
+        if job["plot"]:
+            comps = phase.getComponents()
+            tr = Ternary(comps[2].name, comps[1].name, comps[0].name)
+            for kind in ('tie_line', 'spinodal', 'binodal'):
+                if kind in entry["outputs"]:
+                    tr.plotResult(loadResult(os.path.join(output_dir, entry["outputs"][kind])), kind)
+            tr.saveHTML(f"{prefix}.html")
+            entry["outputs"]["plot"] = os.path.relpath(f"{prefix}.html", output_dir)
+
+    _, entry["error"] = guardedRun(run, f"name = {job['name']}")
+    if entry["error"]:
+        entry["status"] = 'error'
+    entry["time"] = time.perf_counter() - t0
+    return entry
+
+def runJobs(jobs: list[dict], output_dir: str, n_jobs: int = 1, cache_dir: str = None,
+            progress=print) -> dict:
+    """ジョブをまとめて計算し, 結果の一覧 (マニフェスト) をoutput_dirに保存する
+
+    Args:
+        jobs (list[dict]): expandJobsで作ったジョブのリスト
+        output_dir (str): 結果を保存するディレクトリ
+        n_jobs (int, optional): 並列に計算するプロセス数. 1なら逐次計算, Noneまたは-1ならCPUコア数. Defaults to 1.
+        cache_dir (str, optional): ResultCacheのディレクトリ. Noneならキャッシュを使わない. Defaults to None.
+        progress (function, optional): 1つの系が終わるたびに進捗の文字列を渡す関数. Defaults to print.
+
+    Returns:
+        dict: マニフェスト ('created', 'n_jobs', 'jobs'). 'jobs'はジョブファイルの順に並べる
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    entries = {}
+    def report(entry: dict):
+        entries[entry["name"]] = entry
+        if progress is not None:
+            progress(f"[{len(entries)}/{len(jobs)}] {entry['name']}: {entry['status']} ({entry['time']:.1f} s)")
+
+    if n_jobs == 1:
+        for job in jobs:
+            report(_jobWorker(job, output_dir, cache_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=None if n_jobs is None or n_jobs < 0 else n_jobs) as executor:
+            futures = [executor.submit(_jobWorker, job, output_dir, cache_dir) for job in jobs]
+            for future in as_completed(futures):
+                report(future.result())
+
+    manifest = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n_jobs": n_jobs,
+        "jobs": [entries[job["name"]] for job in jobs],
+    }
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+def main(argv: list = None) -> int:
+    """コマンドラインからジョブファイルの系をまとめて計算する
+
+    Args:
+        argv (list, optional): コマンドライン引数. Noneならsys.argv. Defaults to None.
+
+    Returns:
+        int: 終了コード (全ての系が成功すれば0)
+    """
+    parser = argparse.ArgumentParser(description="ジョブファイル(YAML/JSON)に並べた3成分系の相図をまとめて計算する")
+    parser.add_argument("job_file", help="ジョブファイルのパス (.yaml, .yml, .json)")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="結果を保存するディレクトリ (既定はジョブファイルのoutput_dir, なければ'results')")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="並列に計算するプロセス数 (-1ならCPUコア数)")
+    parser.add_argument("--only", action="append", default=None, help="指定した名前の系だけを計算する (複数指定可)")
+    parser.add_argument("--cache-dir", default=None,
+                        help="ResultCacheのディレクトリ (既定はジョブファイルのcache_dir, なければ使わない)")
+    args = parser.parse_args(argv)
+
+    job_file = readJobFile(args.job_file)
+    jobs = expandJobs(job_file)
+    if args.only is not None:
+        jobs = [job for job in jobs if job["name"] in args.only]
+        if len(jobs) == 0:
+            print(f"指定した名前の系がありません. {args.only}", file=sys.stderr)
+            return 1
+    output_dir = args.output_dir or job_file.get("output_dir", "results")
+    cache_dir = args.cache_dir or job_file.get("cache_dir")
+    manifest = runJobs(jobs, output_dir, args.jobs, cache_dir)
+    failed = [entry["name"] for entry in manifest["jobs"] if entry["status"] != 'ok']
+    if len(failed) > 0:
+        print(f"計算に失敗した系があります. {failed}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    # python src/run_jobs.py src/jobs_example.yaml -j -1
+    sys.exit(main())
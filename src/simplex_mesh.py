@@ -0,0 +1,270 @@
+import sys
+import numpy as np
+
+def simplexLattice(n: int) -> np.ndarray:
+    """3成分の組成単体上の正三角形格子点を作る
+       各成分を1/n刻みとし, 合計が1になる全ての組成 (i/n, j/n, k/n) (i + j + k = n)
+
+    Args:
+        n (int): 分割数
+
+    Returns:
+        np.ndarray: ((n+1)(n+2)/2,3)配列 (貧溶媒, 良溶媒, ポリマー)
+                    ポリマー, 良溶媒の添字の順に並ぶ
+    """
+    if n < 1:
+        print(f"分割数は1以上にしてください. n = {n}", file=sys.stderr)
+        raise ValueError
+    k, j = np.triu_indices(n + 1) # k <= j を満たす組 -> (k, j - k)
+    j = j - k
+    i = n - j - k
+    return np.stack((i, j, k), axis=-1) / n
+
+def simplexTriangles(n: int) -> np.ndarray:
+    """simplexLattice(n)の格子点を頂点とする単位三角形の一覧を作る
+
+    Args:
+        n (int): 分割数
+
+    Returns:
+        np.ndarray: (n^2,3)配列 simplexLattice(n)の添字 (上向きの三角形, 下向きの三角形の順)
+    """
+    if n < 1:
+        print(f"分割数は1以上にしてください. n = {n}", file=sys.stderr)
+        raise ValueError
+    def index(j, k):
+        # ポリマーの添字kの行の先頭は k(n+1) - k(k-1)/2 番目
+        return k*(n + 1) - k*(k - 1)//2 + j
+    k, j = np.triu_indices(n)
+    j = j - k # j + k <= n - 1
+    up = np.stack((index(j, k), index(j + 1, k), index(j, k + 1)), axis=-1)
+    k, j = np.triu_indices(n - 1)
+    j = j - k # j + k <= n - 2
+    down = np.stack((index(j + 1, k), index(j + 1, k + 1), index(j, k + 1)), axis=-1)
+    return np.vstack((up, down))
+
+def marchingTriangles(points: np.ndarray, values: np.ndarray, triangles: np.ndarray,
+                      level: float = 0.) -> list:
+    """三角形メッシュ上の値の等値線を折れ線として取り出す (marching triangles)
+       等値線と交わる辺上の点を線形補間で求め, 辺を共有する線分をつないで折れ線にする
+
+    Args:
+        points (np.ndarray): (M,3)配列 頂点の組成
+        values (np.ndarray): (M,)配列 頂点の値
+        triangles (np.ndarray): (T,3)配列 三角形の頂点の添字
+        level (float, optional): 等値線の値. Defaults to 0..
+
+    Returns:
+        list: 折れ線 ((K,3)配列) のリスト. 点の多い順に並べる. 閉じた折れ線は始点と終点が同じ
+    """
+    points = np.asarray(points, dtype=float)
+    values = np.asarray(values, dtype=float)
+    triangles = np.asarray(triangles, dtype=int).reshape(-1, 3)
+    above = values > level
+    n_above = np.sum(above[triangles], axis=1)
+    crossed = triangles[(n_above > 0) & (n_above < 3)]
+    if len(crossed) == 0:
+        return []
+    # 各三角形の3辺 (頂点0-1, 1-2, 2-0) のうち, 両端の符号が異なる2辺が線分の両端
+    edges = np.stack((crossed[:, [0, 1]], crossed[:, [1, 2]], crossed[:, [2, 0]]), axis=1)
+    edges = np.sort(edges, axis=-1)
+    is_cut = above[edges[..., 0]] != above[edges[..., 1]]
+    segments = edges[is_cut].reshape(-1, 2, 2)
+    # 辺の番号を振り直し, 辺上の交点を求める
+    keys = segments[..., 0] * len(points) + segments[..., 1]
+    unique_keys, seg_edges = np.unique(keys, return_inverse=True)
+    seg_edges = seg_edges.reshape(-1, 2)
+    a, b = unique_keys // len(points), unique_keys % len(points)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (level - values[a]) / (values[b] - values[a])
+    t = np.clip(np.nan_to_num(t, nan=0.5), 0., 1.)
+    edge_points = points[a] + t[:, None] * (points[b] - points[a])
+
+    # 辺を共有する線分をつなぐ (1つの辺を共有する線分は高々2本)
+    edge_segs = [[] for _ in range(len(unique_keys))]
+    for i, (e0, e1) in enumerate(seg_edges):
+        edge_segs[e0].append(i)
+        edge_segs[e1].append(i)
+    visited = np.zeros(len(seg_edges), dtype=bool)
+
+    def walk(seg: int, edge: int) -> list:
+        # 線分segの端の辺edgeから, 未訪問の線分をたどる
+        chain = []
+        while True:
+            nexts = [i for i in edge_segs[edge] if i != seg and not visited[i]]
+            if len(nexts) == 0:
+                return chain
+            seg = nexts[0]
+            visited[seg] = True
+            e0, e1 = seg_edges[seg]
+            edge = e1 if e0 == edge else e0
+            chain.append(edge)
+
+    polylines = []
+    for i in range(len(seg_edges)):
+        if visited[i]:
+            continue
+        visited[i] = True
+        e0, e1 = seg_edges[i]
+        forward = walk(i, e1)
+        if len(forward) > 0 and forward[-1] == e0:
+            chain = [e0, e1] + forward # 閉じた折れ線
+        else:
+            backward = walk(i, e0)
+            chain = backward[::-1] + [e0, e1] + forward
+        polylines.append(edge_points[chain])
+    polylines.sort(key=len, reverse=True)
+    return polylines
+
+class AdaptiveSimplexMesh:
+    """組成単体の三角形メッシュを, 指標の符号が変わる三角形だけ再帰的に4分割して細かくするクラス
+       粗い正三角形格子から始め, 頂点 (と辺の中点に既にある点) の指標の符号が揃わない三角形を
+       最大の細分化レベルまで分割する. 相境界の近くだけ細かい点が並ぶので,
+       一様な格子より少ない評価回数で境界を高い解像度で求められる
+    """
+    def __init__(self, field, n: int = 8, max_level: int = 6, pointwise: bool = True):
+        """コンストラクタ (メッシュの細分化まで行う)
+
+        Args:
+            field (function): 指標の関数 field(phis). phisは(M,3)配列 (貧溶媒, 良溶媒, ポリマーの体積分率)で,
+                              (M,)または(M,K)配列を返す. 各列の符号の変化を境界とする
+            n (int, optional): 最初の格子の分割数. Defaults to 8.
+            max_level (int, optional): 最大の細分化レベル. 最も細かい格子の間隔は 1/(n 2^max_level). Defaults to 6.
+            pointwise (bool, optional): 指標が各点の組成だけで決まるならTrue (新しい点だけ評価する).
+                                        凸包のように点の集合全体で決まるならFalse (毎回全ての点を評価し直す).
+                                        Defaults to True.
+        """
+        if max_level < 0:
+            print(f"最大の細分化レベルは0以上にしてください. max_level = {max_level}", file=sys.stderr)
+            raise ValueError
+        self.field = field
+        self.n = n
+        self.max_level = max_level
+        self.pointwise = pointwise
+        self.scale = n * 2**max_level # 最も細かい格子の分割数
+        # 頂点の位置を最も細かい格子の整数座標 (良溶媒, ポリマー) で持つ
+        self.__index = np.rint(simplexLattice(n)[:, 1:] * self.scale).astype(np.int64)
+        self.triangles = simplexTriangles(n) # 細分化後の三角形の頂点の添字
+        self.levels = np.zeros(len(self.triangles), dtype=int) # 各三角形の細分化レベル
+        self.points = np.empty((0, 3)) # 頂点の体積分率
+        self.values = np.empty((0, 0)) # 頂点の指標 (M,K)配列
+        self.nfev = 0 # 指標を評価した点の数の累計
+        self.__refine()
+
+    def __toPhis(self, index: np.ndarray) -> np.ndarray:
+        j, k = index[:, 0], index[:, 1]
+        return np.stack((self.scale - j - k, j, k), axis=-1) / self.scale
+
+    def __evaluate(self, start: int):
+        """start番目以降の新しい点の指標を評価する (pointwise=Falseなら全ての点)
+        """
+        self.points = self.__toPhis(self.__index)
+        if not self.pointwise:
+            start = 0
+        new = np.asarray(self.field(self.points[start:]), dtype=float).reshape(len(self.points) - start, -1)
+        self.nfev += len(new)
+        self.values = new if start == 0 else np.vstack((self.values, new))
+
+    def __lookup(self, index: np.ndarray) -> np.ndarray:
+        """整数座標の点の添字を探す
+
+        Returns:
+            np.ndarray: 点の添字. 存在しない点は-1
+        """
+        width = self.scale + 1
+        keys = self.__index[:, 0] * width + self.__index[:, 1]
+        order = np.argsort(keys)
+        query = index[..., 0] * width + index[..., 1]
+        pos = np.clip(np.searchsorted(keys[order], query), 0, len(keys) - 1)
+        found = keys[order][pos] == query
+        return np.where(found, order[pos], -1)
+
+    def __midpoints(self, triangles: np.ndarray) -> np.ndarray:
+        """三角形の辺 (頂点0-1, 1-2, 2-0) の中点の整数座標
+
+        Returns:
+            np.ndarray: (T,3,2)配列
+        """
+        idx = self.__index[triangles]
+        return (idx + np.roll(idx, -1, axis=1)) // 2
+
+    def __flags(self) -> np.ndarray:
+        """分割する三角形を選ぶ
+           頂点と, 辺の中点にある点 (隣の細かい三角形の頂点) の指標の符号が揃わない三角形
+
+        Returns:
+            np.ndarray: (T,)配列 分割するならTrue
+        """
+        above = self.values > 0.
+        coarse = self.levels < self.max_level
+        triangles = self.triangles[coarse]
+        mids = self.__lookup(self.__midpoints(triangles))
+        has_mid = (mids >= 0)[..., None]
+        signs = above[triangles]
+        mid_signs = above[np.maximum(mids, 0)]
+        any_above = np.any(signs, axis=1) | np.any(has_mid & mid_signs, axis=1)
+        any_below = np.any(~signs, axis=1) | np.any(has_mid & ~mid_signs, axis=1)
+        flags = np.zeros(len(self.triangles), dtype=bool)
+        flags[coarse] = np.any(any_above & any_below, axis=-1)
+        return flags
+
+    def __split(self, flags: np.ndarray):
+        """選んだ三角形を辺の中点で4つに分割する
+        """
+        parents = self.triangles[flags]
+        mids = self.__midpoints(parents)
+        mid_ids = self.__lookup(mids)
+        # まだ無い中点を追加する (隣り合う三角形で共有する中点は1つにまとめる)
+        missing = mid_ids < 0
+        new_index, inverse = np.unique(mids[missing], axis=0, return_inverse=True)
+        mid_ids[missing] = len(self.__index) + inverse.ravel()
+        self.__index = np.vstack((self.__index, new_index))
+
+        a, b, c = parents[:, 0], parents[:, 1], parents[:, 2]
+        ab, bc, ca = mid_ids[:, 0], mid_ids[:, 1], mid_ids[:, 2]
+        children = np.stack((
+            np.stack((a, ab, ca), axis=-1),
+            np.stack((ab, b, bc), axis=-1),
+            np.stack((ca, bc, c), axis=-1),
+            np.stack((ab, bc, ca), axis=-1),
+        ), axis=1).reshape(-1, 3)
+        self.triangles = np.vstack((self.triangles[~flags], children))
+        self.levels = np.concatenate((self.levels[~flags], np.repeat(self.levels[flags] + 1, 4)))
+
+    def __refine(self):
+        """分割する三角形が無くなるまで細分化する
+        """
+        self.__evaluate(0)
+        while True:
+            flags = self.__flags()
+            if not np.any(flags):
+                break
+            start = len(self.__index)
+            self.__split(flags)
+            self.__evaluate(start)
+
+    def contour(self, column: int = 0, level: float = 0.) -> list:
+        """指標の等値線 (境界) を折れ線として取り出す
+
+        Args:
+            column (int, optional): 指標の列. Defaults to 0.
+            level (float, optional): 等値線の値. Defaults to 0..
+
+        Returns:
+            list: 体積分率の折れ線 ((K,3)配列) のリスト
+        """
+        return marchingTriangles(self.points, self.values[:, column], self.triangles, level)
+
+    def boundaryPoints(self, column: int = 0) -> np.ndarray:
+        """指標の符号が変わる三角形の頂点 (境界の近くの細かい点) を取り出す
+
+        Args:
+            column (int, optional): 指標の列. Defaults to 0.
+
+        Returns:
+            np.ndarray: (K,3)配列 体積分率
+        """
+        above = self.values[:, column] > 0.
+        n_above = np.sum(above[self.triangles], axis=1)
+        vertices = np.unique(self.triangles[(n_above > 0) & (n_above < 3)])
+        return self.points[vertices]
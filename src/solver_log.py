@@ -0,0 +1,138 @@
+import time
+import pandas as pd
+import numpy as np
+
+# 1点ごとの記録の項目
+# phi3: ポリマー(リーン相)体積分率, time: 計算時間[s], nfev: 関数評価回数, njev: ヤコビ行列(勾配)評価回数,
+# nit: 反復回数, residual: 最終的な残差, success: 収束したかどうか
+LOG_COLUMNS = ['phi3', 'time', 'nfev', 'njev', 'nit', 'residual', 'success']
+
+def printProgress(i: int, record: dict):
+    """点の番号を表示する進捗表示関数 (従来のprint(i)と同じ表示)
+
+    Args:
+        i (int): 点の番号
+        record (dict): その点の記録
+    """
+    print(i)
+
+class SolverLog:
+    """ソルバーの1点ごとの計算時間, 評価回数, 反復回数, 残差, 収束の有無を記録するクラス
+    """
+    def __init__(self, progress=None):
+        """コンストラクタ
+
+        Args:
+            progress (function, optional): 1点記録するたびに呼ぶ関数 progress(i, record). Defaults to None.
+        """
+        self.records = []
+        self.progress = progress
+        self.__t0 = time.perf_counter()
+
+    def start(self):
+        """次の点の計算時間の計測を始める
+        """
+        self.__t0 = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """startからの経過時間
+
+        Returns:
+            float: 経過時間[s]
+        """
+        return time.perf_counter() - self.__t0
+
+    def append(self, phi3: float, nfev: int, njev: int, nit: int, residual: float, success: bool,
+               elapsed: float = None):
+        """1点の記録を追加し, 進捗表示関数を呼ぶ
+
+        Args:
+            phi3 (float): ポリマー(リーン相)体積分率
+            nfev (int): 関数評価回数
+            njev (int): ヤコビ行列(勾配)評価回数
+            nit (int): 反復回数
+            residual (float): 最終的な残差
+            success (bool): 収束したかどうか
+            elapsed (float, optional): 計算時間[s]. Noneならstartからの経過時間. Defaults to None.
+        """
+        if elapsed is None:
+            elapsed = self.elapsed()
+        record = dict(phi3=float(phi3), time=float(elapsed), nfev=int(nfev), njev=int(njev),
+                      nit=int(nit), residual=float(residual), success=bool(success))
+        self.records.append(record)
+        if self.progress is not None:
+            self.progress(len(self.records) - 1, record)
+        self.start()
+
+    def extend(self, other):
+        """他のSolverLogの記録を順番に追加する (並列計算の結果の結合用)
+
+        Args:
+            other (SolverLog): 追加する記録
+        """
+        for record in other.records:
+            record = dict(record)
+            elapsed = record.pop('time')
+            self.append(elapsed=elapsed, **record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def column(self, name: str) -> list:
+        """1項目の記録をリストで返す
+
+        Args:
+            name (str): LOG_COLUMNSのいずれか
+
+        Returns:
+            list: 各点の値
+        """
+        return [record[name] for record in self.records]
+
+    def toDataFrame(self) -> pd.DataFrame:
+        """記録を表にする
+
+        Returns:
+            pd.DataFrame: LOG_COLUMNSを列に持つ表
+        """
+        return pd.DataFrame(self.records, columns=LOG_COLUMNS)
+
+    def summary(self) -> dict:
+        """記録の合計や最大値をまとめる
+
+        Returns:
+            dict: 点数, 合計時間, 合計評価回数, 合計反復回数, 最大残差, 収束しなかった点数
+        """
+        df = self.toDataFrame()
+        return {
+            'points': len(df),
+            'time': df['time'].sum(),
+            'nfev': int(df['nfev'].sum()),
+            'njev': int(df['njev'].sum()),
+            'nit': int(df['nit'].sum()),
+            'max_residual': df['residual'].max(),
+            'failures': int((~df['success'].astype(bool)).sum()),
+        }
+
+    def toArray(self) -> np.ndarray:
+        """記録を(N,7)の数値配列にする (キャッシュへの保存用)
+
+        Returns:
+            np.ndarray: LOG_COLUMNSの順に並べた配列
+        """
+        return np.array([[record[col] for col in LOG_COLUMNS] for record in self.records],
+                        dtype=float).reshape(-1, len(LOG_COLUMNS))
+
+    def loadArray(self, arr: np.ndarray):
+        """toArrayで作った配列から記録を復元する (進捗表示関数は呼ばない)
+
+        Args:
+            arr (np.ndarray): (N,7)配列
+        """
+        self.records = []
+        for row in arr:
+            record = dict(zip(LOG_COLUMNS, row))
+            self.records.append(dict(phi3=float(record['phi3']), time=float(record['time']),
+                                     nfev=int(record['nfev']), njev=int(record['njev']),
+                                     nit=int(record['nit']), residual=float(record['residual']),
+                                     success=bool(record['success'])))
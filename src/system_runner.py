@@ -0,0 +1,103 @@
+import sys
+import numpy as np
+from phase import Phase
+from composition import Composition
+from result_cache import ResultCache
+from ternary_system import TernaryBinodal, TernarySpinodal, TernaryCritical
+
+# バイノーダル, スピノーダルの計算方法
+BINODAL_METHODS = ('continuation', 'sweep', 'hull')
+SPINODAL_METHODS = ('sweep', 'contour')
+
+def computeSystem(phase: Phase, binodal: dict = None, spinodal: dict = None, critical: str = None,
+                  cache: ResultCache = None) -> dict:
+    """1つの系のバイノーダル, スピノーダル, 臨界点を計算し, 無効な点を除いた重量分率を返す
+       (TernaryBatch, run_jobsの共通の計算手順)
+
+    Args:
+        phase (Phase): 計算する系
+        binodal (dict, optional): バイノーダルの計算方法. "method"はBINODAL_METHODSのいずれか.
+                                  'sweep'では"phaseL_phi3"に掃引する値の配列を与える.
+                                  残りの項目は計算メソッドにそのまま渡す. Noneなら計算しない. Defaults to None.
+        spinodal (dict, optional): スピノーダルの計算方法. "method"はSPINODAL_METHODSのいずれか.
+                                   'sweep'では"phi3"に掃引する値の配列を与える. Noneなら計算しない. Defaults to None.
+        critical (str, optional): 'binodal'ならバイノーダルの計算で求めた臨界点,
+                                  'all'ならTernaryCritical.criticalPointsで求めた全ての臨界点. Defaults to None.
+        cache (ResultCache, optional): 計算結果のキャッシュ. Defaults to None.
+
+    Returns:
+        dict: 'binodal' (2N,3), 'tie_line' (N,6), 'spinodal', 'critical' の重量分率の配列 (計算しなかったものは含めない),
+              'max_residual' (バイノーダルの残差の最大値), 'nfev', 'time' (計算の記録の合計)
+    """
+    result = {'max_residual': np.nan, 'nfev': 0, 'time': 0.}
+    logs = []
+    binodal_system = None
+    if binodal:
+        options = {key: value for key, value in binodal.items() if not key in ("method", "phaseL_phi3")}
+        binodal_system = TernaryBinodal(phase, cache)
+        if binodal["method"] == 'continuation':
+            ws = binodal_system.binodalContinuation(progress=None, **options)
+        elif binodal["method"] == 'sweep':
+            ws = binodal_system.binodal(binodal["phaseL_phi3"], progress=None, **options)
+        elif binodal["method"] == 'hull':
+            ws = binodal_system.binodalHull(progress=None, **options)
+        else:
+            print(f"対応しないバイノーダルの計算方法です. method = {binodal['method']}", file=sys.stderr)
+            raise ValueError
+        # 臨界点を越えた点や解き直しに失敗した点は除く
+        rich, lean = np.split(ws, 2)
+        valid = ~np.any(np.isnan(rich) | np.isnan(lean), axis=1)
+        result['binodal'] = np.vstack((rich[valid], lean[valid]))
+        result['tie_line'] = np.hstack((rich[valid], lean[valid]))
+        if len(binodal_system.residual_list) > 0:
+            result['max_residual'] = np.nanmax(binodal_system.residual_list)
+        logs.append(binodal_system.log)
+
+    if spinodal:
+        options = {key: value for key, value in spinodal.items() if not key in ("method", "phi3")}
+        spinodal_system = TernarySpinodal(phase, cache)
+        if spinodal["method"] == 'sweep':
+            ws = spinodal_system.spinodal(spinodal["phi3"], progress=None, **options)
+            result['spinodal'] = ws[~np.any(np.isnan(ws), axis=1)]
+            logs.append(spinodal_system.log)
+        elif spinodal["method"] == 'contour':
+            # 折れ線の間をNaNの行で区切って1つの配列にする
+            lines = spinodal_system.spinodalContour(**options)
+            result['spinodal'] = np.vstack([np.vstack((line, np.full((1, 3), np.nan))) for line in lines])[:-1] \
+                if len(lines) > 0 else np.empty((0, 3))
+        else:
+            print(f"対応しないスピノーダルの計算方法です. method = {spinodal['method']}", file=sys.stderr)
+            raise ValueError
+
+    if critical == 'binodal':
+        phis = None if binodal_system is None else binodal_system.critical_point
+        result['critical'] = np.empty((0, 3)) if phis is None \
+            else Composition(phis, 'volume', phase.getComponents()).release('mass')
+    elif critical == 'all':
+        result['critical'] = Composition(TernaryCritical(phase).criticalPoints(), 'volume', phase.getComponents()).release('mass')
+    elif critical is not None:
+        print(f"対応しない臨界点の計算方法です. critical = {critical}", file=sys.stderr)
+        raise ValueError
+
+    for log in logs:
+        summary = log.summary()
+        result['nfev'] += summary['nfev']
+        result['time'] += summary['time']
+    return result
+
+def guardedRun(func, label: str) -> tuple[any, str]:
+    """funcを実行し, 例外が起きてもバッチ全体を止めずにエラーメッセージを返す
+
+    Args:
+        func (function): 引数なしで呼ぶ関数
+        label (str): エラーメッセージに添える計算対象の説明
+
+    Returns:
+        tuple[any, str]: funcの戻り値 (失敗した場合はNone), エラーメッセージ (成功した場合は"")
+    """
+    try:
+        return func(), ""
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"計算に失敗しました. {label} {error}", file=sys.stderr)
+        return None, error
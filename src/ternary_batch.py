@@ -0,0 +1,198 @@
+import sys
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import numpy as np
+from component import Component
+from phase import Phase
+from ternary_system import WS_COLUMNS, TIE_COLUMNS
+from system_runner import computeSystem, guardedRun
+
+# パラメータ表の列名 (モル体積, 密度, χパラメータ)
+PARAM_COLUMNS = ['nu1', 'nu2', 'nu3', 'rho1', 'rho2', 'rho3', 'chi12', 'chi23', 'chi13']
+
+def paramGrid(nu1, nu2, nu3, rho1, rho2, rho3, chi12, chi23, chi13) -> pd.DataFrame:
+    """各パラメータの値の全ての組み合わせからなるパラメータ表を作る
+       各引数には数値または数値のリストを与える
+
+    Args:
+        nu1 (float | list): 貧溶媒のモル体積
+        nu2 (float | list): 良溶媒のモル体積
+        nu3 (float | list): ポリマーのモル体積
+        rho1 (float | list): 貧溶媒の密度
+        rho2 (float | list): 良溶媒の密度
+        rho3 (float | list): ポリマーの密度
+        chi12 (float | list): 貧溶媒・良溶媒間のχパラメータ
+        chi23 (float | list): 良溶媒・ポリマー間のχパラメータ
+        chi13 (float | list): 貧溶媒・ポリマー間のχパラメータ
+
+    Returns:
+        pd.DataFrame: 1行が1つの系を表すパラメータ表 (index名は'case')
+    """
+    values = [np.atleast_1d(val).tolist() for val in (nu1, nu2, nu3, rho1, rho2, rho3, chi12, chi23, chi13)]
+    params = pd.DataFrame(list(itertools.product(*values)), columns=PARAM_COLUMNS, dtype=float)
+    params.index.name = 'case'
+    return params
+
+def phaseFromParams(params: dict, names: tuple[str, str, str] = ("", "", "")) -> Phase:
+    """パラメータ表の1行からPhaseを作る
+
+    Args:
+        params (dict): PARAM_COLUMNSをキーに持つ辞書 (pd.Seriesでもよい)
+        names (tuple[str, str, str], optional): 貧溶媒, 良溶媒, ポリマーの名前. Defaults to ("", "", "").
+
+    Returns:
+        Phase: Phaseオブジェクト
+    """
+    missing = [col for col in PARAM_COLUMNS if not col in params]
+    if len(missing) > 0:
+        print(f"パラメータが足りません. {missing}", file=sys.stderr)
+        raise ValueError
+    # numpyの数値型からPythonのfloat型に変換する
+    p = {col: float(params[col]) for col in PARAM_COLUMNS}
+    n_solvent = Component(p['nu1'], p['rho1'], names[0])
+    solvent   = Component(p['nu2'], p['rho2'], names[1])
+    polymer   = Component(p['nu3'], p['rho3'], names[2])
+    return Phase(n_solvent, solvent, polymer, p['chi12'], p['chi23'], p['chi13'])
+
+def _caseWorker(params: dict, phaseL_phi3: np.ndarray, spinodal_phi3: np.ndarray) -> dict:
+    """ワーカープロセスで1つの系のバイノーダル, スピノーダル, 臨界点を計算する
+       計算に失敗した場合はエラーメッセージを返し, バッチ全体は止めない
+
+    Args:
+        params (dict): パラメータ表の1行
+        phaseL_phi3 (np.ndarray): バイノーダルを計算するポリマーリーン相のポリマー体積分率.
+                                  Noneなら連続法で追跡する
+        spinodal_phi3 (np.ndarray): スピノーダルを計算するポリマー体積分率
+
+    Returns:
+        dict: 'binodal', 'spinodal', 'critical' (重量分率の配列), 'max_residual', 'nfev', 'time', 'error'
+    """
+    result = {'binodal': np.empty((0, 3)), 'spinodal': np.empty((0, 3)), 'critical': np.empty((0, 3)),
+              'max_residual': np.nan, 'nfev': 0, 'time': 0., 'error': ""}
+    binodal = {"method": 'continuation'} if phaseL_phi3 is None \
+        else {"method": 'sweep', "phaseL_phi3": phaseL_phi3, "solver": "root"}
+    computed, result['error'] = guardedRun(
+        lambda: computeSystem(phaseFromParams(params), binodal=binodal,
+                              spinodal={"method": 'sweep', "phi3": spinodal_phi3}, critical='binodal'),
+        str(dict(params)))
+    if computed is not None:
+        result.update({key: computed[key] for key in ('binodal', 'spinodal', 'critical', 'max_residual', 'nfev', 'time')})
+    return result
+
+class TernaryBatch:
+    """パラメータ表の各行の系について, バイノーダル, スピノーダル, タイライン, 臨界点を
+       まとめて計算するクラス
+    """
+    def __init__(self, params: pd.DataFrame,
+                 phaseL_phi3: np.ndarray = None,
+                 spinodal_phi3: np.ndarray = np.logspace(-6, -0.001, 200)):
+        """コンストラクタ
+
+        Args:
+            params (pd.DataFrame): PARAM_COLUMNSの列を持つパラメータ表 (paramGridで作れる)
+            phaseL_phi3 (np.ndarray, optional): バイノーダルを計算するポリマーリーン相のポリマー体積分率.
+                                                Noneなら連続法で臨界点まで追跡する. Defaults to None.
+            spinodal_phi3 (np.ndarray, optional): スピノーダルを計算するポリマー体積分率.
+                                                  Defaults to np.logspace(-6, -0.001, 200).
+        """
+        missing = [col for col in PARAM_COLUMNS if not col in params.columns]
+        if len(missing) > 0:
+            print(f"パラメータ表の列が足りません. {missing}", file=sys.stderr)
+            raise ValueError
+        self.params = params.copy()
+        if self.params.index.name is None:
+            self.params.index.name = 'case'
+        self.phaseL_phi3 = phaseL_phi3
+        self.spinodal_phi3 = spinodal_phi3
+        self.results = None # 全ての系の組成 (case, curve, point)を添字とする
+        self.summary = None # 系ごとのパラメータ, 臨界点, 点数, 残差, エラー
+
+    def run(self, n_jobs: int = 1) -> pd.DataFrame:
+        """全ての系を計算し, 1つの表にまとめる
+           結果はself.results, 系ごとの要約はself.summaryにも格納する
+
+        Args:
+            n_jobs (int, optional): 並列に計算するプロセス数. 1なら逐次計算, Noneまたは-1ならCPUコア数.
+                                    系ごとにプロセスへ割り当て, 結果はパラメータ表の順番に並べる. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: (case, curve, point)を添字とし, WS_COLUMNSを列に持つ重量分率の表
+                          curveは'binodal', 'spinodal', 'critical'.
+                          'binodal'はポリマーリッチ相, ポリマーリーン相の順に縦に結合されている
+        """
+        rows = [dict(row) for _, row in self.params.iterrows()]
+        args = (itertools.repeat(self.phaseL_phi3), itertools.repeat(self.spinodal_phi3))
+        if n_jobs == 1:
+            case_results = list(map(_caseWorker, rows, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=None if n_jobs is None or n_jobs < 0 else n_jobs) as executor:
+                case_results = list(executor.map(_caseWorker, rows, *args))
+
+        frames = []
+        summary = []
+        for case, result in zip(self.params.index, case_results):
+            for curve in ('binodal', 'spinodal', 'critical'):
+                arr = result[curve]
+                index = pd.MultiIndex.from_product([[case], [curve], range(len(arr))],
+                                                   names=[self.params.index.name, 'curve', 'point'])
+                frames.append(pd.DataFrame(arr, index=index, columns=WS_COLUMNS))
+            critical = result['critical'][0] if len(result['critical']) > 0 else [np.nan] * 3
+            summary.append([len(result['binodal']) // 2, len(result['spinodal']), *critical,
+                            result['max_residual'], result['nfev'], result['time'], result['error']])
+        self.results = pd.concat(frames)
+        self.summary = self.params.join(pd.DataFrame(
+            summary, index=self.params.index,
+            columns=['n_tie_line', 'n_spinodal', '臨界貧溶媒', '臨界良溶媒', '臨界ポリマー',
+                     'max_residual', 'nfev', 'time', 'error']))
+        return self.results
+
+    def binodal(self, case) -> pd.DataFrame:
+        """1つの系のバイノーダルを返す
+
+        Args:
+            case (any): パラメータ表の添字
+
+        Returns:
+            pd.DataFrame: ポリマーリッチ相, ポリマーリーン相の順に縦に結合した重量分率
+        """
+        return self.__curve(case, 'binodal')
+
+    def spinodal(self, case) -> pd.DataFrame:
+        """1つの系のスピノーダルを返す
+
+        Args:
+            case (any): パラメータ表の添字
+
+        Returns:
+            pd.DataFrame: スピノーダル組成の重量分率
+        """
+        return self.__curve(case, 'spinodal')
+
+    def tieLine(self, case) -> pd.DataFrame:
+        """1つの系のタイラインを返す
+
+        Args:
+            case (any): パラメータ表の添字
+
+        Returns:
+            pd.DataFrame: TIE_COLUMNSを列に持つタイラインの重量分率
+        """
+        rich, lean = np.split(self.binodal(case).values, 2)
+        return pd.DataFrame(np.hstack((rich, lean)), columns=TIE_COLUMNS)
+
+    def __curve(self, case, curve: str) -> pd.DataFrame:
+        if self.results is None:
+            print("runを先に実行してください", file=sys.stderr)
+            raise ValueError
+        return self.results.loc[(case, curve)]
+
+if __name__ == "__main__":
+    # PSF/NMP/H2O系のχ12, χ13に関する感度解析
+    params = paramGrid(18, 71.29, 20270, 1., 1.03, 1.24,
+                       chi12=[0.9, 1.1175, 1.3], chi23=0.24, chi13=[2.0, 2.5, 3.0])
+    batch = TernaryBatch(params)
+    batch.run(n_jobs=-1)
+    batch.results.to_excel("batch_results.xlsx")
+    batch.summary.to_excel("batch_summary.xlsx")
+    print(batch.summary)
@@ -4,6 +4,7 @@ from typing import Union
 # import pandas as pd
 import numpy as np
 import pandas as pd
+from scipy.interpolate import PchipInterpolator
 # from scipy.optimize import minimize
 # from ternary_diagram import Ternary, default_colors, default_markers
 
@@ -83,6 +84,28 @@ vNS = np.array([-1., 0.])
 vSPinv = np.array([1.,1.])
 vPNinv = np.array([1./np.sqrt(3.), -1./np.sqrt(3.)])
 
+def PStoUVArray(p, s, n_s=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ポリマー分率と良溶媒分率の配列をUV座標に変換する (UV座標への変換は全てこの関数を通す)
+       assertの代わりに無効な組成を返す
+
+    Args:
+        p (array): ポリマー分率
+        s (array): 良溶媒分率
+        n_s (array, optional): 貧溶媒分率. Noneなら1 - p - s. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: U座標, V座標, 無効な組成 (NaNまたは負の分率) ならTrue
+    """
+    p, s = np.broadcast_arrays(np.asarray(p, dtype=float), np.asarray(s, dtype=float))
+    n_s = 1. - p - s if n_s is None else np.broadcast_to(np.asarray(n_s, dtype=float), p.shape)
+    tol = 1e-12 # 丸め誤差程度の負の分率は許す
+    with np.errstate(invalid='ignore'):
+        invalid = np.isnan(p) | np.isnan(s) | (p < -tol) | (s < -tol) | (n_s < -tol)
+    # ポリマー頂点方向と貧溶媒頂点方向のベクトルの和 (良溶媒頂点が原点)
+    U = p * vSP[0] + n_s * vPN[0]
+    V = p * vSP[1] + n_s * vPN[1]
+    return U, V, invalid
+
 def PStoUV(polymer: float | np.ndarray | pd.Series, 
            solvent: float | np.ndarray | pd.Series) \
         -> Union[float, float] | Union[np.ndarray, np.ndarray] | Union[pd.Series, pd.Series]:
@@ -100,18 +123,15 @@ def PStoUV(polymer: float | np.ndarray | pd.Series,
     if type(polymer) == np.ndarray: # 配列形式で分率を渡されたとき
         assert(len(polymer) == len(solvent))
         assert(np.all(non_solvent >= 0.))
-
-        # UV座標系での座標値を配列に格納
-        points = np.tile(polymer    [:,None],(1,2)) * np.tile(vSP, (len(polymer),1)) \
-               + np.tile(non_solvent[:,None],(1,2)) * np.tile(vPN, (len(polymer),1))
-        return points[:, 0], points[:, 1]
+        U, V, _ = PStoUVArray(polymer, solvent, non_solvent)
+        return U, V
     elif type(polymer) == pd.Series:
         Us, Vs = PStoUV(polymer.values, solvent.values)
         return pd.Series(Us), pd.Series(Vs)
     else: # スカラー形式で分率を渡されたとき
         assert(non_solvent >= 0.)
-        point = polymer * vSP + non_solvent * vPN
-        return point[0], point[1]
+        U, V, _ = PStoUVArray(polymer, solvent, non_solvent)
+        return U[()], V[()]
 
 def UVtoPS(U: float | np.ndarray | pd.Series, 
            V: float | np.ndarray | pd.Series) \
@@ -129,8 +149,7 @@ def UVtoPS(U: float | np.ndarray | pd.Series,
     if type(U) == np.ndarray: # 配列形式でU, V座標値を渡されたとき
         assert(len(U) == len(V))
         # UV座標系での座標値を配列に格納
-        points = np.tile(U[:,None],(1,2)) * np.tile(vSPinv, (len(U),1)) \
-               + np.tile(V[:,None],(1,2)) * np.tile(vPNinv, (len(U),1))
+        points = U[:,None] * vSPinv + V[:,None] * vPNinv
         solvents = 1. - points[:,0] - points[:,1]
         return points[:, 0], solvents
     elif type(U) == pd.Series:
@@ -153,6 +172,145 @@ def UVlineToPSLine(slope: float, interception: float) -> Union[float, float]:
     """
     return -(1+(np.sqrt(3.)-slope)/(np.sqrt(3.)+slope)), (1+2./(np.sqrt(3)+slope)*interception)
 
+# バイノーダル線のフィッティング方法 ('poly': 多項式, 'pchip': 単調な区分3次エルミート補間)
+FIT_METHODS = ('poly', 'pchip')
+# 交点の探索で直線上にとる標本点の数と, 挟み込み法の反復回数
+CROSSING_SAMPLES = 17
+CROSSING_ITERATIONS = 20
+# 一度に交点を探索する組の数 (標本点の配列の大きさを抑える)
+CROSSING_CHUNK = 65536
+
+def _simplexRange(p1: np.ndarray, s1: np.ndarray, p2: np.ndarray, s2: np.ndarray,
+                  segment: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """組成1 + t (組成2 - 組成1) の全ての分率が0以上になるtの範囲 (直線を三角形で切り取る)
+
+    Args:
+        p1, s1, p2, s2 (np.ndarray): (N,)配列 組成1, 組成2のポリマー分率と溶媒分率
+        segment (bool): Trueなら0 <= t <= 1の範囲に限る
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: tの下限, 上限, 範囲が空でない有効な組ならTrue
+    """
+    _, _, invalid1 = PStoUVArray(p1, s1)
+    _, _, invalid2 = PStoUVArray(p2, s2)
+    f1 = np.stack((p1, s1, 1. - p1 - s1))
+    df = np.stack((p2, s2, 1. - p2 - s2)) - f1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bound = -f1 / df
+        lo = np.max(np.where(df > 0., bound, -np.inf), axis=0)
+        hi = np.min(np.where(df < 0., bound, np.inf), axis=0)
+    if segment:
+        lo, hi = np.maximum(lo, 0.), np.minimum(hi, 1.)
+    valid = ~(invalid1 | invalid2) & np.any(df != 0., axis=0) & (lo < hi)
+    return np.where(valid, lo, 0.), np.where(valid, hi, 1.), valid
+
+def _bracketRoots(gap, lo: np.ndarray, hi: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """多数の1変数関数の根を区間[lo, hi]から同時に求める
+       標本点で符号の変わる区間を探し, t = 1に最も近い区間を挟み込み法 (Illinois法) で解く.
+       収束した組は以降の反復から外す
+
+    Args:
+        gap (function): gap(t, i) i番目の組の関数の値. tは(M,)または(M,K)配列, iは(M,)配列
+        lo (np.ndarray): (N,)配列 区間の下限
+        hi (np.ndarray): (N,)配列 区間の上限
+        rows (np.ndarray): 解く組の番号
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 根t (N,)配列, 根が見つかればTrue (N,)配列
+    """
+    t = np.full(len(lo), np.nan)
+    crossed = np.zeros(len(lo), dtype=bool)
+    grid = np.linspace(0., 1., CROSSING_SAMPLES)
+    for start in range(0, len(rows), CROSSING_CHUNK):
+        i = rows[start:start + CROSSING_CHUNK]
+        if len(i) == 0:
+            continue
+        ts = lo[i, None] + (hi - lo)[i, None] * grid
+        gs = gap(ts, i)
+        with np.errstate(invalid='ignore'):
+            change = (gs[:, :-1] <= 0.) != (gs[:, 1:] <= 0.)
+        change &= np.isfinite(gs[:, :-1]) & np.isfinite(gs[:, 1:])
+        # 符号の変わる区間のうち, t = 1 (吸湿後組成) に最も近い区間を選ぶ
+        score = np.where(change, np.abs(0.5*(ts[:, :-1] + ts[:, 1:]) - 1.), np.inf)
+        k = np.argmin(score, axis=1)
+        found = np.any(change, axis=1)
+        ri = np.arange(len(i))
+        a, b = ts[ri, k], ts[ri, k + 1]
+        ga, gb = gs[ri, k], gs[ri, k + 1]
+        c = 0.5*(a + b)
+        side = np.zeros(len(i), dtype=int)
+        active = np.nonzero(found)[0]
+        for _ in range(CROSSING_ITERATIONS):
+            if len(active) == 0:
+                break
+            aa, bb, gaa, gbb = a[active], b[active], ga[active], gb[active]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                cc = np.where(gaa != gbb, (aa*gbb - bb*gaa) / (gbb - gaa), 0.5*(aa + bb))
+            cc = np.where(np.isfinite(cc) & (cc >= np.minimum(aa, bb)) & (cc <= np.maximum(aa, bb)),
+                          cc, 0.5*(aa + bb))
+            gc = gap(cc, i[active])
+            c[active] = cc
+            same = (gc <= 0.) == (gaa <= 0.)
+            # 同じ側の端点が続けて置き換わったら, 反対側の端点の値を半分にして収束を速める
+            a[active] = np.where(same, cc, aa)
+            ga[active] = np.where(same, gc, np.where(side[active] == -1, 0.5*gaa, gaa))
+            b[active] = np.where(same, bb, cc)
+            gb[active] = np.where(same, np.where(side[active] == 1, 0.5*gbb, gbb), gc)
+            side[active] = np.where(same, 1, -1)
+            active = active[np.abs(gc) > 1e-15]
+        t[i] = np.where(found, c, np.nan)
+        crossed[i] = found
+    return t, crossed
+
+def _column(x: np.ndarray, t: np.ndarray) -> np.ndarray:
+    """(M,)配列xを(M,)または(M,K)配列tと演算できる形にする
+    """
+    return x.reshape(x.shape + (1,) * (np.ndim(t) - 1))
+
+class MonotoneSpline:
+    """UV座標上のバイノーダル線 V = f(U) を単調な区分3次エルミート補間 (PCHIP) で表す関数
+       データ点の間で振動せず, データが単調ならその単調性を保つ.
+       データの範囲外は端点の傾きで直線的に外挿する. np.poly1dと同じく呼び出して使い, pickleで保存できる
+    """
+    def __init__(self, U: np.ndarray, V: np.ndarray):
+        """コンストラクタ
+
+        Args:
+            U (np.ndarray): U座標 (同じU座標の点はV座標を平均する)
+            V (np.ndarray): V座標
+        """
+        U, V = np.asarray(U, dtype=float).ravel(), np.asarray(V, dtype=float).ravel()
+        valid = ~(np.isnan(U) | np.isnan(V))
+        Us, inverse = np.unique(U[valid], return_inverse=True)
+        if len(Us) < 2:
+            print("スプラインのフィッティングにはU座標の異なる2点以上が必要です.", file=sys.stderr)
+            raise ValueError
+        Vs = np.bincount(inverse, weights=V[valid]) / np.bincount(inverse)
+        self.spline = PchipInterpolator(Us, Vs, extrapolate=False)
+        self.derivative = self.spline.derivative()
+        self.U_range = (Us[0], Us[-1])
+        self.V_range = (Vs[0], Vs[-1])
+        self.dV_range = (float(self.derivative(Us[0])), float(self.derivative(Us[-1])))
+
+    def __call__(self, U):
+        U = np.asarray(U, dtype=float)
+        V = self.spline(np.clip(U, *self.U_range))
+        V = np.where(U < self.U_range[0], self.V_range[0] + self.dV_range[0] * (U - self.U_range[0]), V)
+        V = np.where(U > self.U_range[1], self.V_range[1] + self.dV_range[1] * (U - self.U_range[1]), V)
+        return V if V.ndim > 0 else float(V)
+
+class BlendedFit:
+    """2つの温度のバイノーダル線 V = f(U) を重みwで線形に補間した関数
+           f(U) = (1 - w) f_lo(U) + w f_hi(U)
+    """
+    def __init__(self, fit_lo, fit_hi, w: float):
+        self.fit_lo = fit_lo
+        self.fit_hi = fit_hi
+        self.w = float(w)
+
+    def __call__(self, U):
+        return (1. - self.w) * self.fit_lo(U) + self.w * self.fit_hi(U)
+
 class TernaryData:
     """ポリマー・良溶媒・貧溶媒、3成分系のデータを取り扱う
     """
@@ -188,6 +346,17 @@ class TernaryData:
         self.non_solvent = non_solvent
         self.temperature = temperature
 
+    def readResult(self, result, temperature: str = None):
+        """result_io.saveResultで保存した計算結果 (binodal, spinodal) を読み込む
+
+        Args:
+            result (ResultFile): result_io.loadResultで読み込んだ結果
+            temperature (str, optional): 温度. Defaults to None.
+        """
+        self.readData(np.asarray(result.column('ポリマー')),
+                      np.asarray(result.column('良溶媒')),
+                      np.asarray(result.column('貧溶媒')), temperature)
+
     # def fitData(self, deg: int = 1):
     #     """バイノーダル線を多項式関数でフィッティングする
 
@@ -199,18 +368,27 @@ class TernaryData:
     #     """
     #     self.fitFunc = np.poly1d(np.polyfit(x=self.polymer, y=self.solvent, deg=deg))
 
-    def fitData(self, deg: int = 1):
-        """バイノーダル線をUV線図上で多項式関数によりフィッティングする
+    def fitData(self, deg: int = 1, method: str = 'poly'):
+        """バイノーダル線をUV線図上で多項式関数または単調スプラインによりフィッティングする
 
         Args:
-            deg (int, optional): 多項式次元. Defaults to 1.
+            deg (int, optional): 多項式次元 (method = 'poly'のとき). Defaults to 1.
+            method (str, optional): FIT_METHODSのいずれか. 'poly'なら多項式, 'pchip'なら単調な区分3次エルミート補間.
+                                    Defaults to 'poly'.
 
         Note: 
-            現状では1次でしかうまくフィッティングできない
+            2次以上の多項式とスプラインでは, 交点を直線どうしの交点ではなく
+            曲線上の区間を挟み込む根の探索 (deviationDistanceArray) で求める
         """
+        if not method in FIT_METHODS:
+            print(f"対応しないフィッティング方法です. method = {method}", file=sys.stderr)
+            raise ValueError
         # ポリマー・溶媒の体積分率をUV座標系に変換
-        Us, Vs = PStoUV(self.polymer, self.solvent)
-        self.fitFunc = np.poly1d(np.polyfit(x=Us, y=Vs, deg=deg))
+        Us, Vs = PStoUV(np.asarray(self.polymer, dtype=float), np.asarray(self.solvent, dtype=float))
+        if method == 'pchip':
+            self.fitFunc = MonotoneSpline(Us, Vs)
+        else:
+            self.fitFunc = np.poly1d(np.polyfit(x=Us, y=Vs, deg=deg))
         self.__calcFitFuncSlopeAndInc()
 
     def exportFitFunc(self, file_path: str = "./binodalFitFunc.pkl"):
@@ -248,9 +426,20 @@ class TernaryData:
             sys.exit(1)
         self.__calcFitFuncSlopeAndInc()
 
+    def setFitFunc(self, fit_func):
+        """バイノーダル線のフィッティング関数 V = f(U) を直接設定する (BinodalFamily.ternaryDataAtなど)
+
+        Args:
+            fit_func (function): UV座標上のバイノーダル線 (np.poly1d, MonotoneSpline, BlendedFitなど)
+        """
+        self.fitFunc = fit_func
+        self.__calcFitFuncSlopeAndInc()
+
     def __calcFitFuncSlopeAndInc(self):
         """バイノーダル曲線をフィッティングした直線の傾きと切片を格納する
+           (曲線の場合はU = 0, 1を結ぶ割線の傾きと切片. 直線かどうかをfit_linearに格納する)
         """
+        self.fit_linear = isinstance(self.fitFunc, np.poly1d) and self.fitFunc.order <= 1
         # 傾き・切片を計算するためのとりあえずの2点を計算
         U1 = 0; U2 = 1 
         V1 = self.fitFunc(U1)
@@ -260,9 +449,17 @@ class TernaryData:
 
     def PSFitFunc(self, polymer):
         """ポリマー分率・溶媒分率座標空間におけるバイノーダル線を返す
+           曲線の場合はポリマー分率一定の線分とバイノーダル線の交点の溶媒分率 (交点が無ければNaN)
 
         Returns:
         """
+        if not self.fit_linear:
+            polymer = np.asarray(polymer, dtype=float)
+            p = np.atleast_1d(polymer).ravel()
+            # ポリマー分率一定の線分 (溶媒分率0から1-pまで)
+            t, crossed = self.__crossing(p, np.zeros(len(p)), p, 1. - p, segment=True)
+            solvent = np.where(crossed, t * (1. - p), np.nan).reshape(polymer.shape)
+            return solvent if solvent.ndim > 0 else float(solvent)
         slope_ps, inc_ps = UVlineToPSLine(self.fit_slope, self.fit_inc)
         return slope_ps * polymer + inc_ps
 
@@ -379,29 +576,322 @@ class TernaryData:
             n_s2 (float): 吸湿後貧溶媒重量分率
 
         Returns:
-            float: 吸湿前原液組成と吸湿後原液組成を結ぶ線分と
+            float: 吸湿前原液組成と吸湿後原液組成を結ぶ直線と
                    バイノーダル線の交点から、吸湿後組成までの距離
-                   線分と直線が交点を持たない場合は負の値を返す
+                   吸湿後組成が相分離する場合は正, しない場合は負の値を返す.
+                   直線とバイノーダル線が交点を持たない場合 (平行な直線, 三角形の内側で交わらない曲線) はValueError
         """
-        # 吸湿前後の原液組成をUV座標系に変換
-        U1, V1 = PStoUV(p1, s1) # 吸湿前組成
-        U2, V2 = PStoUV(p2, s2) # 吸湿後組成
-        # 吸湿前原液組成と吸湿後原液組成を結ぶ直線の傾き
-        dope_slope = slope(U1, V1, U2, V2)
-        # 吸湿前原液組成と吸湿後原液組成を結ぶ直線の切片
-        dope_inc   = interception(U1, V1, U2, V2)
-        # 交点の組成、ポリマーと溶媒の重量分率
-        Uc, Vc     = crossPoint(self.fit_slope, self.fit_inc, dope_slope, dope_inc)
-        d = distance(U2, V2, Uc, Vc)
-        if d > 1.:
+        # 直線でも曲線でも配列版で交点を求める (平行な直線は配列版と同じ許容誤差で判定する)
+        d = self.deviationDistanceArray(p1, s1, n_s1, p2, s2, n_s2)
+        if np.ma.is_masked(d):
+            print(f"吸湿前後の組成を結ぶ直線とバイノーダル線の交点がありません. "
+                  f"p1 = {p1}, s1 = {s1}, p2 = {p2}, s2 = {s2}", file=sys.stderr)
+            raise ValueError
+        d = float(d[()])
+        if abs(d) > 1.:
             print("乖離度が1を超えました.")
-            print(f"U1 = {U1}, V1 = {V1}")
-            print(f"Uc = {Uc}, Vc = {Vc}")
-            print(f"U2 = {U2}, V2 = {V2}")
+            print(f"p1 = {p1}, s1 = {s1}")
+            print(f"p2 = {p2}, s2 = {s2}")
             print(f"distance = {d}")
-            print(f"fit_slope  = {self.fit_slope}, fit_inc = {self.fit_inc}")
-            print(f"dope_slope = {dope_slope}, dope_inc = {dope_inc}")
-        if self.isSeparate(p2, s2, n_s2):
-            return d
-        else:
-            return - d
\ No newline at end of file
+        return d
+
+    def isSeparateArray(self, p, s, n_s=None) -> np.ma.MaskedArray:
+        """多数の組成の液が相分離するかどうかを一括で判定する (isSeparateの配列版)
+
+        Args:
+            p (array): ポリマー分率
+            s (array): 溶媒分率
+            n_s (array, optional): 貧溶媒分率. isSeparateと同じく判定には使わない. Defaults to None.
+
+        Returns:
+            np.ma.MaskedArray: バイノーダル線の内側であればTrue, 外側であればFalse.
+                               NaNや負の分率を含む組成はマスクする
+        """
+        if self.fitFunc is None:
+            print("フィッティング関数が設定されていません.", file=sys.stderr)
+            raise ValueError
+        U, V, invalid = PStoUVArray(p, s)
+        with np.errstate(invalid='ignore'):
+            separate = V < self.fitFunc(U)
+        return np.ma.masked_array(separate, mask=invalid)
+
+    def deviationDistanceArray(self, p1, s1, n_s1, p2, s2, n_s2, segment: bool = False) -> np.ma.MaskedArray:
+        """多数の(吸湿前, 吸湿後)の組成の組について, UV平面上で吸湿前後の組成を結ぶ直線と
+           バイノーダル線の交点から, 吸湿後組成までの距離を一括で求める (deviationDistanceの配列版)
+           直線を2点の傾きと切片ではなく媒介変数で表すので, 縦の直線も扱える.
+           バイノーダル線が曲線 (2次以上の多項式, スプライン) の場合は, 組成が三角形の内側にある範囲で
+           直線上の標本点から符号の変わる区間を探し, 全ての組を同時に挟み込み法で解く.
+           交点が複数あれば吸湿後組成に最も近いものを使う.
+           交点が無い組 (平行な直線など) は, 表示や例外の代わりにマスクする
+
+        Args:
+            p1 (array): 初期ポリマー重量分率
+            s1 (array): 初期溶媒重量分率
+            n_s1 (array): 初期貧溶媒重量分率
+            p2 (array): 吸湿後ポリマー重量分率
+            s2 (array): 吸湿後溶媒重量分率
+            n_s2 (array): 吸湿後貧溶媒重量分率
+            segment (bool, optional): Trueなら交点が吸湿前後の組成を結ぶ線分上に無い組もマスクする. Defaults to False.
+
+        Returns:
+            np.ma.MaskedArray: 交点から吸湿後組成までの距離. 吸湿後組成が相分離する場合は正, しない場合は負.
+                               交点が無い組 (吸湿前後の組成が同じ組を含む), 無効な組成の組はマスクする
+        """
+        if self.fitFunc is None:
+            print("フィッティング関数が設定されていません.", file=sys.stderr)
+            raise ValueError
+        p1, s1, p2, s2 = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (p1, s1, p2, s2)])
+        shape = p1.shape
+        p1, s1, p2, s2 = p1.ravel(), s1.ravel(), p2.ravel(), s2.ravel()
+        t, crossed = self.__crossing(p1, s1, p2, s2, segment)
+        U1, V1, _ = PStoUVArray(p1, s1)
+        U2, V2, _ = PStoUVArray(p2, s2)
+        with np.errstate(invalid='ignore'):
+            d = np.abs(1. - t) * np.hypot(U2 - U1, V2 - V1)
+            separate = V2 < self.fitFunc(U2)
+        return np.ma.masked_array(np.where(separate, d, -d).reshape(shape), mask=(~crossed).reshape(shape))
+
+    def __crossing(self, p1: np.ndarray, s1: np.ndarray, p2: np.ndarray, s2: np.ndarray,
+                   segment: bool) -> tuple[np.ndarray, np.ndarray]:
+        """組成1 + t (組成2 - 組成1) がバイノーダル線上にあるtを求める
+
+        Args:
+            p1, s1, p2, s2 (np.ndarray): (N,)配列 組成1, 組成2のポリマー分率と溶媒分率
+            segment (bool): Trueなら0 <= t <= 1の範囲だけで探す
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: t (N,)配列, 交点が見つかればTrue (N,)配列
+        """
+        U1, V1, invalid1 = PStoUVArray(p1, s1)
+        U2, V2, invalid2 = PStoUVArray(p2, s2)
+        dU, dV = U2 - U1, V2 - V1
+        length = np.hypot(dU, dV)
+        if self.fit_linear:
+            # 吸湿前組成 + t (吸湿後組成 - 吸湿前組成) がバイノーダル線 V = aU + b 上にある条件
+            a, b = self.fit_slope, self.fit_inc
+            denominator = dV - a * dU
+            with np.errstate(divide='ignore', invalid='ignore'):
+                parallel = ~(np.abs(denominator) > 1e-09 * np.maximum(length, 1e-300) * np.hypot(1., a))
+                t = (a * U1 + b - V1) / denominator
+                crossed = ~(invalid1 | invalid2 | parallel | np.isnan(t))
+                if segment:
+                    crossed &= (t >= 0.) & (t <= 1.)
+            return t, crossed
+
+        lo, hi, valid = _simplexRange(p1, s1, p2, s2, segment)
+
+        def gap(t, i):
+            # 直線上の点とバイノーダル線のV座標の差 (負ならバイノーダル線の下側)
+            return _column(V1[i], t) + t*_column(dV[i], t) - self.fitFunc(_column(U1[i], t) + t*_column(dU[i], t))
+
+        return _bracketRoots(gap, lo, hi, np.nonzero(valid)[0])
+
+
+class BinodalFamily:
+    """温度ごとのバイノーダル線のフィッティング関数をまとめて保持し,
+       隣り合う温度のフィッティング関数を線形に補間して任意の温度 (範囲内) のバイノーダル線とするクラス
+       組成ごとに異なる温度での相分離の判定と乖離度の計算を一括で行う
+    """
+    def __init__(self):
+        self.temperatures = np.empty(0) # 昇順の温度
+        self.fits = []                  # 温度ごとのフィッティング関数 V = f(U)
+
+    def __len__(self) -> int:
+        return len(self.fits)
+
+    def add(self, temperature: float, ternary_data: TernaryData):
+        """フィッティング済みのTernaryDataを温度と共に追加する (同じ温度は置き換える)
+
+        Args:
+            temperature (float): 温度
+            ternary_data (TernaryData): fitDataまたはloadFitFuncでフィッティング関数を設定したTernaryData
+        """
+        if ternary_data.fitFunc is None:
+            print("フィッティング関数が設定されていません.", file=sys.stderr)
+            raise ValueError
+        temperature = float(temperature)
+        fits = dict(zip(self.temperatures.tolist(), self.fits))
+        fits[temperature] = ternary_data.fitFunc
+        self.temperatures = np.array(sorted(fits), dtype=float)
+        self.fits = [fits[T] for T in self.temperatures.tolist()]
+
+    def fitData(self, polymer, solvent, non_solvent, temperature, deg: int = 1, method: str = 'poly'):
+        """実験データを温度ごとに分けてバイノーダル線をフィッティングする (TernaryData.fitData)
+
+        Args:
+            polymer (array): ポリマー分率
+            solvent (array): 溶媒分率
+            non_solvent (array): 貧溶媒分率
+            temperature (array): 各データ点の温度
+            deg (int, optional): 多項式次元. Defaults to 1.
+            method (str, optional): FIT_METHODSのいずれか. Defaults to 'poly'.
+        """
+        polymer, solvent, non_solvent, temperature = \
+            [np.asarray(x, dtype=float) for x in (polymer, solvent, non_solvent, temperature)]
+        for T in np.unique(temperature):
+            mask = temperature == T
+            ternary_data = TernaryData(polymer[mask], solvent[mask], non_solvent[mask], str(T))
+            ternary_data.fitData(deg, method)
+            self.add(T, ternary_data)
+
+    def loadFitFuncs(self, file_paths: dict):
+        """温度ごとにエクスポートしたフィッティング関数 (TernaryData.exportFitFunc) を読み込む
+
+        Args:
+            file_paths (dict): 温度をキー, pklファイルのパスを値とする辞書
+        """
+        for T, file_path in file_paths.items():
+            ternary_data = TernaryData()
+            ternary_data.loadFitFunc(file_path)
+            self.add(T, ternary_data)
+
+    def exportFamily(self, file_path: str = "./binodalFamily.pkl"):
+        """全ての温度のフィッティング関数を1つのpklファイルに出力する
+
+        Args:
+            file_path (str, optional): 出力するファイルパス. Defaults to "./binodalFamily.pkl".
+        """
+        if not file_path.split(".")[-1] in ["pkl", "pickle"]:
+            print("対応しないファイルです. ", file = sys.stderr)
+            raise ValueError
+        with open(file_path, 'wb') as f:
+            pickle.dump({"temperatures": self.temperatures.tolist(), "fits": self.fits}, f)
+
+    def loadFamily(self, file_path: str = "./binodalFamily.pkl"):
+        """exportFamilyで出力したフィッティング関数を読み込む
+
+        Args:
+            file_path (str, optional): pklファイルのパス. Defaults to "./binodalFamily.pkl".
+        """
+        if not file_path.split(".")[-1] in ["pkl", "pickle"]:
+            print("対応しないファイルです. ", file = sys.stderr)
+            raise ValueError
+        with open(file_path, 'rb') as f:
+            family = pickle.load(f)
+        self.temperatures = np.array(family["temperatures"], dtype=float)
+        self.fits = list(family["fits"])
+
+    def __bracket(self, temperature) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """温度を挟む2つのフィッティング関数の番号と補間の重み
+
+        Returns:
+            tuple: 下側の番号 (N,)配列, 上側の番号 (N,)配列, 上側の重み (N,)配列, 温度が範囲内ならTrue (N,)配列
+        """
+        if len(self) == 0:
+            print("フィッティング関数がありません.", file=sys.stderr)
+            raise ValueError
+        T = np.asarray(temperature, dtype=float).ravel()
+        with np.errstate(invalid='ignore'):
+            valid = (T >= self.temperatures[0]) & (T <= self.temperatures[-1])
+        if len(self) == 1:
+            zeros = np.zeros(len(T), dtype=int)
+            return zeros, zeros, np.zeros(len(T)), valid
+        lo = np.clip(np.searchsorted(self.temperatures, T, side='right') - 1, 0, len(self) - 2)
+        w = (T - self.temperatures[lo]) / (self.temperatures[lo + 1] - self.temperatures[lo])
+        return lo, lo + 1, np.where(valid, w, 0.), valid
+
+    def __curve(self, U: np.ndarray, lo: np.ndarray, hi: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """組ごとの温度のバイノーダル線のV座標 (同じフィッティング関数を使う組をまとめて計算する)
+
+        Args:
+            U (np.ndarray): (M,)または(M,K)配列 U座標
+            lo, hi, w (np.ndarray): (M,)配列 __bracketの結果
+        """
+        V = np.zeros(np.shape(U))
+        for k in np.unique(np.concatenate((lo, hi))):
+            for rows, weight in ((lo == k, 1. - w), ((hi == k) & (w > 0.), w)):
+                if np.any(rows):
+                    V[rows] += _column(weight[rows], U[rows]) * self.fits[k](U[rows])
+        return V
+
+    def fitFuncAt(self, temperature: float):
+        """ある温度のバイノーダル線 V = f(U)
+
+        Args:
+            temperature (float): 温度 (範囲内)
+
+        Returns:
+            function: 多項式どうしの補間ならnp.poly1d, それ以外はBlendedFit
+        """
+        lo, hi, w, valid = self.__bracket(temperature)
+        if not valid[0]:
+            print(f"温度が範囲外です. temperature = {temperature}, 範囲: {self.temperatures[0]} - {self.temperatures[-1]}",
+                  file=sys.stderr)
+            raise ValueError
+        fit_lo, fit_hi, w = self.fits[lo[0]], self.fits[hi[0]], w[0]
+        if isinstance(fit_lo, np.poly1d) and isinstance(fit_hi, np.poly1d):
+            return fit_lo * (1. - w) + fit_hi * w
+        return BlendedFit(fit_lo, fit_hi, w)
+
+    def ternaryDataAt(self, temperature: float) -> TernaryData:
+        """ある温度のバイノーダル線を設定したTernaryData (スカラーの判定用)
+
+        Args:
+            temperature (float): 温度 (範囲内)
+
+        Returns:
+            TernaryData: フィッティング関数を設定したTernaryData
+        """
+        ternary_data = TernaryData(temperature=str(temperature))
+        ternary_data.setFitFunc(self.fitFuncAt(temperature))
+        return ternary_data
+
+    def isSeparateArray(self, p, s, temperature) -> np.ma.MaskedArray:
+        """組成ごとの温度で相分離するかどうかを一括で判定する
+
+        Args:
+            p (array): ポリマー分率
+            s (array): 溶媒分率
+            temperature (array): 各組成の温度
+
+        Returns:
+            np.ma.MaskedArray: バイノーダル線の内側であればTrue. 無効な組成と範囲外の温度はマスクする
+        """
+        p, s, temperature = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (p, s, temperature)])
+        shape = p.shape
+        U, V, invalid = PStoUVArray(p.ravel(), s.ravel())
+        lo, hi, w, valid = self.__bracket(temperature)
+        with np.errstate(invalid='ignore'):
+            separate = V < self.__curve(U, lo, hi, w)
+        return np.ma.masked_array(separate.reshape(shape), mask=(invalid | ~valid).reshape(shape))
+
+    def deviationDistanceArray(self, p1, s1, n_s1, p2, s2, n_s2, temperature,
+                               segment: bool = False) -> np.ma.MaskedArray:
+        """組成の組ごとの温度で, UV平面上で吸湿前後の組成を結ぶ直線とバイノーダル線の交点から,
+           吸湿後組成までの距離を一括で求める (TernaryData.deviationDistanceArrayの温度補間版)
+           交点は組成が三角形の内側にある範囲で探す
+
+        Args:
+            p1 (array): 初期ポリマー重量分率
+            s1 (array): 初期溶媒重量分率
+            n_s1 (array): 初期貧溶媒重量分率
+            p2 (array): 吸湿後ポリマー重量分率
+            s2 (array): 吸湿後溶媒重量分率
+            n_s2 (array): 吸湿後貧溶媒重量分率
+            temperature (array): 各組の温度
+            segment (bool, optional): Trueなら交点が吸湿前後の組成を結ぶ線分上に無い組もマスクする. Defaults to False.
+
+        Returns:
+            np.ma.MaskedArray: 交点から吸湿後組成までの距離. 吸湿後組成が相分離する場合は正, しない場合は負.
+                               交点が無い組, 無効な組成の組, 範囲外の温度の組はマスクする
+        """
+        p1, s1, p2, s2, temperature = np.broadcast_arrays(
+            *[np.asarray(x, dtype=float) for x in (p1, s1, p2, s2, temperature)])
+        shape = p1.shape
+        p1, s1, p2, s2 = p1.ravel(), s1.ravel(), p2.ravel(), s2.ravel()
+        U1, V1, _ = PStoUVArray(p1, s1)
+        U2, V2, _ = PStoUVArray(p2, s2)
+        dU, dV = U2 - U1, V2 - V1
+        lo_T, hi_T, w, valid_T = self.__bracket(temperature)
+        lo, hi, valid = _simplexRange(p1, s1, p2, s2, segment)
+
+        def gap(t, i):
+            # 直線上の点と, その組の温度のバイノーダル線のV座標の差
+            U = _column(U1[i], t) + t*_column(dU[i], t)
+            return _column(V1[i], t) + t*_column(dV[i], t) - self.__curve(U, lo_T[i], hi_T[i], w[i])
+
+        t, crossed = _bracketRoots(gap, lo, hi, np.nonzero(valid & valid_T)[0])
+        with np.errstate(invalid='ignore'):
+            d = np.abs(1. - t) * np.hypot(dU, dV)
+            separate = V2 < self.__curve(U2, lo_T, hi_T, w)
+        return np.ma.masked_array(np.where(separate, d, -d).reshape(shape), mask=(~crossed).reshape(shape))
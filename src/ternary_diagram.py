@@ -110,6 +110,76 @@ class Ternary:
         )
         self.fig.add_trace(trace)
 
+    def polylines(self, lines: list, name: str = "", color: str = "red", opacity: float = 1.):
+        """複数の折れ線 (適応メッシュから取り出した境界など) を1つの凡例でプロットする
+
+        Args:
+            lines (list): 折れ線のリスト. 各折れ線は(K,3)配列 (貧溶媒, 良溶媒, ポリマーの重量分率)
+            name (str, optional): 凡例の名前. Noneなら凡例に表示しない. Defaults to "".
+            color (str, optional): 線の色. Defaults to "red".
+            opacity (float, optional): 線の不透明度. Defaults to 1..
+        """
+        # 折れ線の間をNoneで区切ると1つのトレースで別々の線として描かれる
+        polymer, solvent, non_solvent = [], [], []
+        for line in lines:
+            line = np.asarray(line, dtype=float)
+            non_solvent += line[:, 0].tolist() + [None]
+            solvent += line[:, 1].tolist() + [None]
+            polymer += line[:, 2].tolist() + [None]
+        self.lines(polymer, solvent, non_solvent, name, color, opacity)
+
+    def stabilityRegions(self, polymer, solvent, non_solvent, values,
+                         names: tuple = ("Stable", "Unstable"),
+                         colors: tuple = ("#B6E880", "#FF97FF"), size: int = 3, opacity: float = 0.5):
+        """値の符号で点を安定領域 (正) と不安定領域 (0以下) に分けて色分けしてプロットする
+           (TernarySpinodal.stabilityMapの結果の表示用)
+
+        Args:
+            polymer (array): ポリマーの重量分率
+            solvent (array): 良溶媒の重量分率
+            non_solvent (array): 貧溶媒の重量分率
+            values (array): 各点の値 (正なら安定)
+            names (tuple, optional): 安定領域, 不安定領域の凡例の名前. Defaults to ("Stable", "Unstable").
+            colors (tuple, optional): 安定領域, 不安定領域の色. Defaults to ("#B6E880", "#FF97FF").
+            size (int, optional): 点の大きさ. Defaults to 3.
+            opacity (float, optional): 点の不透明度. Defaults to 0.5.
+        """
+        polymer, solvent, non_solvent = np.asarray(polymer), np.asarray(solvent), np.asarray(non_solvent)
+        stable = np.asarray(values) > 0.
+        for mask, name, color in zip((stable, ~stable), names, colors):
+            trace = go.Scatterternary(
+                a = polymer[mask],
+                b = solvent[mask],
+                c = non_solvent[mask],
+                mode = "markers",
+                marker = {"size": size,
+                          "color": color},
+                opacity=opacity,
+                showlegend=True,
+                name=name,
+            )
+            self.fig.add_trace(trace)
+
+    def plotResult(self, result, name: str = "", color: str = None, style: str = "lines"):
+        """result_io.saveResultで保存した計算結果をプロットする
+
+        Args:
+            result (ResultFile): result_io.loadResultで読み込んだ結果 (binodal, spinodal, tie_line)
+            name (str, optional): 凡例の名前. Defaults to "".
+            color (str, optional): 色. Noneなら結果の種類ごとの既定の色. Defaults to None.
+            style (str, optional): "scatter", "lines", "lines+markers". Defaults to "lines".
+        """
+        if result.kind == 'tie_line':
+            tie = np.asarray(result.array())
+            self.tieLine(tie[:, 2], tie[:, 1], tie[:, 0], tie[:, 5], tie[:, 4], tie[:, 3],
+                         "blue" if color is None else color)
+            return
+        arr = np.asarray(result.array())
+        if result.kind == 'spinodal':
+            self.spinodalLine(arr[:, 2], arr[:, 1], arr[:, 0], name, "#54A24B" if color is None else color, style)
+        else:
+            self.binodalLine(arr[:, 2], arr[:, 1], arr[:, 0], name, "red" if color is None else color, style)
+
     def __makeAxis(self, title, tickangle):
         return {
           'title': title,
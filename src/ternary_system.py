@@ -1,18 +1,136 @@
+import os
 import sys
 import pickle
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from scipy.optimize import minimize
+from scipy.optimize import minimize, least_squares, root
+from scipy.spatial import ConvexHull
 from ternary_diagram import Ternary, default_colors, default_markers
 from component import Component
 from phase import Phase
+from chi_model import YipMcHughChi
+from composition import Composition
+from simplex_mesh import simplexLattice, simplexTriangles, marchingTriangles, AdaptiveSimplexMesh
+from result_cache import ResultCache
+from result_io import WS_COLUMNS, TIE_COLUMNS, saveResult, loadResult
+from solver_log import SolverLog, printProgress
+from tie_line_index import TieLineIndex
+
+# 勾配を用いないscipy.optimize.minimizeのメソッド
+DERIVATIVE_FREE_METHODS = ('Nelder-Mead', 'Powell', 'COBYLA')
+# ヘッセ行列を用いるscipy.optimize.minimizeのメソッド
+HESSIAN_METHODS = ('Newton-CG', 'dogleg', 'trust-ncg', 'trust-krylov', 'trust-exact', 'trust-constr')
+# 探索変数の種類 ('linear': 体積分率, 'log': 体積分率の対数比)
+VARIABLES = ('linear', 'log')
+
+def _spinodalChunk(phase: Phase, phase_phi3: np.ndarray, method: str, solver: str,
+                   variables: str = 'linear') -> tuple[np.ndarray, SolverLog]:
+    """ワーカープロセスでスピノーダル組成を計算する
+
+    Args:
+        phase (Phase): 計算する系のPhase
+        phase_phi3 (np.ndarray): 担当するポリマー体積分率
+        method (str): scipy.optimize.minimizeのメソッド
+        solver (str): TernarySpinodal.spinodalのソルバー
+        variables (str, optional): TernarySpinodal.spinodalの探索変数. Defaults to 'linear'.
+
+    Returns:
+        tuple[np.ndarray, SolverLog]: (n,3)配列 スピノーダル組成の重量分率, 計算の記録
+    """
+    return TernarySpinodal(phase).spinodal(phase_phi3, method, solver, variables=variables,
+                                           progress=None, return_log=True)
+
+def _binodalChunk(phase: Phase, phaseL_phi3: np.ndarray, method: str, solver: str, variables: str = 'linear',
+                  x0s: list = None) -> tuple[np.ndarray, SolverLog]:
+    """ワーカープロセスでタイラインを計算する
+
+    Args:
+        phase (Phase): 計算する系のPhase
+        phaseL_phi3 (np.ndarray): 担当するポリマーリーン相のポリマー体積分率
+        method (str): scipy.optimize.minimizeのメソッド
+        solver (str): TernaryBinodal.binodalのソルバー
+        variables (str, optional): TernaryBinodal.binodalの探索変数. Defaults to 'linear'.
+        x0s (list, optional): チャンクの先頭に応じた初期値 (_runChunksがチャンクごとに1つ選んで渡す)
+
+    Returns:
+        tuple[np.ndarray, SolverLog]: (2n,3)配列の重量分率, 計算の記録
+    """
+    return TernaryBinodal(phase).binodal(phaseL_phi3, method, solver, x0=x0s, variables=variables,
+                                         progress=None, return_log=True)
+
+def _startCSV(path: str, columns: list):
+    """CSVファイルを列名の行だけにする (既存のファイルは上書きする)
+
+    Args:
+        path (str): CSVファイルのパス
+        columns (list): 列名
+    """
+    # Excelで列名が文字化けしないようBOM付きにする
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(','.join(columns) + '\n')
+
+def _appendCSV(path: str, row: np.ndarray):
+    """_startCSVで作ったCSVファイルに1行追記する
+       1行ごとにファイルを閉じるので, 計算の途中でも書き込んだ行を読み込める
+
+    Args:
+        path (str): CSVファイルのパス
+        row (np.ndarray): 追記する値
+    """
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        f.write(','.join(f"{float(v):.17g}" for v in row) + '\n')
+
+def _chunkStarts(n: int, n_jobs: int) -> np.ndarray:
+    """長さnの配列をn_jobs個の連続したチャンクに分割したときの各チャンクの先頭の添字
+
+    Args:
+        n (int): 配列の長さ
+        n_jobs (int): ワーカープロセス数. Noneまたは-1ならCPUコア数
+
+    Returns:
+        np.ndarray: 各チャンクの先頭の添字 (空のチャンクは含まない)
+    """
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count()
+    lengths = [len(chunk) for chunk in np.array_split(np.arange(n), max(1, min(n, n_jobs)))]
+    return np.cumsum([0] + lengths[:-1])
+
+def _runChunks(func, phase: Phase, arr: np.ndarray, n_jobs: int, *args, chunk_args: list = None) -> list:
+    """配列を連続したチャンクに分割し, プロセスプールで並列に計算する
+       結果はチャンクの順番に並べて返す
+
+    Args:
+        func (function): モジュールレベルのワーカー関数 func(phase, chunk, *args[, chunk_arg])
+        phase (Phase): 計算する系のPhase (各ワーカーにコピーが渡される)
+        arr (np.ndarray): 分割する配列
+        n_jobs (int): ワーカープロセス数. Noneまたは-1ならCPUコア数
+        chunk_args (list, optional): チャンクごとに最後の引数として渡す値. Defaults to None.
+
+    Returns:
+        list: チャンクごとの計算結果
+    """
+    arr = np.asarray(arr)
+    starts = _chunkStarts(len(arr), n_jobs)
+    chunks = np.split(arr, starts[1:])
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        if chunk_args is None:
+            futures = [executor.submit(func, phase.copy(), chunk, *args) for chunk in chunks]
+        else:
+            futures = [executor.submit(func, phase.copy(), chunk, *args, chunk_arg)
+                       for chunk, chunk_arg in zip(chunks, chunk_args)]
+        return [future.result() for future in futures]
 
 class TernarySpinodal:
     """1. 貧溶媒, 2. 良溶媒, 3. ポリマーの3成分系
        をFlory-Hugginsモデルを用いて扱うクラス
     """
-    def __init__(self, phase: Phase):
+    def __init__(self, phase: Phase, cache: ResultCache = None):
         self.phase = phase.copy() 
+        self.cache = cache # 計算結果のキャッシュ (Noneなら使わない)
+        self.log = SolverLog() # 直前の計算の記録
+        self.nfev = 0 # コスト関数の評価回数の累計
+        self.njev = 0 # コスト関数の微分の評価回数の累計
         self.bnds = ( # scipy.optimize.minimizeする際の探索範囲
         (0.00000000001, 0.9999999999), # 良溶媒体積分率
         )
@@ -20,6 +138,7 @@ class TernarySpinodal:
     def costFunc(self):
         """コスト関数を計算する
         """
+        self.nfev += 1
         return abs(self.phase.G22()*self.phase.G33() - np.power(self.phase.G23(),2))
 
     def __costFuncWrapper(self,
@@ -37,16 +156,257 @@ class TernarySpinodal:
         self.phase.comp2.phi = phi[0]
         return self.costFunc()
 
-    def spinodal(self, phase_phi3):
+    def costJac(self, phi2: float, phi3: float) -> np.ndarray:
+        """コスト関数の良溶媒体積分率に関する解析的な微分を計算する
+
+        Args:
+            phi2 (float): 良溶媒体積分率
+            phi3 (float): ポリマー体積分率
+
+        Returns:
+            np.ndarray: d(costFunc)/dφ2 (要素数1の配列)
+        """
+        self.njev += 1
+        phis = np.array([1. - phi2 - phi3, phi2, phi3])
+        G22, G23, G33 = self.phase.Gs(phis)
+        dG22, dG23, dG33 = self.phase.GGrads(phis)[:, 0]
+        det = G22*G33 - G23**2
+        ddet = dG22*G33 + G22*dG33 - 2*G23*dG23
+        return np.array([np.sign(det) * ddet])
+
+    def __costJacWrapper(self,
+            phi: np.ndarray):
+        """costJacのラッパーファンクション
+
+        Args:
+            phi (np.ndarray): 良溶媒の体積分率
+
+        Returns:
+            np.ndarray: costFuncの微分
+        """
+        return self.costJac(phi[0], self.phase.comp3.phi)
+
+    def __logPhis(self, y: float, phi3: float) -> np.ndarray:
+        """対数比 y = log(φ2/φ1) とポリマー体積分率から体積分率の対数を計算する
+           (φ1 + φ2 = 1 - φ3 を保つので探索範囲の制約が要らない)
+
+        Returns:
+            np.ndarray: (log φ1, log φ2, log φ3)
+        """
+        log_c = np.log1p(-phi3)
+        softplus = np.logaddexp(0., y)
+        return np.array([log_c - softplus, log_c + y - softplus, np.log(phi3)])
+
+    def __costFuncLogWrapper(self,
+            y: np.ndarray):
+        """対数比 y = log(φ2/φ1) についてのコスト関数 |φ1 φ2 (G22*G33 - G23^2)|
+           1/φ1^2の項を打ち消した形で計算するので, 端の組成でも発散しない (零点はcostFuncと同じ)
+
+        Args:
+            y (np.ndarray): 良溶媒と貧溶媒の体積分率の対数比
+
+        Returns:
+            float: コスト関数
+        """
+        self.nfev += 1
+        phis = np.exp(self.__logPhis(y[0], self.phase.comp3.phi))
+        phi1, phi2, phi3 = phis
+        p, q, X33 = self.phase.excessGs(phis)
+        s, r = self.phase.s, self.phase.r
+        t = r/phi3 + X33
+        return abs(phi2*(t + p - 2*q) + s*(1. + phi1*t) + phi1*phi2*(p*t - q**2))
+
+    def __costJacLogWrapper(self,
+            y: np.ndarray):
+        """__costFuncLogWrapperの解析的な微分
+           dφ2/dy = -dφ1/dy = φ1 φ2 / (1 - φ3) を用いる
+
+        Args:
+            y (np.ndarray): 良溶媒と貧溶媒の体積分率の対数比
+
+        Returns:
+            np.ndarray: __costFuncLogWrapperの微分
+        """
+        self.njev += 1
+        phi3 = self.phase.comp3.phi
+        phis = np.exp(self.__logPhis(y[0], phi3))
+        phi1, phi2, _ = phis
+        G22, G23, G33 = self.phase.Gs(phis)
+        dG22, dG23, dG33 = self.phase.GGrads(phis)[:, 0]
+        det = G22*G33 - G23**2
+        ddet = dG22*G33 + G22*dG33 - 2*G23*dG23
+        dphi2 = phi1*phi2 / (1. - phi3)
+        return np.array([np.sign(det) * dphi2 * ((phi1 - phi2)*det + phi1*phi2*ddet)])
+
+    def isConstantChi(self) -> bool:
+        """χパラメータが全て定数かどうか
+
+        Returns:
+            bool: χ12, χ23, χ13が全て定数(ConstantChi)ならTrue
+        """
+        return self.phase.isConstantChi()
+
+    def spinodalAnalytic(self, phase_phi3) -> np.ndarray:
+        """χパラメータが定数の場合に, スピノーダル組成を解析的に一括計算する
+           φ3を固定するとD*φ1*φ2 = 0はφ2の2次方程式
+               -K φ2^2 + (t + p - 2q - s t + K m) φ2 + s (1 + t m) = 0
+               p = -2χ12, q = -(χ12 + χ13) + sχ23, t = r/φ3 - 2χ13, K = p t - q^2, m = 1 - φ3
+           となるので, (0, 1-φ3)にある根を選ぶ. 根が2つある場合は良溶媒体積分率の大きい方を選ぶ
+
+        Args:
+            phase_phi3 (np.ndarray): ポリマー体積分率
+
+        Returns:
+            np.ndarray: (N,3)配列 スピノーダル組成の体積分率 (貧溶媒, 良溶媒, ポリマー)
+                        そのφ3でスピノーダルが存在しない点はNaN
+        """
+        phi3 = np.asarray(phase_phi3, dtype=float)
+        s, r = self.phase.s, self.phase.r
+        chi12, chi23, chi13 = self.phase.chi12.value, self.phase.chi23.value, self.phase.chi13.value
+        m = 1. - phi3
+        p = -2*chi12
+        q = -(chi12 + chi13) + s*chi23
+        t = r/phi3 - 2*chi13
+        K = p*t - q**2
+        A = -K
+        B = t + p - 2*q - s*t + K*m
+        C = s*(1. + t*m)
+        with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+            # 桁落ちを避ける形の解の公式 (A = 0の場合も1次方程式の根が得られる)
+            disc = B**2 - 4*A*C
+            sq = np.sqrt(np.where(disc >= 0., disc, np.nan))
+            w = -0.5*(B + np.where(B >= 0., sq, -sq))
+            roots = np.stack((w/A, C/w), axis=-1)
+        roots[~((roots > 0.) & (roots < m[..., None]))] = np.nan
+        phi2 = np.full(phi3.shape, np.nan)
+        found = np.any(~np.isnan(roots), axis=-1)
+        phi2[found] = np.nanmax(roots[found], axis=-1)
+        return np.stack((1. - phi2 - phi3, phi2, phi3), axis=-1)
+
+    def stabilityMap(self, n: int = 400) -> tuple[np.ndarray, np.ndarray]:
+        """組成単体上の格子点全体で, 安定性行列の行列式を一括で計算する
+           χパラメータが濃度に依存して解析解が無い場合にも使える
+
+        Args:
+            n (int, optional): 格子の分割数. 格子点は(n+1)(n+2)/2個. Defaults to 400.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 格子点の重量分率 (M,3)配列,
+                                           φ1 φ2 φ3 (G22*G33 - G23^2) (M,)配列 (正なら安定, 負なら不安定)
+        """
+        phis = simplexLattice(n)
+        dets = self.phase.stabilityDets(phis)
+        self.nfev += len(phis)
+        return self.__phisToWs(phis), dets
+
+    def spinodalContour(self, n: int = 400) -> list:
+        """格子点全体の安定性行列の行列式の零点をmarching trianglesで等値線にし, スピノーダル曲線とする
+           点ごとの最小化と異なり, 曲線全体 (臨界点を挟む両側) を一度に求める
+
+        Args:
+            n (int, optional): 格子の分割数. 曲線の解像度は格子の間隔1/n程度. Defaults to 400.
+
+        Returns:
+            list: スピノーダル曲線の折れ線 (重量分率の(K,3)配列) のリスト. 点の多い順に並べる
+        """
+        phis = simplexLattice(n)
+        dets = self.phase.stabilityDets(phis)
+        self.nfev += len(phis)
+        lines = marchingTriangles(phis, dets, simplexTriangles(n))
+        return [self.__phisToWs(line) for line in lines]
+
+    def spinodal(self, phase_phi3, method: str = 'SLSQP', solver: str = 'analytic', n_jobs: int = 1,
+                 variables: str = 'linear', progress=printProgress, return_log: bool = False):
+        """ポリマー体積分率ごとにスピノーダル組成を計算する
+
+        Args:
+            phase_phi3 (np.ndarray): ポリマー体積分率
+            method (str, optional): scipy.optimize.minimizeのメソッド. 
+                                    勾配を使うメソッドには解析的な微分をjacとして渡す. Defaults to 'SLSQP'.
+            solver (str, optional): 'analytic'ならχパラメータが定数の場合にspinodalAnalyticで一括計算する
+                                    (定数でない場合は'minimize'と同じ). 'minimize'ならコスト関数を
+                                    点ごとに最小化する. Defaults to 'analytic'.
+            n_jobs (int, optional): 点ごとの最小化を並列に行うプロセス数. 1なら逐次計算,
+                                    Noneまたは-1ならCPUコア数. 結果の順番は逐次計算と同じ. Defaults to 1.
+            variables (str, optional): 点ごとの最小化の探索変数. 'linear'なら良溶媒体積分率を探索範囲self.bndsで,
+                                       'log'なら対数比log(φ2/φ1)を制約無しで探索する. Defaults to 'linear'.
+            progress (function, optional): 1点計算するたびに呼ぶ関数 progress(i, record).
+                                           Noneなら何もしない. Defaults to printProgress.
+            return_log (bool, optional): Trueなら計算の記録(SolverLog)も返す. 記録はself.logにも格納する.
+                                         残差はコスト関数|G22*G33 - G23^2|('log'の最小化では|φ1 φ2 (G22*G33 - G23^2)|)の値.
+                                         Defaults to False.
+
+        Returns:
+            np.ndarray: (N,3)配列 スピノーダル組成の重量分率 (貧溶媒, 良溶媒, ポリマー)
+        """
+        if not variables in VARIABLES:
+            print(f"対応しない探索変数です. variables = {variables}", file=sys.stderr)
+            raise ValueError
+        self.log = SolverLog(progress)
+        if self.cache is None:
+            ws = self.__calcSpinodal(phase_phi3, method, solver, n_jobs, variables)
+        else:
+            key = self.cache.key(kind="spinodal", phase=self.phase.toDict(),
+                                 phase_phi3=np.asarray(phase_phi3, dtype=float),
+                                 method=method, solver=solver, variables=variables)
+            cached = self.cache.get(key)
+            if cached is not None and "log" in cached:
+                ws = cached["ws"]
+                self.log.loadArray(cached["log"])
+            else:
+                ws = self.__calcSpinodal(phase_phi3, method, solver, n_jobs, variables)
+                self.cache.put(key, ws=ws, log=self.log.toArray())
+        return (ws, self.log) if return_log else ws
+
+    def __calcSpinodal(self, phase_phi3, method: str, solver: str, n_jobs: int, variables: str) -> np.ndarray:
+        """spinodalの計算本体 (キャッシュを使わない)
+        """
+        if solver == "analytic" and self.isConstantChi():
+            self.log.start()
+            phis_arr = self.spinodalAnalytic(phase_phi3)
+            Gs = self.phase.Gs(phis_arr)
+            residuals = np.abs(Gs[:, 0]*Gs[:, 2] - Gs[:, 1]**2)
+            # 一括計算なので計算時間は点数で等分する
+            elapsed = self.log.elapsed() / max(len(phis_arr), 1)
+            for phi3, residual in zip(phis_arr[:, 2], residuals):
+                self.log.append(phi3, 0, 0, 0, residual, not np.isnan(residual), elapsed=elapsed)
+            return self.__phisToWs(phis_arr)
+        if n_jobs != 1:
+            results = _runChunks(_spinodalChunk, self.phase, phase_phi3, n_jobs, method, solver, variables)
+            for _, log in results:
+                self.log.extend(log)
+            return np.vstack([ws for ws, _ in results])
+
         # 最適化計算
-        res_all = []
+        res_all = list(self.__iterSpinodal(phase_phi3, method, variables))
+        phis_arr = np.array(res_all, dtype=float).reshape(-1, 3) # 全ての点のデータをnumpy配列に変換
+        return self.__phisToWs(phis_arr)
+
+    def __iterSpinodal(self, phase_phi3, method: str, variables: str):
+        """ポリマー体積分率ごとにコスト関数を最小化し, 1点ずつスピノーダル組成を返すジェネレータ
+           各点の記録はself.logに追加する
+
+        Yields:
+            list: スピノーダル組成の体積分率 (貧溶媒, 良溶媒, ポリマー)
+        """
+        if variables == "log":
+            fun, jac, bnds = self.__costFuncLogWrapper, self.__costJacLogWrapper, None
+        else:
+            fun, jac, bnds = self.__costFuncWrapper, self.__costJacWrapper, self.bnds
+        if method in DERIVATIVE_FREE_METHODS:
+            jac = None
         for i in range(len(phase_phi3)):
-            print(i)
+            self.log.start()
+            nfev, njev = self.nfev, self.njev
             self.phase.comp3.phi = phase_phi3[i]
 
-            res = minimize(fun=self.__costFuncWrapper, 
+            # 'log'では良溶媒と貧溶媒が等量の組成 (y = 0) から探索する
+            x0 = [0.] if variables == "log" else [(1. - self.phase.comp3.phi)*0.5]
+            res = minimize(fun=fun, 
+                jac=jac,
                 # method='Nelder-Mead', # o
-                method='Powell', # x
+                method=method,
+                # method='Powell', # x
                 # method='CG', # ×
                 # method='BFGS', # ×
                 # method='Newton-CG', # ×
@@ -59,37 +419,349 @@ class TernarySpinodal:
                 # method='trust-ncg', # x
                 # method='trust-exact', # ×
                 # method='trust-krylov', # ×
-                x0=[(1. - self.phase.comp3.phi)*0.5],
-                bounds=self.bnds,
+                x0=x0,
+                bounds=bnds,
                 tol=1e-20)#, options={"disp": True})
-            self.phase.comp2.phi = res.x[0]
-            self.phase.comp1.phi = 1. - (self.phase.comp2.phi + self.phase.comp3.phi)
-            res_all.append([
+            self.log.append(self.phase.comp3.phi, self.nfev - nfev, self.njev - njev,
+                            getattr(res, "nit", 0), res.fun, res.success)
+            if variables == "log":
+                self.phase.comp1.phi, self.phase.comp2.phi, _ = np.exp(self.__logPhis(res.x[0], self.phase.comp3.phi))
+            else:
+                self.phase.comp2.phi = res.x[0]
+                self.phase.comp1.phi = 1. - (self.phase.comp2.phi + self.phase.comp3.phi)
+            yield [
                 self.phase.comp1.phi,
                 self.phase.comp2.phi,
                 self.phase.comp3.phi,
-            ])
-        phis_arr = np.array(res_all, dtype=float) # 全ての点のデータをnumpy配列に変換
+            ]
+
+    def spinodalIter(self, phase_phi3, method: str = 'SLSQP', variables: str = 'linear',
+                     progress=printProgress, path: str = None):
+        """spinodalの逐次版. ポリマー体積分率ごとにコスト関数を最小化し,
+           収束したスピノーダル組成を計算した順に1点ずつ返すジェネレータ
+           最後の点まで待たずに途中の結果をプロットやファイルへの保存に使える. 計算の記録はself.logに格納する
+
+        Args:
+            phase_phi3 (np.ndarray): ポリマー体積分率
+            method (str, optional): scipy.optimize.minimizeのメソッド. Defaults to 'SLSQP'.
+            variables (str, optional): spinodalと同じ探索変数. Defaults to 'linear'.
+            progress (function, optional): 1点計算するたびに呼ぶ関数 progress(i, record).
+                                           Noneなら何もしない. Defaults to printProgress.
+            path (str, optional): 収束した点を1行ずつ追記するCSVファイルのパス. 既存のファイルは計算の開始時に上書きする.
+                                  列はWS_COLUMNS, 'phi3', 'residual'. Noneなら保存しない. Defaults to None.
 
-        # 各成分の密度を縦ベクトル化
-        rho_arr = np.array([self.phase.comp1.rho,
-                            self.phase.comp2.rho,
-                            self.phase.comp3.rho], dtype=float)
-        rho_arr_tile = np.tile(rho_arr, reps=(len(phis_arr),1))
+        Yields:
+            tuple[int, np.ndarray]: 点の番号, スピノーダル組成の重量分率 (貧溶媒, 良溶媒, ポリマー)
+        """
+        if not variables in VARIABLES:
+            print(f"対応しない探索変数です. variables = {variables}", file=sys.stderr)
+            raise ValueError
+        self.log = SolverLog(progress)
+        if path is not None:
+            _startCSV(path, WS_COLUMNS + ['phi3', 'residual'])
+        for i, phis in enumerate(self.__iterSpinodal(phase_phi3, method, variables)):
+            record = self.log.records[-1]
+            if not record['success'] or np.any(np.isnan(phis)):
+                continue
+            ws = self.__phisToWs(np.array([phis]))[0]
+            if path is not None:
+                _appendCSV(path, [*ws, record['phi3'], record['residual']])
+            yield i, ws
+
+    def __phisToWs(self, phis_arr: np.ndarray) -> np.ndarray:
+        """体積分率を重量分率に変換する
 
-        # 各点における単位体積当たりの総質量ベクトルを作成し3列に拡張(複製)
-        mass_arr_tile = np.tile(np.dot(phis_arr, rho_arr[:,None]), 3)
-        # 質量分率で表した配列
-        ws_arr = phis_arr * rho_arr_tile / mass_arr_tile
-        return ws_arr
+        Args:
+            phis_arr (np.ndarray): (N,3)配列 体積分率
+
+        Returns:
+            np.ndarray: (N,3)配列 重量分率
+        """
+        return Composition(phis_arr, 'volume', self.phase.getComponents()).release('mass')
+
+class TernaryCritical:
+    """1. 貧溶媒, 2. 良溶媒, 3. ポリマーの3成分系の臨界点(プレイトポイント)を
+       Flory-Hugginsモデルを用いて求めるクラス
+    """
+    def __init__(self, phase: Phase):
+        self.phase = phase.copy()
+
+    def conditions(self, phis: np.ndarray) -> np.ndarray:
+        """臨界点の条件式を計算する
+           スピノーダル条件    D = G22*G33 - G23^2 = 0
+           臨界条件            G22*∂D/∂φ3 - G23*∂D/∂φ2 = 0
+           (安定性行列の零ベクトル方向へのDの微分が0)
+
+        Args:
+            phis (np.ndarray): (N,3)配列 (貧溶媒体積分率, 良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (N,2)配列 (スピノーダル条件, 臨界条件)
+        """
+        Gs = self.phase.Gs(phis)
+        dGs = self.phase.GGrads(phis)
+        G22, G23, G33 = Gs[..., 0], Gs[..., 1], Gs[..., 2]
+        dG22, dG23, dG33 = dGs[..., 0, :], dGs[..., 1, :], dGs[..., 2, :]
+        det = G22*G33 - G23**2
+        ddet = dG22*G33[..., None] + G22[..., None]*dG33 - 2*G23[..., None]*dG23
+        return np.stack((det, G22*ddet[..., 1] - G23*ddet[..., 0]), axis=-1)
+
+    def __conditionsWrapper(self, x: np.ndarray) -> np.ndarray:
+        """conditionsのラッパーファンクション
+           scipy.optimize.rootを使うため
+
+        Args:
+            x (np.ndarray): (良溶媒体積分率, ポリマー体積分率)
+
+        Returns:
+            np.ndarray: (スピノーダル条件, 臨界条件)
+        """
+        # 条件式は組成の端で発散するので, 良溶媒・ポリマー体積分率で規格化する
+        phis = np.array([1. - x[0] - x[1], x[0], x[1]])
+        return self.conditions(phis) * np.array([x[0]*x[1], x[0]*x[1]**2])
+
+    def seeds(self, n_grid: int = 400) -> np.ndarray:
+        """組成格子上で臨界点の条件式が両方とも符号を変える格子セルを探し,
+           臨界点の初期値候補として返す
+
+        Args:
+            n_grid (int, optional): 各軸の格子点数. Defaults to 400.
+
+        Returns:
+            np.ndarray: (M,2)配列 (良溶媒体積分率, ポリマー体積分率) の初期値候補
+        """
+        phi2 = np.linspace(0., 1., n_grid + 1)[1:-1]
+        phi3 = np.logspace(-8, 0, n_grid + 1)[:-1] # ポリマー側は臨界点が端に寄るので対数格子
+        P2, P3 = np.meshgrid(phi2, phi3, indexing='ij')
+        P1 = 1. - P2 - P3
+        inside = P1 > 0.
+        phis = np.stack((np.where(inside, P1, 0.5), P2, P3), axis=-1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sign = np.sign(self.conditions(phis))
+        # 格子セルの4隅で両方の条件式の符号が変わるセルを探す
+        corners = np.stack((sign[:-1, :-1], sign[1:, :-1], sign[:-1, 1:], sign[1:, 1:]))
+        corners_inside = np.stack((inside[:-1, :-1], inside[1:, :-1], inside[:-1, 1:], inside[1:, 1:]))
+        changes = np.all(np.max(corners, axis=0) > np.min(corners, axis=0), axis=-1) \
+                & np.all(corners_inside, axis=0)
+        i, j = np.nonzero(changes)
+        return np.stack((0.5*(phi2[i] + phi2[i+1]), np.sqrt(phi3[j]*phi3[j+1])), axis=-1)
+
+    def criticalPoints(self, tol: float = 1e-10) -> np.ndarray:
+        """臨界点を全て求める
+
+        Args:
+            tol (float, optional): 収束とみなす条件式の最大絶対値. Defaults to 1e-10.
+
+        Returns:
+            np.ndarray: (M,3)配列 臨界点の体積分率 (貧溶媒, 良溶媒, ポリマー) ポリマー体積分率の小さい順
+        """
+        points = []
+        for x0 in self.seeds():
+            x = self.__solve(x0, tol)
+            if x is None:
+                continue
+            # 同じ臨界点は重複して数えない
+            if not any(np.max(np.abs(x - p[1:])) < 1e-6 for p in points):
+                points.append(np.array([1. - x[0] - x[1], x[0], x[1]]))
+        points = np.array(points, dtype=float).reshape(-1, 3)
+        return points[np.argsort(points[:, 2])]
+
+    def criticalPoint(self, x0: np.ndarray = None, tol: float = 1e-10) -> np.ndarray:
+        """臨界点を求める
+
+        Args:
+            x0 (np.ndarray, optional): (良溶媒体積分率, ポリマー体積分率)の初期値.
+                                       指定しない場合は組成格子上の探索で求めた
+                                       ポリマー体積分率が最小の臨界点を返す. Defaults to None.
+            tol (float, optional): 収束とみなす条件式の最大絶対値. Defaults to 1e-10.
+
+        Returns:
+            np.ndarray: 臨界点の体積分率 (貧溶媒, 良溶媒, ポリマー)
+        """
+        if x0 is None:
+            points = self.criticalPoints(tol)
+            if len(points) == 0:
+                print("臨界点が見つかりません. ", file=sys.stderr)
+                raise ValueError
+            return points[0]
+        x = self.__solve(np.asarray(x0, dtype=float), tol)
+        if x is None:
+            print("臨界点の計算が収束しませんでした. ", file=sys.stderr)
+            raise ValueError
+        return np.array([1. - x[0] - x[1], x[0], x[1]])
+
+    def __solve(self, x0: np.ndarray, tol: float) -> np.ndarray:
+        """初期値x0から臨界点の条件式を解く. 収束しない場合はNoneを返す
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            res = root(self.__conditionsWrapper, x0, method='hybr')
+        x = res.x
+        if not res.success or np.any(x <= 0.) or x[0] + x[1] >= 1. \
+            or np.max(np.abs(self.__conditionsWrapper(x))) > tol:
+            return None
+        return x
+
+    def tieLineSeed(self, critical_point: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """臨界点近傍のタイラインの初期値を返す
+           臨界点近傍ではタイラインは安定性行列の零ベクトルに平行で,
+           臨界点に関してほぼ対称であることを用いる
+
+        Args:
+            critical_point (np.ndarray): 臨界点の体積分率 (貧溶媒, 良溶媒, ポリマー)
+            phaseL_phi3 (float): ポリマーリーン相のポリマー体積分率 (臨界点より小さいこと)
+
+        Returns:
+            np.ndarray: (ポリマーリッチ相の良溶媒体積分率, ポリマーリッチ相のポリマー体積分率, ポリマーリーン相の良溶媒体積分率)
+        """
+        G22, G23, _ = self.phase.Gs(critical_point)
+        v = np.array([G23, -G22]) # 安定性行列の零ベクトル (φ2, φ3)
+        v = v / v[1]
+        eps = critical_point[2] - phaseL_phi3
+        return np.array([critical_point[1] + eps*v[0], critical_point[2] + eps,
+                         critical_point[1] - eps*v[0]])
+
+class TernaryHull:
+    """組成単体上の格子点における混合自由エネルギーの下側凸包から
+       2相のタイラインと3相の三角形を一括で求めるクラス
+       格子点を頂点とする三角形は, 頂点以外の格子点を含まなければ面積が最小(単位三角形)になる(ピックの定理).
+       下側凸包の面のうち単位三角形より大きい面は凸包に乗らない格子点を覆うので, 相分離領域に当たる
+    """
+    def __init__(self, phase: Phase):
+        self.phase = phase.copy()
+
+    def lowerHull(self, n: int = 200) -> tuple[np.ndarray, np.ndarray]:
+        """格子点 (φ2, φ3, ΔGmix/RT) の凸包の下側の面を求める
+
+        Args:
+            n (int, optional): 格子の分割数. Defaults to 200.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 格子点の体積分率 (M,3)配列, 下側の面の頂点の添字 (F,3)配列
+        """
+        phis = simplexLattice(n)
+        g = self.phase.gRTs(phis)
+        hull = ConvexHull(np.column_stack((phis[:, 1:], g)))
+        # 外向き法線のg成分が負の面が下側 (単体の辺上の鉛直な面は除く)
+        lower = hull.equations[:, 2] < -1e-12
+        return phis, hull.simplices[lower]
+
+    def phaseSplit(self, n: int = 200, min_length: float = 0.1) -> tuple[np.ndarray, np.ndarray]:
+        """下側凸包からタイラインと3相の三角形を取り出す
+           単位三角形より大きい面のうち, 最も短い辺がmin_length以下の面は2相領域の面とし,
+           残りの2辺をタイラインとする. 3辺ともmin_lengthより長い面は3相の三角形とする
+
+        Args:
+            n (int, optional): 格子の分割数. Defaults to 200.
+            min_length (float, optional): 3相とみなす辺の長さ(体積分率のユークリッド距離)の最小値.
+                                          2相領域の面の短い辺(バイノーダル上の隣り合う点の間隔)より
+                                          十分大きくする. Defaults to 0.1.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: タイライン (N,6)配列 (ポリマーリッチ相, ポリマーリーン相の体積分率),
+                                           3相の三角形 (K,9)配列 (ポリマー体積分率の大きい順の3相の体積分率)
+                                           タイラインはポリマーリッチ相のポリマー体積分率の大きい順に並べる
+        """
+        phis, simplices = self.lowerHull(n)
+        # 格子の添字 (良溶媒, ポリマー) で面積の2倍を整数で計算する
+        idx = np.rint(phis[simplices][..., 1:] * n).astype(int)
+        area2 = np.abs((idx[:, 1, 0] - idx[:, 0, 0]) * (idx[:, 2, 1] - idx[:, 0, 1])
+                     - (idx[:, 2, 0] - idx[:, 0, 0]) * (idx[:, 1, 1] - idx[:, 0, 1]))
+        split = simplices[area2 > 1]
+        # 各面の3辺 (頂点0-1, 1-2, 2-0) を長さの順に並べる
+        edges = np.stack((split[:, [0, 1]], split[:, [1, 2]], split[:, [2, 0]]), axis=1)
+        lengths = np.linalg.norm(phis[edges[..., 0]] - phis[edges[..., 1]], axis=-1)
+        order = np.argsort(lengths, axis=1)
+        edges = np.take_along_axis(edges, order[..., None], axis=1)
+        is_three = np.take_along_axis(lengths, order, axis=1)[:, 0] > min_length
+
+        three = split[is_three]
+        order = np.argsort(-phis[three][..., 2], axis=1)
+        three_phase = np.take_along_axis(phis[three], order[..., None], axis=1).reshape(-1, 9)
+
+        pairs = np.sort(edges[~is_three][:, 1:].reshape(-1, 2), axis=1)
+        pairs = np.unique(pairs, axis=0)
+        a, b = phis[pairs[:, 0]], phis[pairs[:, 1]]
+        swap = (a[:, 2] < b[:, 2])[:, None]
+        rich, lean = np.where(swap, b, a), np.where(swap, a, b)
+        order = np.argsort(-rich[:, 2], kind='stable')
+        return np.hstack((rich, lean))[order], three_phase
+
+    def convexity(self, phis: np.ndarray) -> np.ndarray:
+        """与えた組成の点の集合について, 混合自由エネルギーの下側凸包に乗るかどうかを調べる
+           凸包に乗らない点は2相(または3相)に分離した方が自由エネルギーが低い
+
+        Args:
+            phis (np.ndarray): (M,3)配列 体積分率
+
+        Returns:
+            np.ndarray: (M,)配列 下側凸包に乗る点は1, 乗らない点は-1
+        """
+        phis = np.asarray(phis, dtype=float)
+        hull = ConvexHull(np.column_stack((phis[:, 1:], self.phase.gRTs(phis))))
+        on_hull = np.full(len(phis), -1.)
+        on_hull[np.unique(hull.simplices[hull.equations[:, 2] < -1e-12])] = 1.
+        return on_hull
+
+    def __meshField(self, phis: np.ndarray) -> np.ndarray:
+        """適応メッシュの指標 (局所的な安定性, 大域的な凸性)
+        """
+        return np.column_stack((self.phase.stabilityDets(phis), self.convexity(phis)))
+
+    def adaptiveMesh(self, n: int = 8, max_level: int = 6) -> AdaptiveSimplexMesh:
+        """スピノーダル (安定性行列の行列式の符号) とバイノーダル (下側凸包に乗るかどうか) の
+           近くだけを細かくした組成単体の三角形メッシュを作る
+
+        Args:
+            n (int, optional): 最初の格子の分割数. Defaults to 8.
+            max_level (int, optional): 最大の細分化レベル. 最も細かい格子の間隔は 1/(n 2^max_level). Defaults to 6.
+
+        Returns:
+            AdaptiveSimplexMesh: 指標の0列目はφ1 φ2 φ3 (G22*G33 - G23^2), 1列目は下側凸包に乗るなら1, 乗らないなら-1
+        """
+        # 凸包は点の集合全体で決まるので, 細分化のたびに全ての点で評価し直す
+        return AdaptiveSimplexMesh(self.__meshField, n, max_level, pointwise=False)
+
+    def boundaryLines(self, n: int = 8, max_level: int = 6) -> tuple[list, list]:
+        """適応メッシュからバイノーダルとスピノーダルの折れ線を取り出す
+           バイノーダルの解像度は最も細かい格子の間隔程度なので, 精密な組成はbinodalHullなどで求める
+
+        Args:
+            n (int, optional): 最初の格子の分割数. Defaults to 8.
+            max_level (int, optional): 最大の細分化レベル. Defaults to 6.
+
+        Returns:
+            tuple[list, list]: バイノーダル, スピノーダルの折れ線 (重量分率の(K,3)配列) のリスト
+        """
+        mesh = self.adaptiveMesh(n, max_level)
+        binodal = [self.__phisToWs(line) for line in mesh.contour(column=1)]
+        spinodal = [self.__phisToWs(line) for line in mesh.contour(column=0)]
+        return binodal, spinodal
+
+    def __phisToWs(self, phis_arr: np.ndarray) -> np.ndarray:
+        """体積分率を重量分率に変換する
+
+        Args:
+            phis_arr (np.ndarray): (N,3)配列 体積分率
+
+        Returns:
+            np.ndarray: (N,3)配列 重量分率
+        """
+        return Composition(phis_arr, 'volume', self.phase.getComponents()).release('mass')
 
 class TernaryBinodal:
     """1. 貧溶媒, 2. 良溶媒, 3. ポリマーの3成分系
        をFlory-Hugginsモデルを用いて扱うクラス
     """
-    def __init__(self, phase: Phase):
+    def __init__(self, phase: Phase, cache: ResultCache = None):
         self.phaseR = phase.copy() # ポリマーリッチ相
         self.phaseL = phase.copy() # ポリマーリーン相
+        self.critical = TernaryCritical(phase) # 臨界点の計算
+        self.critical_point = None # 臨界点の体積分率
+        self.__seed_trace = None # 初期値作成用に連続法で追跡したタイライン
+        self.cache = cache # 計算結果のキャッシュ (Noneなら使わない)
+        self.log = SolverLog() # 直前の計算の記録
+        self.nfev = 0 # 残差(コスト関数)の評価回数の累計
+        self.njev = 0 # ヤコビ行列(勾配)の評価回数の累計
         self.bnds = ( # scipy.optimize.minimizeする際の探索範囲
         (0.00000000001, 0.9999999999), # ポリマーリッチ相の良溶媒体積分率探索範囲
         (0.00000000001, 0.9999999999), # ポリマーリッチ相のポリマー体積分率探索範囲
@@ -104,6 +776,7 @@ class TernaryBinodal:
         #      + np.power(self.phaseL.s * self.f2(),2) / np.power((self.phaseR.comp2.phi - self.phaseL.comp2.phi),4) \
         #      + np.power(self.phaseL.r * self.f3(),2) / np.power((self.phaseR.comp3.phi - self.phaseL.comp3.phi),4) 
         # 頂点付近ではこちらの方が良い
+        self.nfev += 1
         return (np.power(                self.f1(),2) \
               + np.power(self.phaseL.s * self.f2(),2) \
               + np.power(self.phaseL.r * self.f3(),2) )
@@ -153,60 +826,939 @@ class TernaryBinodal:
         """
         return self.phaseR.mu3RT() - self.phaseL.mu3RT()
 
-    def binodal(self, phaseL_phi3):
+    def residuals(self, phis: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """両相間のケミカルポテンシャル差 (f1, s*f2, r*f3) を
+           Componentを変更せずに計算する
+
+        Args:
+            phis (np.ndarray): ポリマーリッチ相の良溶媒、ポリマーの体積分率
+                               ポリマーリーン相の良溶媒体積分率
+            phaseL_phi3 (float): ポリマーリーン相のポリマー体積分率
+
+        Returns:
+            np.ndarray: (f1, s*f2, r*f3)
+        """
+        self.nfev += 1
+        return self.__residuals(phis, phaseL_phi3)
+
+    def __residuals(self, phis: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """residualsの計算本体 (評価回数を数えない. 微分の計算の中で使う)
+        """
+        mus = self.phaseR.muRTs(self.__phisRL(phis, phaseL_phi3))
+        return (mus[0] - mus[1]) * self.__weights()
+
+    def jacobian(self, phis: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """residualsの (φ2R, φ3R, φ2L) に関する解析的なヤコビ行列を計算する
+
+        Args:
+            phis (np.ndarray): ポリマーリッチ相の良溶媒、ポリマーの体積分率
+                               ポリマーリーン相の良溶媒体積分率
+            phaseL_phi3 (float): ポリマーリーン相のポリマー体積分率
+
+        Returns:
+            np.ndarray: (3,3)配列
+        """
+        self.njev += 1
+        return self.__jacobian(phis, phaseL_phi3)
+
+    def __jacobian(self, phis: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """jacobianの計算本体 (評価回数を数えない)
+        """
+        grads = self.phaseR.muRTGrads(self.__phisRL(phis, phaseL_phi3))
+        jac = np.hstack((grads[0], -grads[1][:, 0:1]))
+        return jac * self.__weights()[:, None]
+
+    def residualsLog(self, ys: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """対数比変数について両相間のケミカルポテンシャル差 (f1, s*f2, r*f3) を計算する
+           体積分率の対数を直接Phase.muRTsLogに渡すので, 非常に小さいポリマー体積分率でも精度が落ちない
+
+        Args:
+            ys (np.ndarray): (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L))
+            phaseL_phi3 (float): ポリマーリーン相のポリマー体積分率
+
+        Returns:
+            np.ndarray: (f1, s*f2, r*f3)
+        """
+        self.nfev += 1
+        return self.__residualsLog(ys, phaseL_phi3)
+
+    def __residualsLog(self, ys: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """residualsLogの計算本体 (評価回数を数えない. 微分の計算の中で使う)
+        """
+        mus = self.phaseR.muRTsLog(self.__logPhisRL(ys, phaseL_phi3))
+        return (mus[0] - mus[1]) * self.__weights()
+
+    def jacobianLog(self, ys: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """residualsLogの対数比変数に関する解析的なヤコビ行列を計算する
+
+        Args:
+            ys (np.ndarray): (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L))
+            phaseL_phi3 (float): ポリマーリーン相のポリマー体積分率
+
+        Returns:
+            np.ndarray: (3,3)配列
+        """
+        self.njev += 1
+        return self.__jacobianLog(ys, phaseL_phi3)
+
+    def __jacobianLog(self, ys: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """jacobianLogの計算本体 (評価回数を数えない)
+        """
+        log_phis = self.__logPhisRL(ys, phaseL_phi3)
+        gradsR, gradsL = self.phaseR.muRTGradsLog(log_phis)
+        phi2R, phi3R = np.exp(log_phis[0, 1:])
+        # リッチ相: (log φ2R, log φ3R)の(y1, y2)に関する微分
+        dR = np.array([[1. - phi2R, -phi3R],
+                       [-phi2R, 1. - phi3R]])
+        # リーン相: φ3Lを固定したときのlog φ2Lのy3に関する微分 φ1L / (1 - φ3L)
+        dL = np.exp(log_phis[1, 0] - np.log1p(-phaseL_phi3))
+        jac = np.hstack((gradsR @ dR, -gradsL[:, 0:1] * dL))
+        return jac * self.__weights()[:, None]
+
+    def __logPhisRL(self, ys: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """対数比変数から両相の体積分率の対数を組み立てる
+           リッチ相は φ = (1, e^y1, e^y2) / (1 + e^y1 + e^y2),
+           リーン相は φ1 + φ2 = 1 - φ3L を保って φ2/φ1 = e^y3 とする
+
+        Returns:
+            np.ndarray: (2,3)配列 [ポリマーリッチ相, ポリマーリーン相]の(log φ1, log φ2, log φ3)
+        """
+        y1, y2, y3 = ys
+        log_sum = np.logaddexp.reduce([0., y1, y2])
+        log_c = np.log1p(-phaseL_phi3)
+        softplus = np.logaddexp(0., y3)
+        return np.array([[-log_sum, y1 - log_sum, y2 - log_sum],
+                         [log_c - softplus, log_c + y3 - softplus, np.log(phaseL_phi3)]])
+
+    def __toLogRatios(self, phis: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """探索変数(体積分率)を対数比変数に変換する. 単体の外の組成はNaNまたは無限大になる
+
+        Args:
+            phis (np.ndarray): ポリマーリッチ相の良溶媒、ポリマーの体積分率
+                               ポリマーリーン相の良溶媒体積分率
+            phaseL_phi3 (float): ポリマーリーン相のポリマー体積分率
+
+        Returns:
+            np.ndarray: (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L))
+        """
+        log_phis = np.log(self.__phisRL(phis, phaseL_phi3))
+        return np.array([log_phis[0, 1] - log_phis[0, 0],
+                         log_phis[0, 2] - log_phis[0, 0],
+                         log_phis[1, 1] - log_phis[1, 0]])
+
+    def __fromLogRatios(self, ys: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """対数比変数を探索変数(体積分率)に戻す
+
+        Returns:
+            np.ndarray: (良溶媒体積分率R, ポリマー体積分率R, 良溶媒体積分率L)
+        """
+        phis = np.exp(self.__logPhisRL(ys, phaseL_phi3))
+        return np.array([phis[0, 1], phis[0, 2], phis[1, 1]])
+
+    def __phisRL(self, phis: np.ndarray, phaseL_phi3: float) -> np.ndarray:
+        """探索変数から両相の体積分率組成を組み立てる
+
+        Returns:
+            np.ndarray: (2,3)配列 [ポリマーリッチ相, ポリマーリーン相]
+        """
+        phi2R, phi3R, phi2L = phis
+        return np.array([[1. - phi2R - phi3R, phi2R, phi3R],
+                         [1. - phi2L - phaseL_phi3, phi2L, phaseL_phi3]])
+
+    def __weights(self) -> np.ndarray:
+        """costFuncにおける各ケミカルポテンシャル差の重み (1, s, r)
+        """
+        return np.array([1., self.phaseL.s, self.phaseL.r])
+
+    def __costJacWrapper(self,
+            phis: np.ndarray):
+        """costFuncの解析的な勾配
+           scipy.optimize.minimizeのjacとして使う
+
+        Args:
+            phis (np.ndarray): ポリマーリッチ相の良溶媒、ポリマーの体積分率
+                               ポリマーリーン相の良溶媒体積分率
+
+        Returns:
+            np.ndarray: costFuncの勾配
+        """
+        self.njev += 1
+        f = self.__residuals(phis, self.phaseL.comp3.phi)
+        jac = self.__jacobian(phis, self.phaseL.comp3.phi)
+        return 2 * jac.T @ f
+
+    def __costHessWrapper(self,
+            phis: np.ndarray):
+        """costFuncの解析的なヘッセ行列
+           scipy.optimize.minimizeのhessとして使う
+
+        Args:
+            phis (np.ndarray): ポリマーリッチ相の良溶媒、ポリマーの体積分率
+                               ポリマーリーン相の良溶媒体積分率
+
+        Returns:
+            np.ndarray: (3,3)配列 costFuncのヘッセ行列
+        """
+        phaseL_phi3 = self.phaseL.comp3.phi
+        f = self.__residuals(phis, phaseL_phi3)
+        jac = self.__jacobian(phis, phaseL_phi3)
+        hessR, hessL = self.phaseR.muRTHessians(self.__phisRL(phis, phaseL_phi3))
+        # 各残差の2階微分 (リッチ相の変数ブロックとリーン相の良溶媒の対角成分)
+        hess_f = np.zeros((3, 3, 3))
+        hess_f[:, 0:2, 0:2] = hessR
+        hess_f[:, 2, 2] = -hessL[:, 0, 0]
+        hess_f *= self.__weights()[:, None, None]
+        return 2 * (jac.T @ jac + np.einsum('i,ijk->jk', f, hess_f))
+
+    def __findCriticalPoint(self) -> np.ndarray:
+        """臨界点を求める. 見つからない場合はNoneを返す
+        """
+        points = self.critical.criticalPoints()
+        return points[0] if len(points) > 0 else None
+
+    def __costFuncLogWrapper(self,
+            ys: np.ndarray):
+        """対数比変数についてのコスト関数 (残差の二乗和)
+
+        Args:
+            ys (np.ndarray): (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L))
+
+        Returns:
+            float: コスト関数
+        """
+        f = self.residualsLog(ys, self.phaseL.comp3.phi)
+        return f @ f
+
+    def __costJacLogWrapper(self,
+            ys: np.ndarray):
+        """__costFuncLogWrapperの解析的な勾配
+
+        Args:
+            ys (np.ndarray): (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L))
+
+        Returns:
+            np.ndarray: 勾配
+        """
+        self.njev += 1
+        phaseL_phi3 = self.phaseL.comp3.phi
+        f = self.__residualsLog(ys, phaseL_phi3)
+        jac = self.__jacobianLog(ys, phaseL_phi3)
+        return 2 * jac.T @ f
+
+    def __costHessLogWrapper(self,
+            ys: np.ndarray):
+        """__costFuncLogWrapperのヘッセ行列のガウス・ニュートン近似 2 J^T J
+
+        Args:
+            ys (np.ndarray): (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L))
+
+        Returns:
+            np.ndarray: (3,3)配列
+        """
+        jac = self.__jacobianLog(ys, self.phaseL.comp3.phi)
+        return 2 * jac.T @ jac
+
+    def __minimizePoint(self, method: str = 'SLSQP', x0: list = None, variables: str = 'linear'):
+        """現在のポリマーリーン相のポリマー体積分率について
+           コスト関数を最小化してタイラインを求める
+
+        Args:
+            method (str, optional): scipy.optimize.minimizeのメソッド. Defaults to 'SLSQP'.
+            x0 (list, optional): 初期値. Defaults to None.
+            variables (str, optional): 'linear'なら体積分率を探索範囲self.bndsで,
+                                       'log'なら対数比変数を制約無しで探索する. Defaults to 'linear'.
+
+        Returns:
+            scipy.optimize.OptimizeResult: 最適化結果 (xは探索変数によらず体積分率)
+        """
+        phaseL_phi3 = self.phaseL.comp3.phi
+        if x0 is None:
+            x0 = [0.2, 0.5, (1. - phaseL_phi3)*0.5]
+        if variables == "log":
+            res = minimize(fun=self.__costFuncLogWrapper,
+                jac=None if method in DERIVATIVE_FREE_METHODS else self.__costJacLogWrapper,
+                hess=self.__costHessLogWrapper if method in HESSIAN_METHODS else None,
+                method=method,
+                x0=self.__toLogRatios(x0, phaseL_phi3),
+                tol=1e-20)
+            res.x = self.__fromLogRatios(res.x, phaseL_phi3)
+            return res
+        return minimize(fun=self.__costFuncWrapper, 
+            jac=None if method in DERIVATIVE_FREE_METHODS else self.__costJacWrapper,
+            hess=self.__costHessWrapper if method in HESSIAN_METHODS else None,
+            # 最小二乗法メソッド
+            # method='Nelder-Mead', # o
+            # method='Powell', # x
+            # method='CG', # ×
+            # method='BFGS', # ×
+            # method='Newton-CG', # ×
+            # method='L-BFGS-B', # ×
+            # method='TNC', # ×
+            # method='COBYLA', # ×
+            method=method, # 'SLSQP' o
+            # method='trust-constr' # x
+            # method='dogleg', # x
+            # method='trust-ncg', # x
+            # method='trust-exact', # ×
+            # method='trust-krylov', # ×
+            x0=x0,
+            bounds=self.bnds, # 変数の探索範囲
+            tol=1e-20)#, options={"disp": True})
+
+    def __rootPoint(self, x0: np.ndarray = None, method: str = 'SLSQP', tol: float = 1e-10,
+                    use_continuation: bool = True, variables: str = 'linear') -> tuple[np.ndarray, int, bool]:
+        """現在のポリマーリーン相のポリマー体積分率について
+           (f1, s*f2, r*f3) = 0 を探索範囲内で直接解く
+           初期値が無い場合や収束しない場合, 自明解(リッチ相=リーン相)に落ちた場合は
+           臨界点近傍の近似解, 連続法で追跡したタイラインの補間, コスト関数の最小化による解を
+           初期値として順に解き直す
+
+        Args:
+            x0 (np.ndarray, optional): 初期値(直前の点の解など). Defaults to None.
+            method (str, optional): 初期値作成に用いるscipy.optimize.minimizeのメソッド. Defaults to 'SLSQP'.
+            tol (float, optional): 収束とみなす残差の最大絶対値. Defaults to 1e-10.
+            use_continuation (bool, optional): 連続法で追跡したタイラインを初期値の候補に加えるかどうか.
+                                               Defaults to True.
+            variables (str, optional): 'linear'なら体積分率を探索範囲self.bndsで,
+                                       'log'なら対数比変数を制約無しで解く. Defaults to 'linear'.
+
+        Returns:
+            tuple[np.ndarray, int, bool]: 解(体積分率), 反復回数(ヤコビ行列の評価回数の合計), 収束したかどうか
+        """
+        phaseL_phi3 = self.phaseL.comp3.phi
+        lb, ub = np.array(self.bnds).T
+        nit = 0
+        # 初期値の候補: 与えられた初期値, 臨界点近傍の近似解, 連続法の補間, コスト関数の最小化による解
+        seeds = [] if x0 is None else [x0]
+        if self.critical_point is not None and phaseL_phi3 < self.critical_point[2]:
+            seeds.append(self.critical.tieLineSeed(self.critical_point, phaseL_phi3))
+        if use_continuation:
+            seeds.append("continuation")
+        seeds.append(None)
+        x, converged = np.full(3, np.nan), False
+        for seed in seeds:
+            if isinstance(seed, str):
+                seed = self.__continuationSeeds([phaseL_phi3])[0]
+                if seed is None:
+                    continue
+            elif seed is None:
+                res_min = self.__minimizePoint(method, variables=variables)
+                seed = res_min.x
+                nit += res_min.nit
+            if variables == "log":
+                fun, jac, bounds = self.residualsLog, self.jacobianLog, (-np.inf, np.inf)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    seed = self.__toLogRatios(seed, phaseL_phi3)
+            else:
+                fun, jac, bounds = self.residuals, self.jacobian, (lb, ub)
+                seed = np.clip(seed, lb, ub)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if not np.all(np.isfinite(seed)) or not np.all(np.isfinite(fun(seed, phaseL_phi3))):
+                    # 組成が単体の外に出る初期値は使わない
+                    continue
+            res = least_squares(fun, seed, jac=jac,
+                                bounds=bounds, args=(phaseL_phi3,), method='trf',
+                                xtol=1e-15, ftol=1e-15, gtol=1e-15)
+            nit += res.njev
+            x = self.__fromLogRatios(res.x, phaseL_phi3) if variables == "log" else res.x
+            phis_RL = self.__phisRL(x, phaseL_phi3)
+            converged = np.max(np.abs(res.fun)) < tol \
+                    and np.max(np.abs(phis_RL[0] - phis_RL[1])) > 1e-6
+            if converged:
+                break
+        return x, nit, converged
+
+    def binodal(self, phaseL_phi3, method: str = 'SLSQP', solver: str = 'minimize', n_jobs: int = 1,
+                x0: list = None, variables: str = 'linear', progress=printProgress, return_log: bool = False):
+        """ポリマーリーン相のポリマー体積分率ごとにタイラインを計算する
+           各点の残差(ケミカルポテンシャル差の最大絶対値)と反復回数は
+           self.residual_list, self.nit_listに, 計算時間や評価回数を含む記録はself.logに格納する
+
+        Args:
+            phaseL_phi3 (np.ndarray): ポリマーリーン相のポリマー体積分率
+            method (str, optional): scipy.optimize.minimizeのメソッド.
+                                    勾配を使うメソッドには解析的な勾配をjacとして,
+                                    ヘッセ行列を使うメソッドには解析的なヘッセ行列をhessとして渡す. Defaults to 'SLSQP'.
+            solver (str, optional): 'minimize'ならコスト関数(残差の二乗和)を最小化する.
+                                    'root'なら(f1, s*f2, r*f3) = 0を解析的なヤコビ行列を用いた
+                                    信頼領域法で直接解く. 'root'では臨界点を先に求め,
+                                    臨界点を越える点はNaNとする. Defaults to 'minimize'.
+            n_jobs (int, optional): 並列に計算するプロセス数. 1なら逐次計算, Noneまたは-1ならCPUコア数.
+                                    phaseL_phi3を連続したチャンクに分割して各プロセスで計算し,
+                                    逐次計算と同じ順番で結合する. 'root'では各チャンクの先頭の点は
+                                    直前の点の解の代わりに, 連続法で追跡したタイラインを補間した
+                                    初期値を用いる. Defaults to 1.
+            x0 (list, optional): 'root'で最初の点に用いる初期値 (良溶媒体積分率R, ポリマー体積分率R, 良溶媒体積分率L).
+                                 Defaults to None.
+            variables (str, optional): 'linear'なら体積分率 (φ2R, φ3R, φ2L) を探索範囲self.bndsで探索する.
+                                       'log'なら対数比 (log(φ2R/φ1R), log(φ3R/φ1R), log(φ2L/φ1L)) を
+                                       制約無しで探索し, ケミカルポテンシャルは体積分率の対数から計算する.
+                                       ポリマーリーン相のポリマー体積分率が非常に小さい場合に'root'と組み合わせて用いる.
+                                       Defaults to 'linear'.
+            progress (function, optional): 1点計算するたびに呼ぶ関数 progress(i, record).
+                                           Noneなら何もしない. Defaults to printProgress.
+            return_log (bool, optional): Trueなら計算の記録(SolverLog)も返す. Defaults to False.
+
+        Returns:
+            np.ndarray: (2N,3)配列 ポリマーリッチ相, ポリマーリーン相の順に縦に結合した重量分率
+        """
+        self.log = SolverLog(progress)
+        ws = self.__cached(lambda: self.__calcBinodal(phaseL_phi3, method, solver, n_jobs, x0, variables),
+                           kind="binodal", phaseL_phi3=np.asarray(phaseL_phi3, dtype=float),
+                           method=method, solver=solver, variables=variables,
+                           x0=None if x0 is None else np.asarray(x0, dtype=float))
+        return (ws, self.log) if return_log else ws
+
+    def __calcBinodal(self, phaseL_phi3, method: str, solver: str, n_jobs: int, x0: list,
+                      variables: str) -> np.ndarray:
+        """binodalの計算本体 (キャッシュを使わない)
+        """
+        if not solver in ["minimize", "root"]:
+            print(f"対応しないソルバーです. solver = {solver}", file=sys.stderr)
+            raise ValueError
+        if not variables in VARIABLES:
+            print(f"対応しない探索変数です. variables = {variables}", file=sys.stderr)
+            raise ValueError
+        if n_jobs != 1:
+            chunk_x0s = None
+            if solver == "root":
+                starts = _chunkStarts(len(phaseL_phi3), n_jobs)
+                chunk_x0s = self.__continuationSeeds(np.asarray(phaseL_phi3)[starts])
+                if x0 is not None:
+                    chunk_x0s[0] = x0
+            results = _runChunks(_binodalChunk, self.phaseR, phaseL_phi3, n_jobs, method, solver, variables,
+                                 chunk_args=chunk_x0s)
+            # 各チャンクの重量分率はリッチ相, リーン相の順に縦に結合されているので分けてから結合する
+            halves = [np.split(ws, 2) for ws, _ in results]
+            for _, log in results:
+                self.log.extend(log)
+            self.residual_list = self.log.column('residual')
+            self.nit_list = self.log.column('nit')
+            return np.vstack([rich for rich, _ in halves] + [lean for _, lean in halves])
         # 最適化計算
-        res_all = []
+        res_all = list(self.__iterBinodal(phaseL_phi3, method, solver, x0, variables))
+        arr = np.array(res_all, dtype=float).reshape(-1, 6) # 全ての点のデータをnumpy配列に変換
+        return self.__tieLinesToWs(arr)
+
+    def __iterBinodal(self, phaseL_phi3, method: str, solver: str, x0: list, variables: str):
+        """ポリマーリーン相のポリマー体積分率ごとにタイラインを解き, 1点ずつ返すジェネレータ
+           各点の記録はself.log, 残差と反復回数はself.residual_list, self.nit_listに追加する
+
+        Yields:
+            list: タイラインの体積分率 (ポリマーリッチ相, ポリマーリーン相). タイラインが存在しない点はNaN
+        """
+        if solver == "root":
+            self.critical_point = self.__findCriticalPoint()
+        self.residual_list = []
+        self.nit_list = []
+        x_prev = x0 # 直前の点の解 (rootの初期値に用いる)
         for i in range(len(phaseL_phi3)):
-            print(i)
+            self.log.start()
+            nfev, njev = self.nfev, self.njev
             self.phaseL.comp3.phi = phaseL_phi3[i]
 
-            res = minimize(fun=self.__costFuncWrapper, 
-                # 最小二乗法メソッド
-                # method='Nelder-Mead', # o
-                # method='Powell', # x
-                # method='CG', # ×
-                # method='BFGS', # ×
-                # method='Newton-CG', # ×
-                # method='L-BFGS-B', # ×
-                # method='TNC', # ×
-                # method='COBYLA', # ×
-                method='SLSQP', # o
-                # method='trust-constr' # x
-                # method='dogleg', # x
-                # method='trust-ncg', # x
-                # method='trust-exact', # ×
-                # method='trust-krylov', # ×
-                x0=[0.2, 0.5, (1. - self.phaseL.comp3.phi)*0.5], # 
-                bounds=self.bnds, # 変数の探索範囲
-                tol=1e-20)#, options={"disp": True})
-            self.phaseR.comp2.phi, self.phaseR.comp3.phi, self.phaseL.comp2.phi = res.x
+            if solver == "root" and self.critical_point is not None \
+                and phaseL_phi3[i] >= self.critical_point[2]:
+                # 臨界点よりポリマーリーン相のポリマー体積分率が大きいタイラインは存在しない
+                self.log.append(phaseL_phi3[i], 0, 0, 0, np.nan, False)
+                self.residual_list.append(np.nan)
+                self.nit_list.append(0)
+                yield [np.nan] * 6
+                continue
+            if solver == "root":
+                x, nit, success = self.__rootPoint(x_prev, method, variables=variables)
+                x_prev = x
+            else:
+                res = self.__minimizePoint(method, variables=variables)
+                x, nit, success = res.x, res.nit, res.success
+            nfev, njev = self.nfev - nfev, self.njev - njev
+            if variables == "log":
+                residual = self.residualsLog(self.__toLogRatios(x, self.phaseL.comp3.phi), self.phaseL.comp3.phi)
+            else:
+                residual = self.residuals(x, self.phaseL.comp3.phi)
+            self.log.append(phaseL_phi3[i], nfev, njev, nit, np.max(np.abs(residual)), success)
+            self.residual_list.append(self.log.records[-1]['residual'])
+            self.nit_list.append(self.log.records[-1]['nit'])
+            self.phaseR.comp2.phi, self.phaseR.comp3.phi, self.phaseL.comp2.phi = x
             self.phaseR.comp1.phi = 1. - (self.phaseR.comp2.phi + self.phaseR.comp3.phi)
             self.phaseL.comp1.phi = 1. - (self.phaseL.comp2.phi + self.phaseL.comp3.phi)
-            res_all.append([
+            yield [
                 self.phaseR.comp1.phi,
                 self.phaseR.comp2.phi,
                 self.phaseR.comp3.phi,
                 self.phaseL.comp1.phi,
                 self.phaseL.comp2.phi,
                 self.phaseL.comp3.phi
-            ])
-        arr = np.array(res_all, dtype=float) # 全ての点のデータをnumpy配列に変換
-        rich = arr[:, 0:3] # 0~1列目を抽出 -> ポリマーリッチ相の良溶媒とポリマー
-        lean = arr[:, 3:] # 2列目を抽出 -> ポリマーリーン相の良溶媒
+            ]
+
+    def binodalIter(self, phaseL_phi3, method: str = 'SLSQP', solver: str = 'minimize', x0: list = None,
+                    variables: str = 'linear', progress=printProgress, path: str = None):
+        """binodalの逐次版. ポリマーリーン相のポリマー体積分率ごとにタイラインを解き,
+           収束したタイラインを計算した順に1本ずつ返すジェネレータ
+           最後の点まで待たずに途中の結果をプロットやファイルへの保存に使える.
+           計算の記録はself.log, 残差と反復回数はself.residual_list, self.nit_listに格納する
+
+        Args:
+            phaseL_phi3 (np.ndarray): ポリマーリーン相のポリマー体積分率
+            method (str, optional): binodalと同じscipy.optimize.minimizeのメソッド. Defaults to 'SLSQP'.
+            solver (str, optional): binodalと同じソルバー ('minimize'または'root'). Defaults to 'minimize'.
+            x0 (list, optional): 'root'で最初の点に用いる初期値. Defaults to None.
+            variables (str, optional): binodalと同じ探索変数. Defaults to 'linear'.
+            progress (function, optional): 1点計算するたびに呼ぶ関数 progress(i, record).
+                                           Noneなら何もしない. Defaults to printProgress.
+            path (str, optional): 収束したタイラインを1行ずつ追記するCSVファイルのパス. 既存のファイルは計算の開始時に上書きする.
+                                  列はTIE_COLUMNS, 'phi3', 'residual'. Noneなら保存しない. Defaults to None.
+
+        Yields:
+            tuple[int, np.ndarray]: 点の番号, タイラインの重量分率 (ポリマーリッチ相, ポリマーリーン相)
+        """
+        if not solver in ["minimize", "root"]:
+            print(f"対応しないソルバーです. solver = {solver}", file=sys.stderr)
+            raise ValueError
+        if not variables in VARIABLES:
+            print(f"対応しない探索変数です. variables = {variables}", file=sys.stderr)
+            raise ValueError
+        self.log = SolverLog(progress)
+        if path is not None:
+            _startCSV(path, TIE_COLUMNS + ['phi3', 'residual'])
+        for i, phis in enumerate(self.__iterBinodal(phaseL_phi3, method, solver, x0, variables)):
+            record = self.log.records[-1]
+            if not record['success'] or np.any(np.isnan(phis)):
+                continue
+            ws = self.__tieLinesToWs(np.array([phis])).reshape(6)
+            if path is not None:
+                _appendCSV(path, [*ws, record['phi3'], record['residual']])
+            yield i, ws
+
+    def __cached(self, calc, **settings) -> np.ndarray:
+        """self.cacheがあれば系の定義と計算条件をキーとしてキャッシュから結果を読み込み,
+           無ければcalcで計算して保存する. residual_list, nit_list, critical_point, logも復元する
+
+        Args:
+            calc (function): 重量分率の配列を返す計算関数
+            **settings: キーに含める計算条件
+
+        Returns:
+            np.ndarray: calcの結果
+        """
+        if self.cache is None:
+            return calc()
+        key = self.cache.key(phase=self.phaseR.toDict(), **settings)
+        cached = self.cache.get(key)
+        if cached is not None and "log" in cached:
+            self.log.loadArray(cached["log"])
+            self.residual_list = self.log.column('residual')
+            self.nit_list = self.log.column('nit')
+            self.critical_point = cached["critical_point"] if len(cached["critical_point"]) > 0 else None
+            return cached["ws"]
+        ws = calc()
+        self.cache.put(key, ws=ws, log=self.log.toArray(),
+                       critical_point=np.array([] if self.critical_point is None else self.critical_point,
+                                               dtype=float))
+        return ws
+
+    def __continuationSeeds(self, phaseL_phi3: np.ndarray) -> list:
+        """連続法で追跡したタイラインをlog(φ3L)について線形補間し, 初期値を作る
+
+        Args:
+            phaseL_phi3 (np.ndarray): ポリマーリーン相のポリマー体積分率
+
+        Returns:
+            list: 各点の初期値 (良溶媒体積分率R, ポリマー体積分率R, 良溶媒体積分率L)
+                  追跡した範囲の外の点はNone
+        """
+        if self.__seed_trace is None:
+            # 計算中の結果(residual_listなど)を上書きしないよう別のオブジェクトで追跡する
+            ws = TernaryBinodal(self.phaseR, self.cache).binodalContinuation(include_critical=False)
+            # 重量分率を体積分率に戻す
+            rho_arr = np.array([self.phaseR.comp1.rho,
+                                self.phaseR.comp2.rho,
+                                self.phaseR.comp3.rho], dtype=float)
+            phis = ws / rho_arr
+            phis = phis / np.sum(phis, axis=1, keepdims=True)
+            self.__seed_trace = np.split(phis, 2)
+        rich, lean = self.__seed_trace
+        log_phi3L = np.log(lean[:, 2])
+        x0s = []
+        for phi3 in phaseL_phi3:
+            log_phi3 = np.log(phi3)
+            if log_phi3 < log_phi3L[0] or log_phi3 > log_phi3L[-1]:
+                x0s.append(None)
+                continue
+            x0s.append(np.array([np.interp(log_phi3, log_phi3L, rich[:, 1]),
+                                 np.interp(log_phi3, log_phi3L, rich[:, 2]),
+                                 np.interp(log_phi3, log_phi3L, lean[:, 1])]))
+        return x0s
+
+    def __tieLinesToWs(self, arr: np.ndarray) -> np.ndarray:
+        """タイラインの体積分率配列を, リッチ相とリーン相を縦に結合した重量分率配列に変換する
+
+        Args:
+            arr (np.ndarray): (N,6)配列 ポリマーリッチ相, ポリマーリーン相の体積分率
+
+        Returns:
+            np.ndarray: (2N,3)配列 ポリマーリッチ相, ポリマーリーン相の順に縦に結合した重量分率
+        """
+        rich = arr[:, 0:3] # 0~2列目を抽出 -> ポリマーリッチ相
+        lean = arr[:, 3:] # 3~5列目を抽出 -> ポリマーリーン相
         # リッチ相とリーン相のデータを縦に結合
         phis_arr = np.vstack((rich,lean))
+        return Composition(phis_arr, 'volume', self.phaseR.getComponents()).release('mass')
+
+    def binodalContinuation(self, phaseL_phi3_start: float = 1e-300,
+                            ds: float = 1e-2, ds_min: float = 1e-6, ds_max: float = 5e-2,
+                            max_angle: float = 10., crit_tol: float = 1e-3,
+                            max_points: int = 1000, include_critical: bool = True,
+                            progress=None, return_log: bool = False):
+        """擬似弧長接続法によりバイノーダル曲線を追跡する
+           ポリマーリーン相のポリマー体積分率がphaseL_phi3_startのタイラインから出発し,
+           直前のタイラインを初期値として組成空間上の弧長に沿って進む.
+           曲線の曲がりが大きい所やニュートン法の収束が遅い所では刻みを小さく,
+           平坦な所では刻みを大きくする.
+           タイラインの長さがcrit_tol未満になるか, ポリマーリーン相のポリマー体積分率が
+           臨界点(TernaryCriticalで求める)に達したところで追跡を終了する.
+           探索変数は (φ2R, φ3R, φ2L, ln φ3L) で, 弧長は体積分率の変化量で測る.
+           出発点で解が求まらない場合はφ3Lを大きくして出発点を探し,
+           そこからphaseL_phi3_startまで逆向きにも追跡する.
+
+        Args:
+            phaseL_phi3_start (float, optional): 出発点のポリマーリーン相のポリマー体積分率. Defaults to 1e-300.
+            ds (float, optional): 弧長刻みの初期値. Defaults to 1e-2.
+            ds_min (float, optional): 弧長刻みの最小値. これを下回ると追跡を打ち切る. Defaults to 1e-6.
+            ds_max (float, optional): 弧長刻みの最大値. Defaults to 5e-2.
+            max_angle (float, optional): 連続する接線ベクトルがなす角の許容最大値 [deg]. Defaults to 10..
+            crit_tol (float, optional): 臨界点とみなすタイラインの長さ. Defaults to 1e-3.
+            max_points (int, optional): 最大点数. Defaults to 1000.
+            include_critical (bool, optional): 臨界点を長さ0のタイラインとして最後に加えるかどうか. Defaults to True.
+            progress (function, optional): 追跡後に1点ごとに呼ぶ関数 progress(i, record). Defaults to None.
+            return_log (bool, optional): Trueなら計算の記録(SolverLog)も返す. 各点の計算時間と評価回数は,
+                                         直前に採用した点からの(刻みを小さくしてやり直した分を含む)値. Defaults to False.
+
+        Returns:
+            np.ndarray: (2N,3)配列 ポリマーリッチ相, ポリマーリーン相の順に縦に結合した重量分率
+        """
+        self.log = SolverLog(progress)
+        settings = dict(phaseL_phi3_start=phaseL_phi3_start, ds=ds, ds_min=ds_min, ds_max=ds_max,
+                        max_angle=max_angle, crit_tol=crit_tol, max_points=max_points,
+                        include_critical=include_critical)
+        ws = self.__cached(lambda: self.__calcBinodalContinuation(**settings),
+                           kind="binodalContinuation", **settings)
+        return (ws, self.log) if return_log else ws
+
+    def __calcBinodalContinuation(self, phaseL_phi3_start: float, ds: float, ds_min: float, ds_max: float,
+                                  max_angle: float, crit_tol: float, max_points: int,
+                                  include_critical: bool) -> np.ndarray:
+        """binodalContinuationの計算本体 (キャッシュを使わない)
+        """
+        self.log.start()
+        nfev, njev = self.nfev, self.njev
+        self.critical_point = self.__findCriticalPoint()
+        # 出発点のタイラインを求める
+        log_phi3_start = np.log(phaseL_phi3_start)
+        log_phi3 = log_phi3_start
+        for retry in range(20):
+            self.phaseL.comp3.phi = np.exp(log_phi3)
+            x, nit, _ = self.__rootPoint(use_continuation=False)
+            phis_RL = self.__phisRL(x, self.phaseL.comp3.phi)
+            if np.max(np.abs(self.residuals(x, self.phaseL.comp3.phi))) < 1e-10 \
+                and np.max(np.abs(phis_RL[0] - phis_RL[1])) > 1e-6:
+                break
+            log_phi3 *= 0.5 # ポリマーリーン相のポリマー体積分率を大きくして解き直す
+        else:
+            print("バイノーダル曲線の出発点が見つかりません. ", file=sys.stderr)
+            raise ValueError
+        z = np.append(x, log_phi3)
+        tangent = self.__tangent(z)
+        if tangent[3] < 0: # ポリマーリーン相のポリマー体積分率が増える向きに進む
+            tangent = - tangent
+        point = (phis_RL.ravel(), np.max(np.abs(self.__continuationResiduals(z))), nit,
+                 self.nfev - nfev, self.njev - njev, self.log.elapsed())
+        options = dict(ds=ds, ds_min=ds_min, ds_max=ds_max, max_angle=max_angle, crit_tol=crit_tol)
+        backward = []
+        if log_phi3 > log_phi3_start: # 出発点をずらした場合は貧溶媒側の端まで逆向きに追跡する
+            backward = self.__trace(z, -tangent, max_points, log_phi3_min=log_phi3_start, **options)
+        forward = self.__trace(z, tangent, max_points - len(backward) - 1, **options)
+        points = backward[::-1] + [point] + forward
+        if self.critical_point is None:
+            # 臨界点の推定値 (最後のタイラインの中点, 体積分率)
+            self.critical_point = 0.5 * (points[-1][0][0:3] + points[-1][0][3:])
+        elif include_critical:
+            # 曲線を閉じるため, 臨界点を長さ0のタイラインとして加える
+            points.append((np.tile(self.critical_point, 2),
+                           np.max(np.abs(self.residuals(self.critical_point[[1, 2, 1]], self.critical_point[2]))),
+                           0, 0, 0, 0.))
+        for phis, residual, nit, nfev, njev, elapsed in points:
+            self.log.append(phis[5], nfev, njev, nit, residual, True, elapsed=elapsed)
+        arr = np.array([p[0] for p in points], dtype=float)
+        self.residual_list = self.log.column('residual')
+        self.nit_list = self.log.column('nit')
+        return self.__tieLinesToWs(arr)
+
+    def __trace(self, z: np.ndarray, tangent: np.ndarray, max_points: int,
+                ds: float, ds_min: float, ds_max: float, max_angle: float, crit_tol: float,
+                log_phi3_min: float = None) -> list:
+        """binodalContinuationにおいて, 解zから接線方向tangentにバイノーダル曲線を追跡する
+
+        Args:
+            z (np.ndarray): 出発点の解 (φ2R, φ3R, φ2L, ln φ3L)
+            tangent (np.ndarray): 進む向きの接線ベクトル
+            max_points (int): 最大点数
+            log_phi3_min (float, optional): ln φ3Lがこれを下回ったら終了する. Defaults to None.
+            その他の引数はbinodalContinuationに同じ
+
+        Returns:
+            list: 各点の (体積分率(6,), 残差, 反復回数, 関数評価回数, ヤコビ行列評価回数, 計算時間) のリスト
+                  (出発点を含まない)
+        """
+        points = []
+        self.log.start()
+        nfev, njev = self.nfev, self.njev
+        cos_max = np.cos(np.deg2rad(max_angle))
+        phis_RL = self.__phisRL(z[:3], np.exp(z[3]))
+        while len(points) < max_points:
+            tie_length = np.linalg.norm(phis_RL[0] - phis_RL[1])
+            if tie_length < crit_tol:
+                break
+            if log_phi3_min is None and self.critical_point is not None \
+                and phis_RL[1, 2] >= self.critical_point[2]:
+                break
+            # 臨界点付近で自明解に落ちないよう, 刻みをタイラインの長さで制限する
+            h = min(ds, 0.5 * tie_length)
+            z_new, nit = self.__correct(z, tangent, h)
+            if z_new is not None:
+                tangent_new = self.__tangent(z_new)
+                if self.__metricDot(z_new, tangent_new, tangent) < 0:
+                    tangent_new = - tangent_new
+                phis_new = self.__phisRL(z_new[:3], np.exp(z_new[3]))
+                crossed = phis_new[0, 2] <= phis_new[1, 2] # 臨界点を越えてリッチ相とリーン相が入れ替わった
+            if z_new is None or crossed \
+                or self.__metricDot(z_new, tangent_new, tangent) < cos_max:
+                # 収束しない, 臨界点を越えた, または曲がりが大きい場合は刻みを小さくしてやり直す
+                ds *= 0.5
+                if ds < ds_min:
+                    if log_phi3_min is None:
+                        print("弧長刻みが最小値を下回ったため追跡を終了します. ", file=sys.stderr)
+                    break
+                continue
+            if log_phi3_min is not None and z_new[3] < log_phi3_min:
+                break
+            z, tangent, phis_RL = z_new, tangent_new, phis_new
+            points.append((phis_RL.ravel(), np.max(np.abs(self.__continuationResiduals(z))), nit,
+                           self.nfev - nfev, self.njev - njev, self.log.elapsed()))
+            self.log.start()
+            nfev, njev = self.nfev, self.njev
+            # ニュートン法の反復回数に応じて刻みを調整する
+            if nit <= 3:
+                ds = min(ds * 1.5, ds_max)
+            elif nit >= 6:
+                ds = max(ds * 0.7, ds_min)
+        return points
+
+    def __continuationResiduals(self, z: np.ndarray) -> np.ndarray:
+        """探索変数 (φ2R, φ3R, φ2L, ln φ3L) に対する (f1, s*f2, r*f3)
+        """
+        return self.residuals(z[:3], np.exp(z[3]))
+
+    def __continuationJacobian(self, z: np.ndarray) -> np.ndarray:
+        """探索変数 (φ2R, φ3R, φ2L, ln φ3L) に関する (f1, s*f2, r*f3) の(3,4)ヤコビ行列
+        """
+        self.njev += 1
+        phaseL_phi3 = np.exp(z[3])
+        grads = self.phaseR.muRTGrads(self.__phisRL(z[:3], phaseL_phi3))
+        jac = np.hstack((grads[0], -grads[1][:, 0:1], -grads[1][:, 1:2] * phaseL_phi3))
+        return jac * self.__weights()[:, None]
+
+    def __metric(self, z: np.ndarray) -> np.ndarray:
+        """弧長を体積分率の変化量で測るための計量 diag(1, 1, 1, φ3L^2)
+        """
+        return np.array([1., 1., 1., np.exp(2 * z[3])])
+
+    def __metricDot(self, z: np.ndarray, u: np.ndarray, v: np.ndarray) -> float:
+        return np.sum(self.__metric(z) * u * v)
+
+    def __tangent(self, z: np.ndarray) -> np.ndarray:
+        """バイノーダル曲線の接線ベクトル(ヤコビ行列の零空間)を計量で規格化して返す
+        """
+        jac = self.__continuationJacobian(z)
+        tangent = np.linalg.svd(jac)[2][-1]
+        return tangent / np.sqrt(self.__metricDot(z, tangent, tangent))
+
+    def __correct(self, z: np.ndarray, tangent: np.ndarray, h: float,
+                  tol: float = 1e-10, max_iter: int = 10) -> tuple[np.ndarray, int]:
+        """予測子 z + h*tangent から, 接線に垂直な超平面上でニュートン法により修正する
+
+        Args:
+            z (np.ndarray): 直前の解
+            tangent (np.ndarray): 直前の解における接線ベクトル
+            h (float): 弧長刻み
+            tol (float, optional): 収束とみなす残差の最大絶対値. Defaults to 1e-10.
+            max_iter (int, optional): 最大反復回数. Defaults to 10.
+
+        Returns:
+            tuple[np.ndarray, int]: 修正後の解(収束しなかった場合はNone), 反復回数
+        """
+        z_pred = z + h * tangent
+        normal = self.__metric(z) * tangent
+        z_new = z_pred.copy()
+        lb, ub = np.array(self.bnds).T
+        for nit in range(1, max_iter + 1):
+            f = np.append(self.__continuationResiduals(z_new), normal @ (z_new - z_pred))
+            jac = np.vstack((self.__continuationJacobian(z_new), normal))
+            try:
+                dz = np.linalg.solve(jac, -f)
+            except np.linalg.LinAlgError:
+                return None, nit
+            z_new = z_new + dz
+            phis_RL = self.__phisRL(z_new[:3], np.exp(z_new[3]))
+            if np.any(z_new[:3] < lb) or np.any(z_new[:3] > ub) or np.any(phis_RL <= 0.) \
+                or z_new[3] >= 0.:
+                return None, nit
+            if np.max(np.abs(self.__continuationResiduals(z_new))) < tol:
+                if np.max(np.abs(phis_RL[0] - phis_RL[1])) < 1e-8:
+                    return None, nit # 自明解(リッチ相=リーン相)に落ちた
+                return z_new, nit
+        return None, max_iter
 
-        # 各成分の密度を縦ベクトル化
-        rho_arr = np.array([self.phaseR.comp1.rho,
-                            self.phaseR.comp2.rho,
-                            self.phaseR.comp3.rho], dtype=float)
-        rho_arr_tile = np.tile(rho_arr, reps=(len(phis_arr),1))
+    def binodalHull(self, n: int = 200, min_length: float = 0.1, polish: bool = True, tol: float = 1e-10,
+                    progress=None, return_log: bool = False):
+        """混合自由エネルギーの下側凸包 (TernaryHull) からタイラインを一括で求める
+           初期値が要らず, 自明解に落ちることもない. polishがTrueなら凸包のタイラインを初期値とし,
+           ポリマーリッチ相のポリマー体積分率を固定して (φ2R, φ2L, ln φ3L) についてケミカルポテンシャルの
+           等式を解き直す. ポリマーリーン相のポリマー体積分率が格子間隔より小さい系でも解ける
 
-        # 各点における単位体積当たりの総質量ベクトルを作成し3列に拡張(複製)
-        mass_arr_tile = np.tile(np.dot(phis_arr, rho_arr[:,None]), 3)
-        # 質量分率で表した配列
-        ws_arr = phis_arr * rho_arr_tile / mass_arr_tile
-        return ws_arr
+        Args:
+            n (int, optional): 格子の分割数. Defaults to 200.
+            min_length (float, optional): TernaryHull.phaseSplitの3相とみなす辺の長さの最小値. Defaults to 0.1.
+            polish (bool, optional): 凸包のタイラインを解き直すかどうか. Defaults to True.
+            tol (float, optional): 収束とみなす残差の最大絶対値. Defaults to 1e-10.
+            progress (function, optional): 1点計算するたびに呼ぶ関数 progress(i, record). Defaults to None.
+            return_log (bool, optional): Trueなら計算の記録(SolverLog)も返す. Defaults to False.
+
+        Returns:
+            np.ndarray: (2N,3)配列 ポリマーリッチ相, ポリマーリーン相の順に縦に結合した重量分率
+                        (ポリマーリーン相のポリマー体積分率の小さい順. 解き直しに失敗した点はNaN)
+        """
+        self.log = SolverLog(progress)
+        ws = self.__cached(lambda: self.__calcBinodalHull(n, min_length, polish, tol),
+                           kind="binodalHull", n=n, min_length=min_length, polish=polish, tol=tol)
+        return (ws, self.log) if return_log else ws
+
+    def __calcBinodalHull(self, n: int, min_length: float, polish: bool, tol: float) -> np.ndarray:
+        """binodalHullの計算本体 (キャッシュを使わない)
+        """
+        self.log.start()
+        tie_lines, _ = TernaryHull(self.phaseR).phaseSplit(n, min_length)
+        if polish:
+            # 同じリッチ相の点を共有するタイラインは同じ解に収束するので1本にする
+            _, first = np.unique(tie_lines[:, 0:3], axis=0, return_index=True)
+            tie_lines, residuals, nit, nfev, njev, success = self.__polishTieLines(tie_lines[np.sort(first)], tol)
+        else:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mus = self.phaseR.muRTs(tie_lines.reshape(-1, 2, 3))
+            residuals = np.max(np.abs((mus[:, 0] - mus[:, 1]) * self.__weights()), axis=1)
+            nit = nfev = njev = np.zeros(len(tie_lines), dtype=int)
+            success = np.ones(len(tie_lines), dtype=bool)
+        # 一括計算なので計算時間は点数で等分する
+        elapsed = self.log.elapsed() / max(len(tie_lines), 1)
+        order = np.argsort(tie_lines[:, 5], kind='stable') # 失敗した点(NaN)は最後
+        for i in order:
+            self.log.append(tie_lines[i, 5], nfev[i], njev[i], nit[i], residuals[i], success[i], elapsed=elapsed)
+        self.residual_list = self.log.column('residual')
+        self.nit_list = self.log.column('nit')
+        return self.__tieLinesToWs(tie_lines[order])
+
+    def __polishTieLines(self, tie_lines: np.ndarray, tol: float,
+                         max_iter: int = 50) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """凸包から求めたタイラインを初期値とし, ポリマーリッチ相のポリマー体積分率を固定して
+           (φ2R, φ2L, ln φ3L) について (f1, s*f2, r*f3) = 0 を全てのタイラインについて一括で
+           ニュートン法で解く. ポリマーリーン相はPhase.muRTsLogで体積分率の対数から計算する
+
+        Args:
+            tie_lines (np.ndarray): (N,6)配列 ポリマーリッチ相, ポリマーリーン相の体積分率
+            tol (float): 収束とみなす残差の最大絶対値
+            max_iter (int, optional): 最大反復回数. Defaults to 50.
+
+        Returns:
+            tuple: (N,6)配列の体積分率(収束しなかった点はNaN. φ3Lが浮動小数点数の範囲より小さい場合は0),
+                   各点の残差の最大絶対値, 反復回数, 残差の評価回数, ヤコビ行列の評価回数, 収束したかどうか
+        """
+        phi3R = tie_lines[:, 2]
+        weights = self.__weights()
+        log_tiny = np.log(np.finfo(float).tiny)
+
+        def split(w, phi3R):
+            # w = (φ2R, φ2L, ln φ3L) からリッチ相の体積分率とリーン相の体積分率の対数を求める
+            phisR = np.stack((1. - w[:, 0] - phi3R, w[:, 0], phi3R), axis=-1)
+            phi3L = np.exp(w[:, 2])
+            log_phisL = np.stack((np.log1p(-w[:, 1] - phi3L), np.log(w[:, 1]), w[:, 2]), axis=-1)
+            return phisR, log_phisL
+
+        def residual(w, phi3R):
+            # 残差(N,3)
+            phisR, log_phisL = split(w, phi3R)
+            self.nfev += len(w)
+            return (self.phaseR.muRTs(phisR) - self.phaseR.muRTsLog(log_phisL)) * weights
+
+        def jacobian(w, phi3R):
+            # ヤコビ行列(N,3,3) (直線探索では使わないので, 受け入れた点だけで計算する)
+            phisR, log_phisL = split(w, phi3R)
+            self.njev += len(w)
+            gradsR = self.phaseR.muRTGrads(phisR)
+            gradsL = self.phaseR.muRTGradsLog(log_phisL)
+            jac = np.stack((gradsR[..., 0], -gradsL[..., 0] / w[:, 1:2], -gradsL[..., 1]), axis=-1)
+            return jac * weights[:, None]
+
+        # ln φ3Lの初期値: Δμ3 = ln φ3 + (φ3 -> 0 で有限の項) を用いて, ポリマーの等式から見積もる
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mu3R = self.phaseR.muRTs(tie_lines[:, 0:3])[:, 2]
+            lean = np.stack((np.log1p(-tie_lines[:, 4]), np.log(tie_lines[:, 4]), np.full(len(tie_lines), log_tiny)), axis=-1)
+            log_phi3L = mu3R - (self.phaseR.muRTsLog(lean)[:, 2] - log_tiny)
+        lb, ub = self.bnds[0]
+        w = np.column_stack((np.clip(tie_lines[:, 1], lb, ub), np.clip(tie_lines[:, 4], lb, ub),
+                             np.clip(np.nan_to_num(log_phi3L, nan=log_tiny), log_tiny, np.log(phi3R))))
+        nit = np.zeros(len(w), dtype=int)
+        nfev = np.ones(len(w), dtype=int)
+        njev = np.ones(len(w), dtype=int)
+        active = np.ones(len(w), dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            f, jac = residual(w, phi3R), jacobian(w, phi3R)
+            for _ in range(max_iter):
+                active &= ~(np.max(np.abs(f), axis=1) < tol) & np.all(np.isfinite(f), axis=1)
+                if not np.any(active):
+                    break
+                nit[active] += 1
+                idx = np.flatnonzero(active)
+                try:
+                    dw = np.linalg.solve(jac[idx], -f[idx][..., None])[..., 0]
+                except np.linalg.LinAlgError:
+                    break
+                # 組成が単体の外に出ず, 残差が減るまで刻みを半分にする
+                norm = np.linalg.norm(f[idx], axis=1)
+                step = np.ones(len(dw))
+                for _ in range(10):
+                    w_new = w[idx] + step[:, None] * dw
+                    f_new = residual(w_new, phi3R[idx])
+                    nfev[idx] += 1
+                    ok = (w_new[:, 0] > 0) & (w_new[:, 1] > 0) & (w_new[:, 0] + phi3R[idx] < 1) \
+                       & (w_new[:, 1] + np.exp(w_new[:, 2]) < 1) & (w_new[:, 2] < 0) \
+                       & (np.linalg.norm(f_new, axis=1) < norm)
+                    if np.all(ok):
+                        break
+                    step[~ok] *= 0.5
+                # 刻みを小さくしても残差が減らない点は打ち切る
+                accepted, stalled = idx[ok], idx[~ok]
+                w[accepted], f[accepted] = w_new[ok], f_new[ok]
+                if len(accepted) > 0:
+                    jac[accepted] = jacobian(w[accepted], phi3R[accepted])
+                    njev[accepted] += 1
+                active[stalled] = False
+        phis = np.column_stack((1. - w[:, 0] - phi3R, w[:, 0], phi3R,
+                                1. - w[:, 1] - np.exp(w[:, 2]), w[:, 1], np.exp(w[:, 2])))
+        residuals = np.max(np.abs(f), axis=1)
+        success = (residuals < tol) & (np.max(np.abs(phis[:, 0:3] - phis[:, 3:6]), axis=1) > 1e-6)
+        phis[~success] = np.nan
+        residuals[~success] = np.nan
+        return phis, residuals, nit, nfev, njev, success
 
     def tieLineFromBinodal(self, binodal_arr):
         """
@@ -229,6 +1781,18 @@ class TernaryBinodal:
             tie_arr = np.hstack((rich, lean))
             return tie_arr
 
+    def tieLineIndex(self, binodal_arr: np.ndarray) -> TieLineIndex:
+        """バイノーダルの計算結果から, 全体組成を通るタイラインを探す索引を作る
+
+        Args:
+            binodal_arr (np.ndarray): (2N,3)配列 ポリマーリッチ相, ポリマーリーン相の順に縦に結合した組成
+                                      (binodal, binodalHullなどの結果)
+
+        Returns:
+            TieLineIndex: タイラインの索引
+        """
+        return TieLineIndex(self.tieLineFromBinodal(binodal_arr))
+
 
 if __name__ == "__main__":
     # n_solvent = Component(18, 1., "Water")
@@ -253,40 +1817,48 @@ if __name__ == "__main__":
     n_solvent = Component(18, 1., "Water")
     solvent   = Component(71.29, 1.03, "NMP")
     polymer   = Component(20270, 1.24, "PSF")
-    # phase_init = Phase(n_solvent, solvent, polymer, lambda x, y :  0.785 + y/(x+y) * 0.665, 0.24, 2.5)
+    # phase_init = Phase(n_solvent, solvent, polymer, YipMcHughChi(0.785, 0.665), 0.24, 2.5)
     phase_init = Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, 2.5)
 
-    binodal_system    = TernaryBinodal(phase_init)
-    spinodal_system    = TernarySpinodal(phase_init)
+    cache = ResultCache() # 系の定義と計算条件が同じなら前回の計算結果を使う
+    binodal_system    = TernaryBinodal(phase_init, cache)
+    spinodal_system    = TernarySpinodal(phase_init, cache)
 
     # バイノーダル曲線の計算
+    # 擬似弧長接続法で臨界点まで追跡する
     binodal = pd.DataFrame(
-        binodal_system.binodal(
+        binodal_system.binodalContinuation()
+        # binodal_system.binodal(
             # np.hstack((np.logspace(-38, -2.5, 60),np.logspace(-2.5, -1.2, 6)))) # CA/Acetone/H2O
             # np.hstack((np.logspace(-300, -2.5, 60),np.logspace(-2.3, -2.1, 3)))) # EVAL/DMSO/H2O
-            np.hstack((np.logspace(-300, -2.5, 200),np.logspace(-2.4, -1.9, 4)))) # PSF/NMP/H2O
-                        , columns = ['貧溶媒', '良溶媒', 'ポリマー'])
-    binodal.to_excel("binodal.xlsx")
-    tie = pd.DataFrame(binodal_system.tieLineFromBinodal(binodal.values), columns = ['R貧溶媒', 'R良溶媒', 'Rポリマー', 'L貧溶媒', 'L良溶媒', 'Lポリマー'])
-    tie.to_excel("tie_line.xlsx")
+            # np.hstack((np.logspace(-300, -2.5, 200),np.logspace(-2.4, -1.9, 4)))) # PSF/NMP/H2O
+                        , columns = WS_COLUMNS)
+    tie = pd.DataFrame(binodal_system.tieLineFromBinodal(binodal.values), columns = TIE_COLUMNS)
+    # 系の定義と計算条件を付けてバイナリ形式で保存する (Excelは報告用に最後に書き出す)
+    settings = {"method": "binodalContinuation"}
+    saveResult("binodal.npy", binodal, 'binodal', phase_init, settings)
+    saveResult("tie_line.npy", tie, 'tie_line', phase_init, settings)
+    # loadResult("tie_line.npy").exportExcel("tie_line.xlsx")
+    # 点ごとに解きながら, 収束したタイラインをCSVに追記する (途中の結果もすぐに読み込める)
+    # for i, tie_ws in binodal_system.binodalIter(np.logspace(-300, -2.5, 200), solver="root",
+    #                                             variables="log", path="tie_line.csv"):
+    #     pass
 
     # スピノーダル曲線の計算
     # spinodal = pd.DataFrame(
     #     spinodal_system.spinodal(
     #         np.linspace(0.001, 0.6, 100))
-    #                     , columns = ['貧溶媒', '良溶媒', 'ポリマー'])
-    # spinodal.to_excel("spinodal.xlsx")
+    #                     , columns = WS_COLUMNS)
+    # saveResult("spinodal.npy", spinodal, 'spinodal', phase_init)
 
     tr = Ternary(polymer.name, solvent.name, n_solvent.name)
-    # タイラインのプロット
-    tie = pd.read_excel("tie_line.xlsx")
+    # タイラインのプロット (計算結果をファイルから読み直さずにそのまま使う)
     tr.tieLine(tie["Rポリマー"], tie["R良溶媒"], tie["R貧溶媒"],
                tie["Lポリマー"], tie["L良溶媒"], tie["L貧溶媒"])
     # スピノーダルラインのプロット
-    # spinodal = pd.read_excel("spinodal.xlsx")
+    # spinodal = loadResult("spinodal.npy").dataFrame()
     # tr.spinodalLine(spinodal["ポリマー"], spinodal["良溶媒"], spinodal["貧溶媒"], "スピノーダル")
     # バイノーダルラインのプロット
-    binodal = pd.read_excel("binodal.xlsx")
     tr.binodalLine(binodal["ポリマー"], binodal["良溶媒"], binodal["貧溶媒"], "バイノーダル")
 
     prefix = "{}_{}_{}".format(polymer.name, solvent.name, n_solvent.name)
@@ -0,0 +1,134 @@
+import sys
+import numpy as np
+
+class TieLineIndex:
+    """計算済みのタイラインから, 2相領域内の全体組成を通るタイラインと
+       共存する2相の組成, てこの規則による相の分率を一括で求めるクラス
+       タイラインは互いに交わらないので, 全体組成がバイノーダルに沿って並べたタイラインの
+       どちら側にあるかは一度だけ切り替わる. この切り替わりを二分探索 (1点あたりO(log n)) で探し,
+       隣り合う2本のタイラインの端点を線形補間して全体組成を通るタイラインを求める
+    """
+    def __init__(self, tie_lines: np.ndarray):
+        """コンストラクタ
+
+        Args:
+            tie_lines (np.ndarray): (N,6)配列 (ポリマーリッチ相の組成, ポリマーリーン相の組成).
+                                    バイノーダルに沿った順 (binodal, binodalHullなどの結果の順) に並べる.
+                                    重量分率でも体積分率でもよい (問い合わせる組成と相の分率は同じ基準になる).
+                                    NaNを含む行は除く
+        """
+        tie_lines = np.asarray(tie_lines, dtype=float)
+        if tie_lines.ndim != 2 or tie_lines.shape[1] != 6:
+            print(f"タイラインは(N,6)配列にしてください. shape = {tie_lines.shape}", file=sys.stderr)
+            raise ValueError
+        tie_lines = tie_lines[~np.any(np.isnan(tie_lines), axis=1)]
+        if len(tie_lines) < 2:
+            print("タイラインが2本以上必要です", file=sys.stderr)
+            raise ValueError
+        self.rich = tie_lines[:, 0:3] # ポリマーリッチ相の組成
+        self.lean = tie_lines[:, 3:6] # ポリマーリーン相の組成
+
+    def __len__(self) -> int:
+        return len(self.rich)
+
+    def __cross(self, i: np.ndarray, points: np.ndarray) -> np.ndarray:
+        """i番目のタイライン (リッチ相からリーン相への向き) と全体組成の外積
+           (良溶媒, ポリマーの2次元. 正なら全体組成はタイラインの左側)
+        """
+        r, l = self.rich[i][:, 1:], self.lean[i][:, 1:]
+        d, e = l - r, points[:, 1:] - r
+        return d[:, 0]*e[:, 1] - d[:, 1]*e[:, 0]
+
+    def locate(self, compositions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """全体組成を挟む隣り合う2本のタイラインと, 全体組成を通るタイラインの補間の割合を求める
+
+        Args:
+            compositions (np.ndarray): (M,3)配列 全体組成 (貧溶媒, 良溶媒, ポリマー)
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: タイラインの番号i (M,)配列, 補間の割合t (M,)配列.
+                                           全体組成を通るタイラインは i番目と i+1番目を t : 1-t に内分したもの.
+                                           タイラインの範囲外の組成は i = -1, t = NaN
+        """
+        points = np.atleast_2d(np.asarray(compositions, dtype=float))
+        m, n = len(points), len(self)
+        # 両端のタイライン上の組成 (外積が丸め誤差程度) は範囲内とする
+        cross0 = self.__cross(np.zeros(m, dtype=int), points)
+        cross1 = self.__cross(np.full(m, n - 1), points)
+        side0 = np.where(np.abs(cross0) <= 1e-14, cross1 <= 0., cross0 > 0.)
+        side1 = np.where(np.abs(cross1) <= 1e-14, ~side0, cross1 > 0.)
+        inside = side0 != side1
+        # 全ての点で同時に二分探索する (loとhiでタイラインに対する左右が異なる状態を保つ)
+        lo, hi = np.zeros(m, dtype=int), np.full(m, n - 1)
+        while True:
+            active = inside & (hi - lo > 1)
+            if not np.any(active):
+                break
+            mid = (lo + hi) // 2
+            same = (self.__cross(mid, points) > 0.) == side0
+            lo = np.where(active & same, mid, lo)
+            hi = np.where(active & ~same, mid, hi)
+
+        # i番目とi+1番目の端点を割合tで補間したタイラインが全体組成を通る条件 (tの2次方程式)
+        r0, l0 = self.rich[lo][:, 1:], self.lean[lo][:, 1:]
+        dr = self.rich[hi][:, 1:] - r0
+        dd = self.lean[hi][:, 1:] - l0 - dr
+        d0, e0 = l0 - r0, points[:, 1:] - r0
+        def cross(u, v):
+            return u[:, 0]*v[:, 1] - u[:, 1]*v[:, 0]
+        a = -cross(dd, dr)
+        b = cross(dd, e0) - cross(d0, dr)
+        c = cross(d0, e0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # 桁落ちを避ける形の解の公式 (a = 0の場合も1次方程式の根が得られる)
+            sq = np.sqrt(np.maximum(b**2 - 4*a*c, 0.))
+            q = -0.5*(b + np.where(b >= 0., sq, -sq))
+            roots = np.stack((q/a, c/q), axis=-1)
+        # 区間[0, 1]に最も近い根を選ぶ
+        distance = np.abs(roots - np.clip(roots, 0., 1.))
+        distance[~np.isfinite(roots)] = np.inf
+        t = np.clip(np.take_along_axis(roots, np.argmin(distance, axis=1)[:, None], axis=1)[:, 0], 0., 1.)
+        t[np.all(~np.isfinite(roots), axis=1)] = 0. # 全体組成が端点に一致する場合
+        return np.where(inside, lo, -1), np.where(inside, t, np.nan)
+
+    def split(self, compositions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """全体組成から共存する2相の組成と, てこの規則によるポリマーリッチ相の分率を求める
+           全体組成 = β (リッチ相の組成) + (1 - β) (リーン相の組成)
+
+        Args:
+            compositions (np.ndarray): (M,3)配列 全体組成 (貧溶媒, 良溶媒, ポリマー)
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: ポリマーリッチ相の組成 (M,3)配列, ポリマーリーン相の組成 (M,3)配列,
+                                                       ポリマーリッチ相の分率β (M,)配列.
+                                                       2相領域の外の組成はNaN
+        """
+        points = np.atleast_2d(np.asarray(compositions, dtype=float))
+        i, t = self.locate(points)
+        inside = i >= 0
+        j = np.maximum(i, 0)
+        k = np.minimum(j + 1, len(self) - 1)
+        t = np.nan_to_num(t)[:, None]
+        rich = (1 - t)*self.rich[j] + t*self.rich[k]
+        lean = (1 - t)*self.lean[j] + t*self.lean[k]
+        # てこの規則 (全体組成をタイラインに射影する)
+        d = rich - lean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = np.sum((points - lean)*d, axis=1) / np.sum(d**2, axis=1)
+        # タイラインの線分の外 (バイノーダルの外側の1相領域) の組成は除く
+        inside &= (beta >= -1e-9) & (beta <= 1. + 1e-9)
+        rich[~inside] = np.nan
+        lean[~inside] = np.nan
+        beta = np.where(inside, np.clip(beta, 0., 1.), np.nan)
+        return rich, lean, beta
+
+    def contains(self, compositions: np.ndarray) -> np.ndarray:
+        """全体組成が計算済みのタイラインの範囲の2相領域内にあるかどうか
+
+        Args:
+            compositions (np.ndarray): (M,3)配列 全体組成 (貧溶媒, 良溶媒, ポリマー)
+
+        Returns:
+            np.ndarray: (M,)配列 2相領域内ならTrue
+        """
+        return ~np.isnan(self.split(compositions)[2])
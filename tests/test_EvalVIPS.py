@@ -1,7 +1,9 @@
 import unittest
 import sys
+import os
 sys.path.append(r"src")
 from eval_VIPS import EvalVIPS
+from ternary_data import TernaryData, BinodalFamily
 
 class TestVIPS1(unittest.TestCase):
     def setUp(self):
@@ -42,5 +44,34 @@ class TestVIPS1(unittest.TestCase):
         self.assertAlmostEqual(deviation_list[11], 0.004838893571703887)
         self.assertAlmostEqual(deviation_list[12], 0.0012167742657699426)
 
+class TestBinodalFamilyRange(unittest.TestCase):
+    def setUp(self):
+        self.evp = EvalVIPS()
+        self.evp.setDefaultParam(os.path.join("tests", "params_VIPS.yaml"))
+        ternary_data = TernaryData()
+        ternary_data.loadFitFunc(os.path.join("tests", "binodalFitFunc.pkl"))
+        self.evp.binodal_family = BinodalFamily()
+        self.evp.binodal_family.add(20., ternary_data)
+        self.evp.binodal_family.add(60., ternary_data)
+
+    def test_outOfRange(self):
+        # バイノーダル線の温度の範囲外のAG温度は判定できない
+        self.evp.vips.T_AG = 70.
+        with self.assertRaises(ValueError):
+            self.evp.communicate()
+        with self.assertRaises(ValueError):
+            self.evp.askPhaseSeparation([0.1, 0.6, 0.3])
+
+    def test_searchTc(self):
+        # 探索範囲はバイノーダル線の温度の範囲に狭め, 元のAG温度に戻す
+        T_AG = self.evp.vips.T_AG
+        Tc = self.evp.searchTc(15, 70)
+        self.assertTrue(20. <= Tc <= 60.)
+        self.assertEqual(self.evp.vips.T_AG, T_AG)
+        # 範囲内でVIPSの有無が変わらなければ例外
+        with self.assertRaises(ValueError):
+            self.evp.searchTc(15, 40)
+        self.assertEqual(self.evp.vips.T_AG, T_AG)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+import copy
+sys.path.append(r"src")
+import numpy as np
+from VIPS import VIPS
+
+class TestVIPSBatch(unittest.TestCase):
+    def setUp(self):
+        self.vips = VIPS()
+        param = self.vips.readParamFile(os.path.join("tests", "params_VIPS.yaml"))
+        param["Transport Properties"]["Air Velocity on Coagulation Bath"] = 0.5
+        self.vips.readParam(param)
+        self.columns = {"L_AG": [0.3, 0.1, 0.2, 0.05], "T_AG": [56., 30., 45., 70.],
+                        "do": [1.15e-03, 1.0e-03, 1.3e-03, 1.2e-03], "v": [20., 15., 30., 25.]}
+
+    def scalar(self, row: dict) -> VIPS:
+        # 1条件ずつreadParamで読み込み直したVIPS
+        param = copy.deepcopy(self.vips.current_param)
+        param["Air Gap"]["Length"] = row["L_AG"]
+        param["Air Gap"]["Temperature"] = row["T_AG"]
+        param["Fiber"]["Outer Diameter"] = row["do"]
+        param["Other Conditions"]["Spinning Speed"] = row["v"]
+        vips = VIPS()
+        vips.readParam(param)
+        return vips
+
+    def test_evaluateBatch(self):
+        result = self.vips.evaluateBatch(self.columns)
+        for i in range(4):
+            vips = self.scalar({name: val[i] for name, val in self.columns.items()})
+            L = vips.L_AG
+            expected = {"H_AG": vips.H_AG(L), "Psi1": vips.Psi1(L), "ww1": vips.ww1(L), "ww2": vips.ww2(L),
+                        "ww3": vips.ww3(L), "ReB": vips.ReB(), "Ref": vips.Ref(), "Sc": vips.Sc(),
+                        "Shf": vips.Shf(), "ShB": vips.ShB(), "k_f_approx": vips.k_f_approx()}
+            for name, val in expected.items():
+                self.assertAlmostEqual(result[name][i], val, places=12, msg=name)
+        np.testing.assert_allclose(result["ww1"] + result["ww2"] + result["ww3"], 1.)
+        # 現在のパラメータは変更しない
+        self.assertEqual(self.vips.current_param["Air Gap"]["Length"], 0.3)
+        # 位置zを与えるとその位置で評価する
+        z = self.vips.evaluateBatch({"T_AG": [40., 50.]}, z=0.)
+        np.testing.assert_allclose(z["Psi1"], 0.)
+
+    def test_outOfRange(self):
+        # 紡速が遅いと糸表面のレイノルズ数が適用範囲外になるが, 他の条件は計算を続ける
+        result = self.vips.evaluateBatch({"v": [20., 0.5], "uB": [0.5, 1.e+3]})
+        np.testing.assert_array_equal(result["Ref_out_of_range"], [False, True])
+        np.testing.assert_array_equal(result["ReB_out_of_range"], [False, True])
+        self.assertTrue(np.all(np.isnan(result["Shf"][1:])) and np.all(np.isnan(result["k_B_approx"][1:])))
+        self.assertTrue(np.all(np.isfinite(result["H_AG"])))
+        self.assertAlmostEqual(result["Shf"][0], self.vips.Shf(), places=12)
+        with self.assertRaises(Exception):
+            self.vips.v = 0.5
+            self.vips.Shf()
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.vips.evaluateBatch({"unknown": [1.]})
+        with self.assertRaises(ValueError):
+            self.vips.evaluateBatch({"L_AG": [0.1, 0.2], "T_AG": [30., 40., 50.]})
+
+if __name__ == "__main__":
+    unittest.main()
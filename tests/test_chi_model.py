@@ -0,0 +1,91 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from component import Component
+from phase import Phase
+from chi_model import (ChiModel, ConstantChi, YipMcHughChi, AltenaChi, PolynomialChi, UserChi,
+                       toChiModel)
+
+class TestChiModel(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        phis = rng.dirichlet([2., 2., 2.], size=10)
+        self.phi1, self.phi2 = phis[:, 0], phis[:, 1]
+        self.models = [
+            ConstantChi(1.1175),
+            YipMcHughChi(0.785, 0.665),
+            AltenaChi(0.5, 0.17, 0.7),
+            PolynomialChi([0.4, 0.2, -0.3], variable='phi3'),
+            PolynomialChi([1.0, 0.5, 0.8], variable='u2'),
+        ]
+
+    def test_val(self):
+        for model in self.models:
+            self.assertEqual(model.val(self.phi1, self.phi2).shape, self.phi1.shape)
+        np.testing.assert_allclose(self.models[1].val(self.phi1, self.phi2),
+                                   0.785 + self.phi2/(self.phi1 + self.phi2) * 0.665)
+
+    def test_derivative(self):
+        # 解析的な微分が中心差分と一致することを確認
+        for model in self.models:
+            np.testing.assert_allclose(model.grad(self.phi1, self.phi2),
+                                       ChiModel.grad(model, self.phi1, self.phi2), rtol=1e-6, atol=1e-8)
+            np.testing.assert_allclose(model.hess(self.phi1, self.phi2),
+                                       ChiModel.hess(model, self.phi1, self.phi2), rtol=1e-4, atol=1e-5)
+            np.testing.assert_allclose(model.deriv3(self.phi1, self.phi2),
+                                       ChiModel.deriv3(model, self.phi1, self.phi2), rtol=2e-3, atol=1e-5)
+
+    def test_toChiModel(self):
+        self.assertTrue(toChiModel(2.5).isConstant())
+        self.assertTrue(toChiModel(np.float32(2.5)).isConstant())
+        self.assertIsInstance(toChiModel(lambda x, y: x + y), UserChi)
+        model = YipMcHughChi(0.785, 0.665)
+        self.assertIs(toChiModel(model), model)
+        with self.assertRaises(ValueError):
+            toChiModel("2.5")
+
+    def test_toDict(self):
+        # 同じ定義なら同じ辞書, 異なる関数なら異なる辞書になる
+        self.assertEqual(YipMcHughChi(0.785, 0.665).toDict(), YipMcHughChi(0.785, 0.665).toDict())
+        self.assertNotEqual(UserChi(lambda x, y: 0.785 + y/(x+y) * 0.665).toDict(),
+                            UserChi(lambda x, y: 0.785 + y/(x+y) * 0.6).toDict())
+        # クロージャで捕捉した値が違えば異なる辞書になる
+        make = lambda a: lambda x, y: a + y/(x+y) * 0.665
+        self.assertNotEqual(UserChi(make(0.785)).toDict(), UserChi(make(0.9)).toDict())
+        self.assertEqual(UserChi(make(0.785)).toDict(), UserChi(make(0.785)).toDict())
+        # 識別できない値を捕捉した関数は, 他のどのモデルとも一致しない
+        table = object()
+        func = lambda x, y: 0.785 + 0. * id(table)
+        self.assertNotEqual(UserChi(func).toDict(), UserChi(func).toDict())
+
+    def test_fromDict(self):
+        # toDictの辞書から同じモデルを作り直せる
+        for model in self.models:
+            rebuilt = toChiModel(model.toDict())
+            self.assertEqual(rebuilt.toDict(), model.toDict())
+            np.testing.assert_allclose(rebuilt.val(self.phi1, self.phi2), model.val(self.phi1, self.phi2))
+        with self.assertRaises(ValueError):
+            toChiModel({"model": "UserChi"})
+
+class TestPhaseChiModel(unittest.TestCase):
+    def setUp(self):
+        self.comps = (Component(18, 1., "Water"), Component(71.29, 1.03, "NMP"), Component(20270, 1.24, "PSF"))
+        rng = np.random.default_rng(3)
+        self.phis = rng.dirichlet([2., 2., 2.], size=10)
+
+    def test_lambda(self):
+        # 関数を直接渡した場合とモデルを渡した場合で同じ結果になる
+        phase_model  = Phase(*self.comps, YipMcHughChi(0.785, 0.665), 0.24, 2.5)
+        phase_lambda = Phase(*self.comps, lambda x, y: 0.785 + y/(x+y) * 0.665, 0.24, 2.5)
+        self.assertFalse(phase_lambda.isConstantChi())
+        np.testing.assert_allclose(phase_lambda.muRTs(self.phis), phase_model.muRTs(self.phis))
+        # GGradsはχの3階微分を含むので, 関数の場合は2階微分の中心差分をさらに差分した近似になる
+        np.testing.assert_allclose(phase_lambda.GGrads(self.phis), phase_model.GGrads(self.phis),
+                                   rtol=1e-4, atol=1e-4)
+        phase_lambda.setPhis(*self.phis[0])
+        phase_model.setPhis(*self.phis[0])
+        self.assertAlmostEqual(phase_lambda.mu1RT(), phase_model.mu1RT())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(r"src")
+import numpy as np
+from ternary_data import TernaryData, UVtoPS
+from classification_index import ClassificationIndex, separateClassifier, loadClassificationIndex, BOUNDARY
+
+class TestClassificationIndex(unittest.TestCase):
+    def setUp(self):
+        # UV座標上で曲がったバイノーダル線 V = -0.1 + 2 (U - 0.25)^2
+        U = np.linspace(0.08, 0.48, 15)
+        polymer, solvent = UVtoPS(U, -0.1 + 2. * (U - 0.25)**2)
+        self.td = TernaryData(polymer, solvent, 1. - polymer - solvent)
+        self.td.fitData(method='pchip')
+        self.calls = []
+        exact = separateClassifier(self.td)
+        def classifier(p, s):
+            self.calls.append(len(p))
+            return exact(p, s)
+        self.index = ClassificationIndex(classifier, resolution=128)
+        self.compositions = np.random.default_rng(7).dirichlet([1., 1., 1.], size=20000)
+
+    def test_classify(self):
+        p, s = self.compositions[:, 2], self.compositions[:, 1]
+        self.calls.clear()
+        separate = self.index.classify(p, s)
+        self.assertFalse(np.any(separate.mask))
+        np.testing.assert_array_equal(separate.filled(False), self.td.isSeparateArray(p, s).filled(False))
+        # 厳密な判定に回るのは境界を含むセルの組成だけ
+        self.assertLess(sum(self.calls), len(p) // 5)
+        self.assertLess(self.index.boundaryFraction(), 0.05)
+        # 負の分率やNaNはマスクする
+        np.testing.assert_array_equal(self.index.classify([0.2, 0.8, np.nan], [0.3, 0.5, 0.1]).mask,
+                                      [False, True, True])
+
+    def test_save(self):
+        p, s = self.compositions[:, 2], self.compositions[:, 1]
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = self.index.save(os.path.join(dir_name, "binodal_index"))
+            self.assertTrue(path.endswith(".npy"))
+            loaded = loadClassificationIndex(path, separateClassifier(self.td))
+            self.assertIsInstance(loaded.states, np.memmap)
+            np.testing.assert_array_equal(loaded.classify(p, s), self.index.classify(p, s))
+            # 判定関数が無ければ境界を含むセルの組成はマスクする
+            separate = loadClassificationIndex(path).classify(p, s)
+            i, j, _ = loaded.cells(p, s)
+            np.testing.assert_array_equal(separate.mask, loaded.states[i, j] == BOUNDARY)
+            np.testing.assert_array_equal(separate.compressed(), self.index.classify(p, s)[~separate.mask])
+            del loaded
+        with self.assertRaises(ValueError):
+            ClassificationIndex(resolution=64)
+
+if __name__ == "__main__":
+    unittest.main()
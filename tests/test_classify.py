@@ -21,11 +21,9 @@ if __name__ == "__main__":
     non_solvent = 1. - polymer - solvent
     tr.lines(polymer, solvent, non_solvent, "フィッティング", "red")
 
-    for idx, row in data.iterrows():
-        if td.isSeparate(row["ポリマー"], row["良溶媒"], row["貧溶媒"]):
-            color = "#19D3F3"
-        else:
-            color = "#B6E880"
-        tr.scatter([row["ポリマー"]], [row["良溶媒"]], [row["貧溶媒"]], "", color)
+    # 全ての組成を一括で判定する (マスクされた組成は相分離しないものとして扱う)
+    separate = td.isSeparateArray(data["ポリマー"].values, data["良溶媒"].values, data["貧溶媒"].values).filled(False)
+    for mask, color in zip((separate, ~separate), ("#19D3F3", "#B6E880")):
+        tr.scatter(data["ポリマー"].values[mask], data["良溶媒"].values[mask], data["貧溶媒"].values[mask], "", color)
 
     tr.saveHTML(r"tests\test_classify.html")
\ No newline at end of file
@@ -0,0 +1,61 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from component import Component
+from composition import Composition, compositionFromUV
+from ternary_data import PStoUV
+
+class TestComposition(unittest.TestCase):
+    def setUp(self):
+        self.comps = (Component(18, 1., "Water"), Component(71.29, 1.03, "NMP"), Component(20270, 1.24, "PSF"))
+        self.phis = np.random.default_rng(0).dirichlet([1., 1., 1.], size=20)
+        self.comp = Composition(self.phis, 'volume', self.comps)
+
+    def test_mass(self):
+        rho = np.array([1., 1.03, 1.24])
+        np.testing.assert_allclose(self.comp.mass(), self.phis * rho / np.dot(self.phis, rho)[:, None])
+        # 重量分率から体積分率に戻す
+        np.testing.assert_allclose(Composition(self.comp.mass(), 'mass', self.comps).volume(), self.phis)
+
+    def test_mole(self):
+        # Phase.getXsと同じ式 x_i ∝ φ_i / ν_i
+        nu = np.array([18, 71.29, 20270])
+        np.testing.assert_allclose(self.comp.mole(), (self.phis / nu) / np.sum(self.phis / nu, axis=1)[:, None])
+        np.testing.assert_allclose(Composition(self.comp.mole(), 'mole', self.comps).mass(), self.comp.mass())
+
+    def test_uv(self):
+        ws = self.comp.mass()
+        np.testing.assert_allclose(self.comp.uv(), np.stack(PStoUV(ws[:, 2], ws[:, 1]), axis=-1), atol=1e-15)
+        np.testing.assert_allclose(compositionFromUV(self.comp.uv(), 'mass').get('mass'), ws, atol=1e-12)
+
+    def test_cache(self):
+        # 入力はコピーせず, 変換結果はキャッシュを返す
+        self.assertTrue(np.shares_memory(self.comp.volume(), self.phis))
+        self.assertIs(self.comp.mass(), self.comp.mass())
+        self.assertFalse(self.comp.mass().flags.writeable)
+        self.assertEqual(len(self.comp), 20)
+
+    def test_release(self):
+        # 変換した配列はコピーせずに書き込み可能にして渡し, 入力の配列はコピーを渡す
+        mass = self.comp.mass()
+        released = self.comp.release('mass')
+        self.assertIs(released, mass)
+        self.assertTrue(released.flags.writeable)
+        self.assertIsNot(self.comp.mass(), released) # 次に使うときは変換し直す
+        np.testing.assert_array_equal(self.comp.mass(), released)
+        volume = self.comp.release('volume')
+        self.assertTrue(volume.flags.writeable)
+        self.assertFalse(np.shares_memory(volume, self.phis))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Composition(self.phis, 'weight')
+        with self.assertRaises(ValueError):
+            Composition(np.ones((3, 2)))
+        # 成分が無いと基準を変換できない
+        with self.assertRaises(ValueError):
+            Composition(self.phis).mass()
+
+if __name__ == "__main__":
+    unittest.main()
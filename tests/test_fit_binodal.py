@@ -5,7 +5,7 @@ sys.path.append(r"src")
 import pandas as pd
 import numpy as np 
 from ternary_diagram import Ternary, default_colors, default_markers
-from ternary_data import TernaryData
+from ternary_data import TernaryData, BinodalFamily
 
 if __name__ == "__main__":
     tr = Ternary("Psf+TEG", "NMP", "H2O")
@@ -16,7 +16,12 @@ if __name__ == "__main__":
         tr.scatter(sdf["ポリマー"]+sdf["添加剤"], sdf["良溶媒"], sdf["貧溶媒"], str(idx[0]) + " " + str(idx[1]) + "℃", c, m)
     tb = TernaryData(df["ポリマー"]+df["添加剤"], df["良溶媒"], df["貧溶媒"], str(idx[1]))
     tb.fitData(deg = 1)
+    # tb.fitData(method = 'pchip') # 曲がったバイノーダル線は単調スプラインでフィッティングする
     tb.exportFitFunc(r"tests\binodalFitFunc.pkl")
+    # 温度ごとにフィッティングし, 1つのファイルにまとめて出力する (EvalVIPS.setBinodalFamilyで読み込む)
+    family = BinodalFamily()
+    family.fitData(df["ポリマー"]+df["添加剤"], df["良溶媒"], df["貧溶媒"], df["温度"])
+    family.exportFamily(r"tests\binodalFamily.pkl")
 
     polymer = np.linspace(0, 1, 100)
     solvent = tb.PSFitFunc(polymer)
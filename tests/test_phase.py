@@ -0,0 +1,142 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from component import Component
+from phase import Phase
+from chi_model import YipMcHughChi, AltenaChi
+
+class TestPhaseArray(unittest.TestCase):
+    def setUp(self):
+        # PSF/NMP/H2O系
+        n_solvent = Component(18, 1., "Water")
+        solvent   = Component(71.29, 1.03, "NMP")
+        polymer   = Component(20270, 1.24, "PSF")
+        self.phase = Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, 2.5)
+        rng = np.random.default_rng(0)
+        self.phis = rng.dirichlet([1., 1., 1.], size=20)
+
+    def test_muRTs(self):
+        # 一括計算の結果がスカラー計算の結果と一致することを確認
+        mus = self.phase.muRTs(self.phis)
+        self.assertEqual(mus.shape, (20, 3))
+        for phis, mu in zip(self.phis, mus):
+            self.phase.setPhis(*phis)
+            self.assertAlmostEqual(mu[0], self.phase.mu1RT())
+            self.assertAlmostEqual(mu[1], self.phase.mu2RT())
+            self.assertAlmostEqual(mu[2], self.phase.mu3RT())
+
+    def test_Gs(self):
+        Gs = self.phase.Gs(self.phis)
+        self.assertEqual(Gs.shape, (20, 3))
+        for phis, G in zip(self.phis, Gs):
+            self.phase.setPhis(*phis)
+            self.assertAlmostEqual(G[0], self.phase.G22())
+            self.assertAlmostEqual(G[1], self.phase.G23())
+            self.assertAlmostEqual(G[2], self.phase.G33())
+
+    def test_muRTsLog(self):
+        # 体積分率の対数から計算した結果が一致することを確認
+        log_phis = np.log(self.phis)
+        np.testing.assert_allclose(self.phase.muRTsLog(log_phis), self.phase.muRTs(self.phis))
+        np.testing.assert_allclose(self.phase.muRTGradsLog(log_phis),
+                                   self.phase.muRTGrads(self.phis) * self.phis[:, None, 1:3])
+        # 非常に小さいポリマー体積分率でも有限の値になる
+        log_phis = np.log([[0.6, 0.4, 1.]]) + np.array([0., 0., -1000.])
+        self.assertTrue(np.all(np.isfinite(self.phase.muRTGradsLog(log_phis))))
+        self.assertAlmostEqual(self.phase.muRTsLog(log_phis)[0, 2], -1000. + 1 + (-0.6 - self.phase.s*0.4
+                               + self.phase.chi13.value*0.6 + self.phase.s*0.24*0.4 - self.phase.chi12.value*0.24)
+                               / self.phase.r, places=6)
+
+    def test_gRTs(self):
+        # Δμ1/RT = g - φ2 ∂g/∂φ2 - φ3 ∂g/∂φ3 を満たすことを確認
+        h = 1e-6
+        def g(d2, d3):
+            return self.phase.gRTs(self.phis + np.array([-d2 - d3, d2, d3]))
+        dg2 = (g(h, 0.) - g(-h, 0.)) / (2*h)
+        dg3 = (g(0., h) - g(0., -h)) / (2*h)
+        mu1 = g(0., 0.) - self.phis[:, 1]*dg2 - self.phis[:, 2]*dg3
+        np.testing.assert_allclose(mu1, self.phase.muRTs(self.phis)[:, 0], atol=1e-7)
+        # 単体の頂点や辺の上でも有限の値になる
+        self.assertTrue(np.all(np.isfinite(self.phase.gRTs(np.eye(3)))))
+
+    def test_notMutate(self):
+        # 一括計算ではComponentの体積分率が変更されないことを確認
+        self.phase.setPhis(0.2, 0.3, 0.5)
+        self.phase.muRTs(self.phis)
+        self.phase.Gs(self.phis)
+        self.assertEqual(self.phase.getPhis(), (0.2, 0.3, 0.5))
+
+class TestPhaseDerivative(unittest.TestCase):
+    def setUp(self):
+        n_solvent = Component(18, 1., "Water")
+        solvent   = Component(71.29, 1.03, "NMP")
+        polymer   = Component(20270, 1.24, "PSF")
+        self.phases = [
+            Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, 2.5),
+            Phase(n_solvent, solvent, polymer, YipMcHughChi(0.785, 0.665), 0.24, 2.5),
+            Phase(n_solvent, solvent, polymer, YipMcHughChi(0.785, 0.665), AltenaChi(0.1, 0.2, 0.5), 2.5),
+        ]
+        rng = np.random.default_rng(1)
+        self.phis = rng.dirichlet([2., 2., 2.], size=10)
+        self.h = 1e-6
+
+    def shift(self, da: float, db: float) -> np.ndarray:
+        # φ2をda, φ3をdbだけ動かした組成
+        phis = self.phis.copy()
+        phis[:, 0] -= da + db
+        phis[:, 1] += da
+        phis[:, 2] += db
+        return phis
+
+    def centralDiff(self, func) -> np.ndarray:
+        h = self.h
+        return np.stack(((func(self.shift(h, 0.)) - func(self.shift(-h, 0.)))/(2*h),
+                         (func(self.shift(0., h)) - func(self.shift(0., -h)))/(2*h)), axis=-1)
+
+    def test_freeEnergy(self):
+        # χが濃度に依存する場合も, Δμ/RTとGは混合自由エネルギーgRTsの微分と一致する
+        for phase in self.phases:
+            g = lambda da, db: phase.gRTs(self.shift(da, db))
+            h = 1e-6
+            dg2 = (g(h, 0.) - g(-h, 0.)) / (2*h)
+            dg3 = (g(0., h) - g(0., -h)) / (2*h)
+            a, b = self.phis[:, 1], self.phis[:, 2]
+            mus = np.stack((g(0., 0.) - a*dg2 - b*dg3,
+                            (g(0., 0.) + (1 - a)*dg2 - b*dg3) / phase.s,
+                            (g(0., 0.) - a*dg2 + (1 - b)*dg3) / phase.r), axis=-1)
+            np.testing.assert_allclose(phase.muRTs(self.phis), mus, rtol=1e-6, atol=1e-6)
+            h = 1e-4
+            G22 = (g(h, 0.) - 2*g(0., 0.) + g(-h, 0.)) / h**2
+            G33 = (g(0., h) - 2*g(0., 0.) + g(0., -h)) / h**2
+            G23 = (g(h, h) - g(h, -h) - g(-h, h) + g(-h, -h)) / (4*h**2)
+            np.testing.assert_allclose(phase.Gs(self.phis), np.stack((G22, G23, G33), axis=-1),
+                                       rtol=1e-4, atol=1e-4)
+
+    def test_muRTGrads(self):
+        for phase in self.phases:
+            np.testing.assert_allclose(phase.muRTGrads(self.phis),
+                                       self.centralDiff(phase.muRTs), rtol=1e-6, atol=1e-6)
+
+    def test_muRTHessians(self):
+        for phase in self.phases:
+            np.testing.assert_allclose(phase.muRTHessians(self.phis),
+                                       self.centralDiff(phase.muRTGrads), rtol=1e-5, atol=1e-5)
+
+    def test_GGrads(self):
+        for phase in self.phases:
+            np.testing.assert_allclose(phase.GGrads(self.phis),
+                                       self.centralDiff(phase.Gs), rtol=1e-6, atol=1e-6)
+
+    def test_stabilityDets(self):
+        # 行列式にφ1 φ2 φ3を掛けた値と一致する
+        for phase in self.phases:
+            G22, G23, G33 = phase.Gs(self.phis).T
+            np.testing.assert_allclose(phase.stabilityDets(self.phis),
+                                       (G22*G33 - G23**2) * np.prod(self.phis, axis=1), rtol=1e-9, atol=1e-12)
+        # 単体の頂点でも有限 (濃度依存のχが頂点で定義できなくてもよい)
+        for phase in self.phases:
+            self.assertTrue(np.all(np.isfinite(phase.stabilityDets(np.eye(3)))))
+
+if __name__ == "__main__":
+    unittest.main()
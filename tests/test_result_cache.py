@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(r"src")
+import numpy as np
+from component import Component
+from phase import Phase
+import result_cache
+from result_cache import ResultCache
+from ternary_system import TernaryBinodal
+
+def psfPhase(chi13: float = 2.5) -> Phase:
+    # PSF/NMP/H2O系
+    n_solvent = Component(18, 1., "Water")
+    solvent   = Component(71.29, 1.03, "NMP")
+    polymer   = Component(20270, 1.24, "PSF")
+    return Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, chi13)
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key(self):
+        # 同じ定義なら同じキー, 定義や格子が変わればキーも変わる
+        grid = np.logspace(-10, -2, 5)
+        key = self.cache.key(phase=psfPhase().toDict(), grid=grid, method="SLSQP")
+        self.assertEqual(key, self.cache.key(method="SLSQP", grid=grid.copy(), phase=psfPhase().toDict()))
+        self.assertNotEqual(key, self.cache.key(phase=psfPhase(2.4).toDict(), grid=grid, method="SLSQP"))
+        self.assertNotEqual(key, self.cache.key(phase=psfPhase().toDict(), grid=grid[:4], method="SLSQP"))
+        # 計算結果の版が変われば以前のキーは使わない
+        version = result_cache.CACHE_VERSION
+        try:
+            result_cache.CACHE_VERSION = version + 1
+            self.assertNotEqual(key, self.cache.key(phase=psfPhase().toDict(), grid=grid, method="SLSQP"))
+        finally:
+            result_cache.CACHE_VERSION = version
+
+    def test_putGet(self):
+        arr = np.arange(6.).reshape(3, 2)
+        self.assertIsNone(self.cache.get("missing"))
+        self.cache.put("a", ws=arr)
+        np.testing.assert_array_equal(self.cache.get("a")["ws"], arr)
+
+    def test_evict(self):
+        # 上限を超えると最後に使われた時刻が古いものから削除される
+        arr = np.random.default_rng(0).random(1000)
+        self.cache.put("a", ws=arr)
+        size = os.path.getsize(self.cache.path("a"))
+        self.cache.max_bytes = 2 * size + size // 2
+        os.utime(self.cache.path("a"), (0, 0))
+        self.cache.put("b", ws=arr + 1)
+        os.utime(self.cache.path("b"), (1, 1))
+        self.cache.get("a")
+        self.cache.put("c", ws=arr + 2)
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_binodal(self):
+        # 2回目の計算はキャッシュから読み込まれ, 残差なども復元される
+        phaseL_phi3 = np.logspace(-300, -5, 5)
+        binodal_system = TernaryBinodal(psfPhase(), self.cache)
+        ws = binodal_system.binodal(phaseL_phi3, solver="root")
+        residuals = binodal_system.residual_list
+        binodal_system = TernaryBinodal(psfPhase(), self.cache)
+        np.testing.assert_array_equal(binodal_system.binodal(phaseL_phi3, solver="root"), ws)
+        self.assertEqual(binodal_system.residual_list, residuals)
+        np.testing.assert_array_equal(TernaryBinodal(psfPhase(), self.cache).binodal(phaseL_phi3, solver="root"), ws)
+
+if __name__ == "__main__":
+    unittest.main()
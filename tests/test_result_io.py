@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(r"src")
+import numpy as np
+import pandas as pd
+from component import Component
+from phase import Phase
+from ternary_data import TernaryData
+from result_io import saveResult, loadResult, metaPath, WS_COLUMNS, TIE_COLUMNS
+
+class TestResultIO(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        comps = (Component(18, 1., "Water"), Component(71.29, 1.03, "NMP"), Component(20270, 1.24, "PSF"))
+        self.phase = Phase(*comps, 0.785 + 0.5 * 0.665, 0.24, 2.5)
+        ws = np.random.default_rng(0).dirichlet([1., 1., 1.], size=10)
+        self.binodal = pd.DataFrame(ws, columns=WS_COLUMNS)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_roundTrip(self):
+        path = saveResult(os.path.join(self.dir.name, "binodal"), self.binodal, 'binodal',
+                          self.phase, {"solver": "root", "tol": 1e-10})
+        self.assertTrue(path.endswith(".npy"))
+        self.assertTrue(os.path.exists(metaPath(path)))
+        result = loadResult(path)
+        self.assertEqual(result.kind, 'binodal')
+        self.assertEqual(result.columns, WS_COLUMNS)
+        self.assertEqual(result.settings["solver"], "root")
+        self.assertEqual(len(result), 10)
+        # メモリマップで読み込む
+        self.assertIsInstance(result.array(), np.memmap)
+        np.testing.assert_array_equal(result.dataFrame().values, self.binodal.values)
+        np.testing.assert_array_equal(result.column('ポリマー'), self.binodal['ポリマー'].values)
+        # 保存した系の成分で組成を変換する
+        self.assertEqual([c.name for c in result.components()], ["Water", "NMP", "PSF"])
+        np.testing.assert_allclose(result.composition().mass(), self.binodal.values)
+        self.assertEqual(result.meta["phase"]["chi23"], self.phase.chi23.toDict())
+
+    def test_tieLines(self):
+        result = loadResult(saveResult(os.path.join(self.dir.name, "binodal.npy"), self.binodal, 'binodal'))
+        tie = result.tieLines()
+        np.testing.assert_array_equal(tie, np.hstack((self.binodal.values[:5], self.binodal.values[5:])))
+        result = loadResult(saveResult(os.path.join(self.dir.name, "tie.npy"), tie, 'tie_line'))
+        self.assertEqual(result.columns, TIE_COLUMNS)
+        np.testing.assert_array_equal(result.tieLines(), tie)
+        # 成分が保存されていなければ他の基準に変換できない
+        self.assertIsNone(result.components())
+
+    def test_ternaryData(self):
+        result = loadResult(saveResult(os.path.join(self.dir.name, "binodal.npy"), self.binodal, 'binodal'))
+        data = TernaryData()
+        data.readResult(result, "25")
+        np.testing.assert_array_equal(data.polymer, self.binodal['ポリマー'].values)
+        np.testing.assert_array_equal(data.non_solvent, self.binodal['貧溶媒'].values)
+        self.assertEqual(data.temperature, "25")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            saveResult(os.path.join(self.dir.name, "binodal.xlsx"), self.binodal, 'binodal')
+        with self.assertRaises(ValueError):
+            saveResult(os.path.join(self.dir.name, "binodal.npy"), self.binodal.values, 'tie_line')
+        with self.assertRaises(ValueError):
+            loadResult(os.path.join(self.dir.name, "missing.npy"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+sys.path.append(r"src")
+import numpy as np
+from run_jobs import readJobFile, expandJobs, phaseFromJob, sweepGrid, runJobs, main, MANIFEST_NAME
+from result_io import loadResult
+
+SYSTEM = {
+    "name": "PSF_NMP_Water",
+    "components": {
+        "non_solvent": {"nu": 18, "rho": 1.0, "name": "Water"},
+        "solvent": {"nu": 71.29, "rho": 1.03, "name": "NMP"},
+        "polymer": {"nu": 20270, "rho": 1.24, "name": "PSF"},
+    },
+    "chi": {"chi12": {"model": "YipMcHughChi", "a": 0.785, "b": 0.665}, "chi23": 0.24, "chi13": 2.5},
+}
+
+class TestRunJobs(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.job_file = {
+            "defaults": {"binodal": {"method": "hull", "n": 60}, "spinodal": {"method": "contour", "n": 100}},
+            "systems": [SYSTEM, {**SYSTEM, "name": "constant", "chi": {"chi12": 1.1175, "chi23": 0.24, "chi13": 2.5},
+                                 "spinodal": {"n": 50}}],
+        }
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_expandJobs(self):
+        jobs = expandJobs(self.job_file)
+        self.assertEqual([job["name"] for job in jobs], ["PSF_NMP_Water", "constant"])
+        # 既定値の一部だけを上書きする
+        self.assertEqual(jobs[1]["spinodal"], {"method": "contour", "n": 50})
+        self.assertTrue(jobs[0]["critical"])
+        phase = phaseFromJob(jobs[0])
+        self.assertEqual(phase.chi12.toDict(), {"model": "YipMcHughChi", "a": 0.785, "b": 0.665})
+        with self.assertRaises(ValueError):
+            expandJobs({"systems": [SYSTEM, SYSTEM]})
+        with self.assertRaises(ValueError):
+            expandJobs({"systems": [{**SYSTEM, "binodal": {"method": "unknown"}}]})
+
+    def test_sweepGrid(self):
+        np.testing.assert_allclose(sweepGrid({"linspace": [0., 1., 5]}), np.linspace(0., 1., 5))
+        np.testing.assert_allclose(sweepGrid({"logspace": [-3, -1, 3]}), [1e-3, 1e-2, 1e-1])
+        np.testing.assert_allclose(sweepGrid([0.1, 0.2]), [0.1, 0.2])
+
+    def test_runJobs(self):
+        messages = []
+        manifest = runJobs(expandJobs(self.job_file), self.dir.name, progress=messages.append)
+        self.assertEqual(len(messages), 2)
+        with open(os.path.join(self.dir.name, MANIFEST_NAME), encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["jobs"][0]["name"], "PSF_NMP_Water")
+        for entry in manifest["jobs"]:
+            self.assertEqual(entry["status"], 'ok', entry["error"])
+            self.assertEqual(set(entry["outputs"]), {"binodal", "tie_line", "spinodal", "critical"})
+            tie = loadResult(os.path.join(self.dir.name, entry["outputs"]["tie_line"]))
+            self.assertGreater(len(tie), 0)
+            self.assertEqual(tie.meta["phase"], entry["phase"])
+            np.testing.assert_allclose(np.sum(tie.array()[:, :3], axis=1), 1.)
+
+    def test_main(self):
+        path = os.path.join(self.dir.name, "jobs.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.job_file, f)
+        self.assertEqual(readJobFile(path)["systems"][0]["name"], "PSF_NMP_Water")
+        output_dir = os.path.join(self.dir.name, "out")
+        self.assertEqual(main([path, "-o", output_dir, "--only", "constant"]), 0)
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            self.assertEqual([entry["name"] for entry in json.load(f)["jobs"]], ["constant"])
+        self.assertEqual(main([path, "-o", output_dir, "--only", "missing"]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
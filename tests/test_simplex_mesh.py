@@ -0,0 +1,58 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from simplex_mesh import simplexLattice, simplexTriangles, marchingTriangles, AdaptiveSimplexMesh
+
+class TestSimplexLattice(unittest.TestCase):
+    def test_lattice(self):
+        phis = simplexLattice(4)
+        self.assertEqual(phis.shape, (15, 3))
+        np.testing.assert_allclose(np.sum(phis, axis=1), 1.)
+        self.assertEqual(len(np.unique(np.rint(phis * 4), axis=0)), 15)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            simplexLattice(0)
+
+class TestSimplexTriangles(unittest.TestCase):
+    def test_triangles(self):
+        # n^2個の単位三角形で単体を覆う
+        n = 5
+        idx = simplexLattice(n)[simplexTriangles(n)][..., 1:] * n
+        area2 = np.abs((idx[:, 1, 0] - idx[:, 0, 0]) * (idx[:, 2, 1] - idx[:, 0, 1])
+                     - (idx[:, 2, 0] - idx[:, 0, 0]) * (idx[:, 1, 1] - idx[:, 0, 1]))
+        self.assertEqual(len(area2), n**2)
+        np.testing.assert_allclose(area2, 1.)
+
+    def test_marchingTriangles(self):
+        # 線形な値の等値線は直線になる
+        phis = simplexLattice(10)
+        lines = marchingTriangles(phis, phis[:, 2] - 0.35, simplexTriangles(10))
+        self.assertEqual(len(lines), 1)
+        np.testing.assert_allclose(lines[0][:, 2], 0.35)
+        self.assertEqual(len(lines[0]), 14) # 横切る格子の辺の数
+
+class TestAdaptiveSimplexMesh(unittest.TestCase):
+    def setUp(self):
+        # 中心(φ2, φ3) = (0.3, 0.3), 半径0.2の円の内側で負になる指標
+        self.field = lambda phis: np.hypot(phis[:, 1] - 0.3, phis[:, 2] - 0.3) - 0.2
+
+    def test_contour(self):
+        mesh = AdaptiveSimplexMesh(self.field, n=8, max_level=6)
+        lines = mesh.contour()
+        self.assertEqual(len(lines), 1)
+        np.testing.assert_allclose(lines[0][0], lines[0][-1]) # 閉じた折れ線
+        np.testing.assert_allclose(self.field(lines[0]), 0., atol=1e-4)
+        # 境界の近くだけが細かいので一様な格子より点がずっと少ない
+        self.assertLess(len(mesh.points), len(simplexLattice(mesh.scale)) / 10)
+        self.assertEqual(mesh.nfev, len(mesh.points))
+        self.assertTrue(np.all(mesh.levels[mesh.levels > 0] <= 6))
+
+    def test_boundaryPoints(self):
+        mesh = AdaptiveSimplexMesh(self.field, n=8, max_level=4)
+        points = mesh.boundaryPoints()
+        self.assertTrue(np.all(np.abs(self.field(points)) < 2. / mesh.scale))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from component import Component
+from phase import Phase
+from system_runner import computeSystem, guardedRun
+from ternary_system import TernaryBinodal
+
+def psfPhase() -> Phase:
+    # PSF/NMP/H2O系
+    n_solvent = Component(18, 1., "Water")
+    solvent   = Component(71.29, 1.03, "NMP")
+    polymer   = Component(20270, 1.24, "PSF")
+    return Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, 2.5)
+
+class TestComputeSystem(unittest.TestCase):
+    def test_sweep(self):
+        # 臨界点を越えた点は除き, タイラインとバイノーダルは同じ点を表す
+        phaseL_phi3 = np.hstack((np.logspace(-30, -3, 4), [0.05]))
+        result = computeSystem(psfPhase(), binodal={"method": 'sweep', "phaseL_phi3": phaseL_phi3, "solver": "root"},
+                               spinodal={"method": 'sweep', "phi3": np.logspace(-4, -0.5, 5)}, critical='binodal')
+        self.assertEqual(result['tie_line'].shape, (4, 6))
+        rich, lean = np.split(result['binodal'], 2)
+        np.testing.assert_array_equal(result['tie_line'], np.hstack((rich, lean)))
+        ws = TernaryBinodal(psfPhase()).binodal(phaseL_phi3[:4], solver="root", progress=None)
+        np.testing.assert_allclose(result['binodal'], ws)
+        self.assertFalse(np.any(np.isnan(result['spinodal'])))
+        self.assertEqual(result['critical'].shape, (1, 3))
+        self.assertGreater(result['nfev'], 0)
+        self.assertLess(result['max_residual'], 1e-10)
+
+    def test_unknownMethod(self):
+        with self.assertRaises(ValueError):
+            computeSystem(psfPhase(), binodal={"method": 'unknown'})
+        with self.assertRaises(ValueError):
+            computeSystem(psfPhase(), critical='unknown')
+
+class TestGuardedRun(unittest.TestCase):
+    def test_error(self):
+        self.assertEqual(guardedRun(lambda: 1, "ok"), (1, ""))
+        value, error = guardedRun(lambda: 1 / 0, "zero")
+        self.assertIsNone(value)
+        self.assertTrue(error.startswith("ZeroDivisionError"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from ternary_batch import paramGrid, phaseFromParams, TernaryBatch, PARAM_COLUMNS
+from ternary_system import TernaryBinodal
+
+class TestParamGrid(unittest.TestCase):
+    def test_grid(self):
+        params = paramGrid(18, 71.29, 20270, 1., 1.03, 1.24,
+                           chi12=[0.9, 1.1175], chi23=0.24, chi13=[2.0, 2.5, 3.0])
+        self.assertEqual(list(params.columns), PARAM_COLUMNS)
+        self.assertEqual(len(params), 6)
+        self.assertEqual(params.index.name, 'case')
+
+    def test_phaseFromParams(self):
+        # numpyの数値型からでも定数χのPhaseが作られる
+        params = paramGrid(18, 71.29, 20270, 1., 1.03, 1.24, 1.1175, 0.24, 2.5)
+        phase = phaseFromParams(params.iloc[0])
+        self.assertTrue(phase.isConstantChi())
+        self.assertEqual(type(phase.chi12.value), float)
+        self.assertAlmostEqual(phase.s, 18/71.29)
+
+    def test_missingColumn(self):
+        with self.assertRaises(ValueError):
+            phaseFromParams({'nu1': 18.})
+
+class TestTernaryBatch(unittest.TestCase):
+    def setUp(self):
+        self.params = paramGrid(18, 71.29, 20270, 1., 1.03, 1.24,
+                                chi12=[0.9, 1.1175], chi23=0.24, chi13=2.5)
+
+    def test_run(self):
+        batch = TernaryBatch(self.params)
+        results = batch.run()
+        self.assertEqual(results.index.names, ['case', 'curve', 'point'])
+        self.assertEqual(len(batch.summary), 2)
+        self.assertTrue(np.all(batch.summary['error'] == ""))
+        # 系ごとの結果は個別に計算した結果と一致する
+        ws = TernaryBinodal(phaseFromParams(self.params.iloc[1])).binodalContinuation()
+        np.testing.assert_allclose(batch.binodal(1).values, ws)
+        self.assertEqual(len(batch.tieLine(1)), len(ws) // 2)
+        np.testing.assert_allclose(np.sum(batch.spinodal(0).values, axis=1), 1.)
+
+    def test_parallel(self):
+        # 並列計算でもパラメータ表の順番で同じ結果が得られる
+        batch = TernaryBatch(self.params, phaseL_phi3=np.logspace(-30, -1, 6))
+        results_serial   = batch.run()
+        results_parallel = batch.run(n_jobs=2)
+        self.assertTrue(results_parallel.equals(results_serial))
+        self.assertTrue(np.all(batch.summary['max_residual'] < 1e-10))
+
+if __name__ == "__main__":
+    unittest.main()
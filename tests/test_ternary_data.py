@@ -0,0 +1,177 @@
+import unittest
+import sys
+import os
+import tempfile
+sys.path.append(r"src")
+import numpy as np
+from ternary_data import TernaryData, MonotoneSpline, BinodalFamily, BlendedFit, UVtoPS, PStoUV
+
+class TestTernaryDataArray(unittest.TestCase):
+    def setUp(self):
+        # バイノーダル線 (ポリマー, 良溶媒) を1次式でフィッティングする
+        polymer = np.linspace(0.05, 0.6, 10)
+        solvent = 0.9 - 1.2 * polymer
+        self.td = TernaryData(polymer, solvent, 1. - polymer - solvent)
+        self.td.fitData(1)
+        rng = np.random.default_rng(3)
+        self.init = rng.dirichlet([2., 2., 2.], size=200)
+        self.after = rng.dirichlet([2., 2., 2.], size=200)
+
+    def test_isSeparateArray(self):
+        p, s, n = self.init[:, 2], self.init[:, 1], self.init[:, 0]
+        separate = self.td.isSeparateArray(p, s, n)
+        expected = [self.td.isSeparate(*row) for row in zip(p, s, n)]
+        np.testing.assert_array_equal(separate.filled(False), expected)
+        self.assertFalse(np.any(separate.mask))
+        # 負の分率やNaNはマスクする
+        separate = self.td.isSeparateArray([0.2, 0.8, np.nan], [0.3, 0.5, 0.1])
+        np.testing.assert_array_equal(separate.mask, [False, True, True])
+
+    def test_deviationDistanceArray(self):
+        args = (self.init[:, 2], self.init[:, 1], self.init[:, 0],
+                self.after[:, 2], self.after[:, 1], self.after[:, 0])
+        d = self.td.deviationDistanceArray(*args)
+        expected = [self.td.deviationDistance(*row) for row in zip(*args)]
+        np.testing.assert_allclose(d.filled(np.nan), expected, rtol=1e-8, atol=1e-12)
+        # 線分上に交点が無い組は追加でマスクする
+        d_segment = self.td.deviationDistanceArray(*args, segment=True)
+        self.assertTrue(np.all(d_segment.mask >= d.mask))
+        self.assertTrue(np.any(d_segment.mask))
+
+    def test_degenerate(self):
+        # 吸湿前後の組成が同じ組と, バイノーダル線に平行な組は例外を出さずにマスクする
+        U = np.array([0.3, 0.5])
+        V = self.td.fit_slope * U + self.td.fit_inc - 0.05
+        p, s = UVtoPS(U, V)
+        d = self.td.deviationDistanceArray([0.2, p[0]], [0.3, s[0]], [0.5, 1. - p[0] - s[0]],
+                                           [0.2, p[1]], [0.3, s[1]], [0.5, 1. - p[1] - s[1]])
+        np.testing.assert_array_equal(d.mask, [True, True])
+        # スカラー版も平行に近い直線は同じ許容誤差で例外にする
+        with self.assertRaises(ValueError):
+            self.td.deviationDistance(p[0], s[0], 1. - p[0] - s[0], p[1], s[1] * (1. + 1e-14), 1. - p[1] - s[1])
+
+class TestTernaryDataCurve(unittest.TestCase):
+    def setUp(self):
+        # UV座標上で曲がったバイノーダル線 V = -0.1 + 2 (U - 0.25)^2 (三角形は0 <= U <= 0.5, |V| <= √3 U)
+        self.curve = lambda U: -0.1 + 2. * (U - 0.25)**2
+        U = np.linspace(0.08, 0.48, 15)
+        polymer, solvent = UVtoPS(U, self.curve(U))
+        self.data = (polymer, solvent, 1. - polymer - solvent)
+
+    def fitted(self, **kwargs) -> TernaryData:
+        td = TernaryData(*self.data)
+        td.fitData(**kwargs)
+        return td
+
+    def test_fitData(self):
+        U = np.linspace(0.1, 0.45, 50)
+        np.testing.assert_allclose(self.fitted(deg=2).fitFunc(U), self.curve(U), atol=1e-12)
+        td = self.fitted(method='pchip')
+        self.assertIsInstance(td.fitFunc, MonotoneSpline)
+        self.assertFalse(td.fit_linear)
+        np.testing.assert_allclose(td.fitFunc(U), self.curve(U), atol=2e-3)
+        with self.assertRaises(ValueError):
+            td.fitData(method='unknown')
+
+    def test_deviationDistanceArray(self):
+        # U座標一定の線分 (V = -0.3 -> 0.25) とバイノーダル線の交点は (U, f(U))
+        U = np.linspace(0.2, 0.4, 9)
+        p1, s1 = UVtoPS(U, np.full(len(U), -0.3))
+        p2, s2 = UVtoPS(U, np.full(len(U), 0.25))
+        for td in (self.fitted(deg=2), self.fitted(method='pchip')):
+            d = td.deviationDistanceArray(p1, s1, 1. - p1 - s1, p2, s2, 1. - p2 - s2, segment=True)
+            self.assertFalse(np.any(d.mask))
+            np.testing.assert_allclose(d, -(0.25 - td.fitFunc(U)), atol=1e-12)
+            # スカラー版も同じ交点を使う
+            self.assertAlmostEqual(td.deviationDistance(p1[0], s1[0], 0., p2[0], s2[0], 0.), d[0], places=12)
+        # バイノーダル線に届かない線分はマスクする
+        p2, s2 = UVtoPS(U, np.full(len(U), -0.2))
+        d = self.fitted(deg=2).deviationDistanceArray(p1, s1, 1. - p1 - s1, p2, s2, 1. - p2 - s2, segment=True)
+        self.assertTrue(np.all(d.mask))
+        # 三角形の内側でバイノーダル線と交わらない直線はスカラー版では例外
+        p1, s1 = UVtoPS(np.array([0.2, 0.4]), np.full(2, -0.2))
+        with self.assertRaises(ValueError):
+            self.fitted(deg=2).deviationDistance(p1[0], s1[0], 1. - p1[0] - s1[0], p1[1], s1[1], 1. - p1[1] - s1[1])
+
+    def test_PSFitFunc(self):
+        td = self.fitted(deg=2)
+        polymer = np.linspace(0.15, 0.35, 7)
+        solvent = td.PSFitFunc(polymer)
+        U, V = PStoUV(polymer, solvent)
+        np.testing.assert_allclose(V, self.curve(U), atol=1e-12)
+
+    def test_exportFitFunc(self):
+        td = self.fitted(method='pchip')
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, "binodalFitFunc.pkl")
+            td.exportFitFunc(path)
+            loaded = TernaryData()
+            loaded.loadFitFunc(path)
+        U = np.linspace(0., 1., 11)
+        np.testing.assert_allclose(loaded.fitFunc(U), td.fitFunc(U))
+        self.assertFalse(loaded.fit_linear)
+
+class TestBinodalFamily(unittest.TestCase):
+    def setUp(self):
+        # 温度が高いほどバイノーダル線が下がる (V = c(T) + 2 (U - 0.25)^2)
+        U = np.linspace(0.08, 0.48, 15)
+        self.data = []
+        for T, c in ((20., -0.05), (40., -0.15), (60., -0.2)):
+            polymer, solvent = UVtoPS(U, c + 2. * (U - 0.25)**2)
+            self.data.append((polymer, solvent, 1. - polymer - solvent, np.full(len(U), T)))
+        self.data = [np.concatenate(x) for x in zip(*self.data)]
+        rng = np.random.default_rng(5)
+        self.init = rng.dirichlet([2., 2., 2.], size=100)
+        self.after = rng.dirichlet([2., 2., 2.], size=100)
+        self.T = rng.uniform(20., 60., size=100)
+
+    def family(self, **kwargs) -> BinodalFamily:
+        family = BinodalFamily()
+        family.fitData(*self.data, **kwargs)
+        return family
+
+    def test_fitFuncAt(self):
+        family = self.family(deg=2)
+        np.testing.assert_array_equal(family.temperatures, [20., 40., 60.])
+        U = np.linspace(0.1, 0.45, 20)
+        fit = family.fitFuncAt(30.)
+        self.assertIsInstance(fit, np.poly1d)
+        np.testing.assert_allclose(fit(U), -0.1 + 2. * (U - 0.25)**2, atol=1e-12)
+        self.assertIsInstance(self.family(method='pchip').fitFuncAt(30.), BlendedFit)
+        with self.assertRaises(ValueError):
+            family.fitFuncAt(70.)
+
+    def test_isSeparateArray(self):
+        family = self.family(deg=2)
+        p, s = self.after[:, 2], self.after[:, 1]
+        separate = family.isSeparateArray(p, s, self.T)
+        expected = [family.ternaryDataAt(T).isSeparate(*row) for T, row in zip(self.T, zip(p, s, 1. - p - s))]
+        np.testing.assert_array_equal(separate.filled(False), expected)
+        # 範囲外の温度はマスクする
+        np.testing.assert_array_equal(family.isSeparateArray(p[:3], s[:3], [10., 40., 80.]).mask,
+                                      [True, False, True])
+
+    def test_deviationDistanceArray(self):
+        for family in (self.family(deg=2), self.family(method='pchip')):
+            args = (self.init[:, 2], self.init[:, 1], self.init[:, 0],
+                    self.after[:, 2], self.after[:, 1], self.after[:, 0])
+            d = family.deviationDistanceArray(*args, self.T)
+            self.assertGreater(d.count(), 50)
+            # 1行ずつその温度のTernaryDataで計算した結果と一致する
+            expected = [family.ternaryDataAt(T).deviationDistanceArray(*row).filled(np.nan)[()]
+                        for T, row in zip(self.T, zip(*args))]
+            np.testing.assert_allclose(d.filled(np.nan), expected, atol=1e-10)
+
+    def test_exportFamily(self):
+        family = self.family(method='pchip')
+        with tempfile.TemporaryDirectory() as dir_name:
+            path = os.path.join(dir_name, "binodalFamily.pkl")
+            family.exportFamily(path)
+            loaded = BinodalFamily()
+            loaded.loadFamily(path)
+        np.testing.assert_array_equal(loaded.temperatures, family.temperatures)
+        p, s = self.after[:, 2], self.after[:, 1]
+        np.testing.assert_array_equal(loaded.isSeparateArray(p, s, self.T), family.isSeparateArray(p, s, self.T))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,339 @@
+import unittest
+import os
+import sys
+import tempfile
+sys.path.append(r"src")
+import numpy as np
+import pandas as pd
+from component import Component
+from phase import Phase
+from chi_model import YipMcHughChi
+from simplex_mesh import simplexLattice
+from ternary_system import TernaryBinodal, TernaryCritical, TernaryHull, TernarySpinodal, TIE_COLUMNS
+
+def psfPhase() -> Phase:
+    # PSF/NMP/H2O系
+    n_solvent = Component(18, 1., "Water")
+    solvent   = Component(71.29, 1.03, "NMP")
+    polymer   = Component(20270, 1.24, "PSF")
+    return Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, 2.5)
+
+class TestBinodal(unittest.TestCase):
+    def setUp(self):
+        self.binodal_system = TernaryBinodal(psfPhase())
+        self.phaseL_phi3 = np.logspace(-300, -5, 10)
+
+    def test_root(self):
+        # 非線形方程式として解いた場合, 全ての点が自明解以外に収束することを確認
+        ws = self.binodal_system.binodal(self.phaseL_phi3, solver="root")
+        tie = self.binodal_system.tieLineFromBinodal(ws)
+        self.assertEqual(tie.shape, (10, 6))
+        self.assertTrue(np.all(np.array(self.binodal_system.residual_list) < 1e-10))
+        self.assertTrue(np.all(np.abs(tie[:, 2] - tie[:, 5]) > 0.1))
+
+    def test_rootAgreesWithMinimize(self):
+        ws_min  = self.binodal_system.binodal(self.phaseL_phi3[:3])
+        ws_root = self.binodal_system.binodal(self.phaseL_phi3[:3], solver="root")
+        np.testing.assert_allclose(ws_root, ws_min, atol=1e-4)
+
+    def test_rootLog(self):
+        # 対数比変数で解いた場合も, 全ての点が体積分率で解いた場合と同じ解に収束することを確認
+        ws_linear = self.binodal_system.binodal(self.phaseL_phi3, solver="root")
+        ws_log    = self.binodal_system.binodal(self.phaseL_phi3, solver="root", variables="log")
+        self.assertTrue(np.all(np.array(self.binodal_system.residual_list) < 1e-10))
+        np.testing.assert_allclose(ws_log, ws_linear, rtol=1e-8, atol=1e-300)
+
+    def test_jacobianLog(self):
+        # 対数比変数の解析的なヤコビ行列が中心差分と一致することを確認
+        ys, h = np.array([1.3, 2.8, -0.3]), 1e-6
+        for phaseL_phi3 in self.phaseL_phi3[[0, -1]]:
+            jac = self.binodal_system.jacobianLog(ys, phaseL_phi3)
+            jac_fd = np.stack([(self.binodal_system.residualsLog(ys + h*e, phaseL_phi3)
+                              - self.binodal_system.residualsLog(ys - h*e, phaseL_phi3)) / (2*h)
+                               for e in np.eye(3)], axis=1)
+            np.testing.assert_allclose(jac, jac_fd, atol=1e-8)
+
+    def test_invalidVariables(self):
+        with self.assertRaises(ValueError):
+            self.binodal_system.binodal(self.phaseL_phi3, variables="sqrt")
+
+class TestSpinodal(unittest.TestCase):
+    def setUp(self):
+        self.spinodal_system = TernarySpinodal(psfPhase())
+        self.phase_phi3 = np.logspace(-4, -0.5, 20)
+
+    def test_analytic(self):
+        # 解析解がスピノーダル条件を満たすことを確認
+        phis = self.spinodal_system.spinodalAnalytic(self.phase_phi3)
+        self.assertFalse(np.any(np.isnan(phis)))
+        D = TernaryCritical(psfPhase()).conditions(phis)[:, 0]
+        np.testing.assert_allclose(D * phis[:, 0] * phis[:, 1], 0., atol=1e-10)
+
+    def test_analyticAgreesWithMinimize(self):
+        ws_analytic = self.spinodal_system.spinodal(self.phase_phi3)
+        ws_min      = self.spinodal_system.spinodal(self.phase_phi3, solver="minimize")
+        np.testing.assert_allclose(ws_analytic, ws_min, atol=1e-8)
+
+    def test_minimizeLog(self):
+        ws_analytic = self.spinodal_system.spinodal(self.phase_phi3)
+        ws_log      = self.spinodal_system.spinodal(self.phase_phi3, solver="minimize", variables="log")
+        np.testing.assert_allclose(ws_analytic, ws_log, atol=1e-8)
+
+    def test_spinodalContour(self):
+        # 等値線の点は解析解の曲線から格子の間隔程度しか離れない
+        lines = self.spinodal_system.spinodalContour(200)
+        self.assertEqual(len(lines), 1)
+        ws_analytic = self.spinodal_system.spinodal(np.linspace(0.01, 0.7, 20), progress=None)
+        ws_analytic = ws_analytic[~np.isnan(ws_analytic[:, 0])]
+        distance = np.min(np.linalg.norm(ws_analytic[:, None, :] - lines[0][None], axis=-1), axis=1)
+        self.assertLess(np.max(distance), 2. / 200)
+
+    def test_stabilityMap(self):
+        ws, dets = self.spinodal_system.stabilityMap(50)
+        self.assertEqual(ws.shape, (51 * 52 // 2, 3))
+        self.assertTrue(np.all(np.isfinite(dets)))
+        # 純成分は安定, 貧溶媒とポリマーの1:1混合は不安定
+        self.assertTrue(np.all(dets[np.max(ws, axis=1) == 1.] > 0.))
+        phase = psfPhase()
+        self.assertLess(phase.stabilityDets(np.array([[0.5, 0., 0.5]]))[0], 0.)
+
+    def test_stabilityMapChiModel(self):
+        # 濃度依存のχでも, 行列式の符号はgRTsの中心差分によるヘッセ行列の行列式の符号と一致する
+        phase = psfPhase()
+        phase = Phase(phase.comp1, phase.comp2, phase.comp3, YipMcHughChi(0.785, 0.665), 0.24, 2.5)
+        system = TernarySpinodal(phase)
+        _, dets = system.stabilityMap(60)
+        phis = simplexLattice(60)
+        self.assertTrue(np.all(np.isfinite(dets)))
+        inner = np.all(phis > 0.02, axis=1)
+        phis, dets = phis[inner], dets[inner]
+        h = 1e-4
+        def g(da, db):
+            return phase.gRTs(phis + np.array([-da - db, da, db]))
+        G22 = (g(h, 0.) - 2*g(0., 0.) + g(-h, 0.)) / h**2
+        G33 = (g(0., h) - 2*g(0., 0.) + g(0., -h)) / h**2
+        G23 = (g(h, h) - g(h, -h) - g(-h, h) + g(-h, -h)) / (4*h**2)
+        dets_fd = (G22*G33 - G23**2) * np.prod(phis, axis=1)
+        clear = np.abs(dets_fd) > 1e-3 * np.max(np.abs(dets_fd))
+        self.assertTrue(np.any(dets[clear] < 0.) and np.any(dets[clear] > 0.))
+        np.testing.assert_array_equal(np.sign(dets[clear]), np.sign(dets_fd[clear]))
+        # 同じ行列式から等値線も求まる
+        lines = system.spinodalContour(100)
+        self.assertGreater(len(lines), 0)
+
+    def test_noSpinodal(self):
+        # スピノーダルが存在しないポリマー体積分率ではNaN
+        phis = self.spinodal_system.spinodalAnalytic(np.array([0.9]))
+        self.assertTrue(np.all(np.isnan(phis[:, :2])))
+
+class TestCritical(unittest.TestCase):
+    def setUp(self):
+        self.critical_system = TernaryCritical(psfPhase())
+
+    def test_criticalPoint(self):
+        # 臨界点でスピノーダル条件と臨界条件が満たされることを確認
+        phis = self.critical_system.criticalPoint()
+        self.assertAlmostEqual(np.sum(phis), 1.)
+        self.assertTrue(np.all(phis > 0.))
+        np.testing.assert_allclose(self.critical_system.conditions(phis[np.newaxis]), 0., atol=1e-8)
+
+    def test_agreesWithContinuation(self):
+        # 連続法で追跡したタイラインは臨界点に収束する
+        binodal_system = TernaryBinodal(psfPhase())
+        ws = binodal_system.binodalContinuation(include_critical=False)
+        tie = binodal_system.tieLineFromBinodal(ws)
+        phis = self.critical_system.criticalPoint()
+        np.testing.assert_allclose(binodal_system.critical_point, phis, atol=1e-12)
+        # 最後のタイラインの両端の重量分率は臨界点の近傍にある
+        np.testing.assert_allclose(tie[-1, 0:3], tie[-1, 3:], atol=5e-3)
+
+class TestParallel(unittest.TestCase):
+    def setUp(self):
+        self.binodal_system = TernaryBinodal(psfPhase())
+        self.phaseL_phi3 = np.logspace(-300, -3, 12)
+
+    def test_binodalMinimize(self):
+        # 並列計算の結果は逐次計算の結果と同じ順番で一致する
+        ws_serial   = self.binodal_system.binodal(self.phaseL_phi3)
+        residuals   = self.binodal_system.residual_list
+        ws_parallel = self.binodal_system.binodal(self.phaseL_phi3, n_jobs=3)
+        np.testing.assert_array_equal(ws_parallel, ws_serial)
+        self.assertEqual(self.binodal_system.residual_list, residuals)
+
+    def test_binodalRoot(self):
+        ws_serial   = self.binodal_system.binodal(self.phaseL_phi3, solver="root")
+        ws_parallel = self.binodal_system.binodal(self.phaseL_phi3, solver="root", n_jobs=3)
+        np.testing.assert_allclose(ws_parallel, ws_serial, atol=1e-10)
+        self.assertTrue(np.all(np.array(self.binodal_system.residual_list) < 1e-10))
+
+    def test_spinodal(self):
+        spinodal_system = TernarySpinodal(psfPhase())
+        phase_phi3 = np.logspace(-4, -0.5, 7)
+        ws_serial   = spinodal_system.spinodal(phase_phi3, solver="minimize")
+        ws_parallel = spinodal_system.spinodal(phase_phi3, solver="minimize", n_jobs=2)
+        np.testing.assert_array_equal(ws_parallel, ws_serial)
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.phaseL_phi3 = np.hstack((np.logspace(-300, -3, 6), [0.05])) # 最後の点は臨界点を越える
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "tie_line.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_binodalIter(self):
+        # 逐次版はbinodalと同じタイラインを返し, 収束した点だけをCSVに追記する
+        ws = TernaryBinodal(psfPhase()).binodal(self.phaseL_phi3, solver="root", progress=None)
+        binodal_system = TernaryBinodal(psfPhase())
+        stream = binodal_system.binodalIter(self.phaseL_phi3, solver="root", progress=None, path=self.path)
+        i, tie = next(stream)
+        self.assertEqual(i, 0)
+        self.assertEqual(len(pd.read_csv(self.path, encoding='utf-8-sig')), 1) # 途中でも読み込める
+        results = [(i, tie)] + list(stream)
+        index = [i for i, _ in results]
+        self.assertEqual(index, list(range(6)))
+        tie_lines = np.array([tie for _, tie in results])
+        rich, lean = np.split(ws, 2)
+        np.testing.assert_allclose(tie_lines, np.hstack((rich, lean))[index])
+        saved = pd.read_csv(self.path, encoding='utf-8-sig')
+        self.assertEqual(list(saved.columns), TIE_COLUMNS + ['phi3', 'residual'])
+        np.testing.assert_allclose(saved[TIE_COLUMNS].values, tie_lines)
+        self.assertEqual(len(binodal_system.log), 7)
+        self.assertEqual(len(binodal_system.residual_list), 7)
+
+    def test_spinodalIter(self):
+        spinodal_system = TernarySpinodal(psfPhase())
+        phase_phi3 = np.logspace(-4, -0.5, 5)
+        results = list(spinodal_system.spinodalIter(phase_phi3, progress=None, path=self.path))
+        np.testing.assert_allclose(np.array([ws for _, ws in results]),
+                                   spinodal_system.spinodal(phase_phi3, progress=None), atol=1e-8)
+        self.assertEqual(len(pd.read_csv(self.path, encoding='utf-8-sig')), 5)
+
+    def test_rerun(self):
+        # 同じパスで計算し直すとファイルは上書きされ, 前回の行は残らない
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('old,columns\n1,2\n')
+        for _ in range(2):
+            results = list(TernaryBinodal(psfPhase()).binodalIter(self.phaseL_phi3, solver="root",
+                                                                    progress=None, path=self.path))
+            saved = pd.read_csv(self.path, encoding='utf-8-sig')
+            self.assertEqual(len(saved), len(results))
+            self.assertEqual(list(saved.columns), TIE_COLUMNS + ['phi3', 'residual'])
+
+class TestSolverLog(unittest.TestCase):
+    def setUp(self):
+        self.binodal_system = TernaryBinodal(psfPhase())
+        self.phaseL_phi3 = np.logspace(-300, -5, 5)
+
+    def test_binodalLog(self):
+        # 各点の記録が返され, 残差のリストと一致する
+        ws, log = self.binodal_system.binodal(self.phaseL_phi3, solver="root", progress=None, return_log=True)
+        df = log.toDataFrame()
+        self.assertEqual(len(df), len(self.phaseL_phi3))
+        np.testing.assert_array_equal(df['phi3'], self.phaseL_phi3)
+        self.assertEqual(df['residual'].tolist(), self.binodal_system.residual_list)
+        self.assertTrue(np.all(df['success']))
+        self.assertTrue(np.all(df['nfev'] > 0) and np.all(df['njev'] > 0) and np.all(df['time'] > 0.))
+        self.assertEqual(log.summary()['failures'], 0)
+        # 結果は書き込み可能な配列
+        self.assertTrue(ws.flags.writeable)
+
+    def test_evaluationCounts(self):
+        # 勾配の計算の中の残差の評価は数えず, 評価回数がscipyの結果と一致する
+        for method, variables in (("SLSQP", "linear"), ("BFGS", "log")):
+            system = TernaryBinodal(psfPhase())
+            system.phaseL.comp3.phi = 1e-3
+            res = system._TernaryBinodal__minimizePoint(method, variables=variables)
+            self.assertEqual(system.nfev, res.nfev)
+            self.assertEqual(system.njev, res.njev)
+
+    def test_progress(self):
+        # 進捗表示関数が点の順番に呼ばれる
+        calls = []
+        self.binodal_system.binodal(self.phaseL_phi3, solver="root",
+                                    progress=lambda i, record: calls.append((i, record['phi3'])))
+        self.assertEqual(calls, list(enumerate(self.phaseL_phi3)))
+
+    def test_spinodalLog(self):
+        spinodal_system = TernarySpinodal(psfPhase())
+        phase_phi3 = np.logspace(-4, -1, 4)
+        for solver in ("analytic", "minimize"):
+            ws, log = spinodal_system.spinodal(phase_phi3, solver=solver, progress=None, return_log=True)
+            self.assertEqual(len(log), len(phase_phi3))
+            self.assertTrue(np.all(log.toDataFrame()['residual'] < 1e-10))
+            self.assertTrue(ws.flags.writeable)
+
+class TestBinodalContinuation(unittest.TestCase):
+    def setUp(self):
+        self.binodal_system = TernaryBinodal(psfPhase())
+
+    def test_continuation(self):
+        # 臨界点付近まで追跡でき, 全ての点で残差が十分小さいことを確認
+        ws = self.binodal_system.binodalContinuation()
+        tie = self.binodal_system.tieLineFromBinodal(ws)
+        self.assertTrue(np.all(np.array(self.binodal_system.residual_list) < 1e-10))
+        # リーン相のポリマー分率は単調増加
+        self.assertTrue(np.all(np.diff(tie[:, 5]) > 0.))
+        # 最後のタイラインは十分短い
+        self.assertLess(np.linalg.norm(tie[-1, 0:3] - tie[-1, 3:]), 5e-3)
+
+    def test_continuationAgreesWithSweep(self):
+        ws = self.binodal_system.binodalContinuation()
+        tie = self.binodal_system.tieLineFromBinodal(ws)
+        # 最初のタイラインは掃引計算の最初の点と一致する
+        ws_sweep = self.binodal_system.binodal(np.array([1e-300]), solver="root")
+        np.testing.assert_allclose(tie[0], ws_sweep.ravel(), atol=1e-8)
+
+class TestHull(unittest.TestCase):
+    def test_phaseSplit(self):
+        tie, three = TernaryHull(psfPhase()).phaseSplit(100)
+        self.assertEqual(three.shape, (0, 9))
+        self.assertGreater(len(tie), 50)
+        # ポリマーリッチ相がポリマー体積分率の大きい方
+        self.assertTrue(np.all(tie[:, 2] > tie[:, 5]))
+
+    def test_threePhase(self):
+        # 3成分が対称で, 全ての組み合わせで相分離する系は3相領域を持つ
+        phase = Phase(Component(1, 1., "A"), Component(1, 1., "B"), Component(1, 1., "C"), 3., 3., 3.)
+        _, three = TernaryHull(phase).phaseSplit(100)
+        self.assertEqual(three.shape, (1, 9))
+        # 3つの頂点はそれぞれ異なる成分に富む
+        vertices = three.reshape(3, 3)
+        self.assertEqual(sorted(np.argmax(vertices, axis=1)), [0, 1, 2])
+        self.assertTrue(np.all(np.max(vertices, axis=1) > 0.7))
+
+    def test_binodalHull(self):
+        # 凸包のタイラインを解き直した結果が, 同じポリマーリーン相のポリマー体積分率で直接解いた結果と一致する
+        binodal_system = TernaryBinodal(psfPhase())
+        ws = binodal_system.binodalHull(100)
+        success = np.array(binodal_system.log.column('success'))
+        self.assertGreater(np.mean(success), 0.95)
+        self.assertTrue(np.all(np.array(binodal_system.residual_list)[success] < 1e-10))
+        rich, lean = np.split(ws, 2)
+        phaseL_phi3 = np.array(binodal_system.log.column('phi3'))
+        valid = success & (phaseL_phi3 > 0)
+        ws_root = TernaryBinodal(psfPhase()).binodal(phaseL_phi3[valid], solver="root", variables="log")
+        np.testing.assert_allclose(np.vstack((rich[valid], lean[valid])), ws_root, atol=1e-8)
+        # ヤコビ行列は受け入れた点 (初期値と各反復) だけで評価する
+        df = binodal_system.log.toDataFrame()
+        np.testing.assert_array_equal(df['njev'][success], df['nit'][success] + 1)
+        self.assertTrue(np.all(df['nfev'] >= df['njev']))
+        self.assertEqual(df['njev'].sum(), binodal_system.njev)
+
+    def test_boundaryLines(self):
+        # 適応メッシュのスピノーダルは解析解から最も細かい格子の間隔程度しか離れない
+        hull = TernaryHull(psfPhase())
+        mesh = hull.adaptiveMesh(8, 5)
+        self.assertLess(len(mesh.points), len(simplexLattice(8 * 2**5)) / 10)
+        spinodal = mesh.contour(column=0)[0]
+        analytic = TernarySpinodal(psfPhase()).spinodalAnalytic(np.linspace(0.01, 0.7, 20))
+        analytic = analytic[~np.isnan(analytic[:, 0])]
+        distance = np.min(np.linalg.norm(analytic[:, None, :] - spinodal[None], axis=-1), axis=1)
+        self.assertLess(np.max(distance), 2. / mesh.scale)
+        binodal, spinodal = hull.boundaryLines(8, 5)
+        self.assertEqual(len(binodal), 1)
+        np.testing.assert_allclose(np.sum(binodal[0], axis=1), 1.)
+
+if __name__ == "__main__":
+    unittest.main()
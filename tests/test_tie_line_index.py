@@ -0,0 +1,70 @@
+import unittest
+import sys
+sys.path.append(r"src")
+import numpy as np
+from component import Component
+from phase import Phase
+from ternary_system import TernaryBinodal
+from tie_line_index import TieLineIndex
+
+class TestTieLineIndex(unittest.TestCase):
+    def setUp(self):
+        # ポリマー体積分率が一定の平行なタイライン (φ3 = 0.1, 0.2, ..., 0.5)
+        phi3 = np.linspace(0.1, 0.5, 5)
+        rich = np.stack((np.full(5, 0.1), 0.9 - phi3, phi3), axis=-1)
+        lean = np.stack((0.9 - phi3, np.full(5, 0.1), phi3), axis=-1)
+        self.index = TieLineIndex(np.hstack((rich, lean)))
+
+    def test_interpolation(self):
+        rich, lean, beta = self.index.split(np.array([[0.3, 0.45, 0.25]]))
+        np.testing.assert_allclose(rich, [[0.1, 0.65, 0.25]])
+        np.testing.assert_allclose(lean, [[0.65, 0.1, 0.25]])
+        np.testing.assert_allclose(beta, [0.35 / 0.55])
+        i, t = self.index.locate(np.array([[0.3, 0.45, 0.25]]))
+        self.assertEqual(i[0], 1)
+        self.assertAlmostEqual(t[0], 0.5)
+
+    def test_outside(self):
+        # タイラインの範囲外 (φ3 > 0.5) とタイラインの線分の外
+        rich, lean, beta = self.index.split(np.array([[0.2, 0.2, 0.6], [0.05, 0.75, 0.2]]))
+        self.assertTrue(np.all(np.isnan(beta)))
+        self.assertTrue(np.all(np.isnan(rich)))
+        np.testing.assert_array_equal(self.index.contains(np.array([[0.3, 0.4, 0.3], [0.2, 0.2, 0.6]])),
+                                      [True, False])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TieLineIndex(np.zeros((3, 3)))
+
+class TestTieLineIndexBinodal(unittest.TestCase):
+    def setUp(self):
+        n_solvent = Component(18, 1., "Water")
+        solvent   = Component(71.29, 1.03, "NMP")
+        polymer   = Component(20270, 1.24, "PSF")
+        phase = Phase(n_solvent, solvent, polymer, 0.785 + 0.5 * 0.665, 0.24, 2.5)
+        binodal_system = TernaryBinodal(phase)
+        ws = binodal_system.binodal(np.logspace(-300, -2, 40), solver="root", variables="log", progress=None)
+        self.index = binodal_system.tieLineIndex(ws)
+
+    def test_leverRule(self):
+        # 計算済みのタイライン上の組成から, そのタイラインと相の分率が求まる
+        rng = np.random.default_rng(0)
+        i = rng.integers(0, len(self.index), 200)
+        beta = rng.random(200)
+        points = beta[:, None]*self.index.rich[i] + (1 - beta[:, None])*self.index.lean[i]
+        rich, lean, beta_found = self.index.split(points)
+        np.testing.assert_allclose(beta_found, beta, atol=1e-10)
+        np.testing.assert_allclose(rich, self.index.rich[i], atol=1e-10)
+        np.testing.assert_allclose(lean, self.index.lean[i], atol=1e-10)
+
+    def test_massBalance(self):
+        # 任意の2相領域内の組成で物質収支が成り立つ
+        points = np.random.default_rng(1).dirichlet([1., 1., 1.], size=1000)
+        rich, lean, beta = self.index.split(points)
+        inside = ~np.isnan(beta)
+        self.assertTrue(np.any(inside))
+        np.testing.assert_allclose(beta[inside, None]*rich[inside] + (1 - beta[inside, None])*lean[inside],
+                                   points[inside], atol=1e-12)
+
+if __name__ == "__main__":
+    unittest.main()